@@ -0,0 +1,200 @@
+"""Group commit for activity log entries.
+
+Nearly every chair action also appends an activity line, and committing each
+one on its own costs a transaction (and an fsync) per line. While the
+flusher runs, create_activity_log only queues the entry. A background thread
+then writes everything queued in one multi-row INSERT and one commit, at most
+ACTIVITY_FLUSH_INTERVAL seconds later. It flushes early once
+ACTIVITY_BATCH_SIZE entries are waiting.
+
+Queued entries get their seq when they are queued, from blocks of
+ACTIVITY_BATCH_SIZE seqs reserved ahead of time. Reads never write: they
+merge the entries still queued or being written (queued()) into what they
+read from the table, so a client always sees the lines it just posted.
+stop() flushes whatever is pending on shutdown; a hard crash can lose at
+most one interval, and unused reserved seqs are skipped.
+
+Queued entries are only visible to this process, so like the committee cache
+the buffer defaults to off when BROADCAST_BACKEND spans several workers.
+Without the flusher every entry is written and committed immediately.
+
+The route rejects ids that are already stored or queued. Two requests racing
+with the same id can still meet in one batch; the later one is dropped and
+logged.
+"""
+import logging
+import os
+import threading
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "0.1"))
+BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "500"))
+BUFFER_ENABLED = os.getenv(
+    "ACTIVITY_BUFFER",
+    "on" if os.getenv("BROADCAST_BACKEND", "memory") == "memory" else "off"
+) == "on"
+
+SEQ_STREAM = "activity_logs"
+
+class ActivityBuffer:
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL, batch_size: int = BATCH_SIZE, enabled: bool = BUFFER_ENABLED):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.enabled = enabled
+        self._pending: list[dict] = []
+        self._writing: list[dict] = []
+        self._next_seq = self._end_seq = 0
+        self._lock = threading.Lock()
+        self._seq_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._full = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    # -- Lifecycle --
+    def start(self):
+        if not self.enabled:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="activity-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        self._thread = None
+        if thread is not None:
+            self._stopping = True
+            self._wake.set()
+            self._full.set()
+            thread.join()
+        self.flush()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    # -- Writes --
+    def append(self, db: Session, values: dict) -> models.ActivityEntry:
+        """Queues one entry (values include id, committee_id and created_at).
+
+        Returns it as an unsaved row with its seq. Without the flusher it is
+        written and committed in db right away, and a clashing id raises
+        ValueError.
+        """
+        if not self.running:
+            if not self._write(db, [values]):
+                raise ValueError("Activity entry already exists")
+            return db.get(models.ActivityEntry, values["id"])
+
+        # Only appenders wait on _seq_lock; readers just take _lock
+        with self._seq_lock:
+            if self._next_seq >= self._end_seq:
+                self._reserve()
+            # Numbered and queued together, so a reader never sees a seq past one still to come
+            with self._lock:
+                values = dict(values, seq=self._next_seq)
+                self._next_seq += 1
+                self._pending.append(values)
+                full = len(self._pending) >= self.batch_size
+        self._wake.set()
+        if full:
+            self._full.set()
+        return models.ActivityEntry(**values)
+
+    def is_queued(self, entry_id: str) -> bool:
+        with self._lock:
+            return any(values["id"] == entry_id for values in (*self._writing, *self._pending))
+
+    def flush(self):
+        """Writes everything queued. Called by the flusher, by stop() and before a reset."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._writing = pending
+            if not pending:
+                return
+            db = SessionLocal()
+            try:
+                self._write(db, pending)
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = pending
+                raise
+            finally:
+                with self._lock:
+                    self._writing = []
+                db.close()
+
+    # -- Reads --
+    def queued(self, committee_id: int) -> list[models.ActivityEntry]:
+        """A committee's entries that are not committed yet, as unsaved rows.
+
+        Call this before querying the table: an entry leaves the buffer only
+        once its batch has committed, so it is always in one or the other.
+        """
+        with self._lock:
+            rows = [values for values in (*self._writing, *self._pending) if values["committee_id"] == committee_id]
+        return [models.ActivityEntry(**values) for values in rows]
+
+    # -- Internals --
+    def _write(self, db: Session, rows: list) -> int:
+        """Returns how many rows were written; rows whose id is taken are skipped."""
+        try:
+            self._insert(db, rows)
+            db.commit()
+            return len(rows)
+        except IntegrityError:
+            db.rollback()
+            if len(rows) == 1:
+                logger.warning("Dropped activity entry with duplicate id %s", rows[0]["id"])
+                return 0
+            # A client-generated id clashed; write the batch one row at a time
+            return sum(self._write(db, [row]) for row in rows)
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def _insert(db: Session, rows: list):
+        from .crud import reserve_sequences
+
+        if any(row.get("seq") is None for row in rows):
+            first = reserve_sequences(db, SEQ_STREAM, len(rows))
+            rows = [dict(row, seq=first + i) for i, row in enumerate(rows)]
+        db.execute(insert(models.ActivityEntry), rows)
+
+    def _reserve(self):
+        """Reserves the next block of seqs for queued entries (holding _seq_lock)."""
+        from .crud import reserve_sequences
+
+        db = SessionLocal()
+        try:
+            first = reserve_sequences(db, SEQ_STREAM, self.batch_size)
+            db.commit()
+        finally:
+            db.close()
+        self._next_seq, self._end_seq = first, first + self.batch_size
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            if self._stopping:
+                return
+            self._wake.clear()
+            # Collect a window's worth of entries, unless a full batch is already waiting
+            self._full.wait(self.flush_interval)
+            self._full.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Activity log flush failed, will retry")
+                self._wake.set()
+
+activity_buffer = ActivityBuffer()
@@ -0,0 +1,169 @@
+"""Content-addressed storage for uploaded resolution PDFs.
+
+Files live at <UPLOAD_DIR>/<sha[:2]>/<sha>.pdf, named by the SHA-256 of their
+bytes. Uploads are streamed to a temporary file in chunks while the hash is
+computed, then renamed into place; if that content is already stored the
+temporary file is dropped, so re-uploading an unchanged draft costs no space.
+Stored files are never rewritten, which is what makes the hash a safe ETag
+and lets blob_cache keep hot files in memory without invalidation.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads/resolutions")
+MAX_UPLOAD_BYTES = int(os.getenv("RESOLUTION_MAX_BYTES", str(20 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+class UploadTooLarge(ValueError):
+    def __init__(self, limit: int):
+        super().__init__(f"File exceeds the {limit} byte limit")
+        self.limit = limit
+
+class StoredBlob:
+    __slots__ = ("sha256", "size", "path", "existed")
+
+    def __init__(self, sha256: str, size: int, path: str, existed: bool):
+        self.sha256 = sha256
+        self.size = size
+        self.path = path
+        self.existed = existed
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(UPLOAD_DIR, sha256[:2], f"{sha256}.pdf")
+
+async def store_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredBlob:
+    """Streams an upload to disk, hashing as it goes. Raises UploadTooLarge."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+        return await run_in_threadpool(_commit, tmp_path, digest.hexdigest(), size)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def _commit(tmp_path: str, sha256: str, size: int) -> StoredBlob:
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        return StoredBlob(sha256, size, path, existed=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Atomic: concurrent uploads of the same content both land on one complete file
+    os.replace(tmp_path, path)
+    return StoredBlob(sha256, size, path, existed=False)
+
+def hash_file(path: str) -> tuple[str, int]:
+    """SHA-256 and size of a file already on disk."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+BLOB_CACHE_BYTES = int(os.getenv("RESOLUTION_CACHE_BYTES", str(64 * 1024 * 1024)))
+BLOB_CACHE_MAX_FILE = int(os.getenv("RESOLUTION_CACHE_MAX_FILE", str(8 * 1024 * 1024)))
+
+class BlobCache:
+    """LRU of stored file contents bounded by total bytes.
+
+    Only files up to max_file bytes are kept; larger ones are streamed from
+    disk. Concurrent misses for the same file share one read.
+    """
+    def __init__(self, max_bytes: int = BLOB_CACHE_BYTES, max_file: int = BLOB_CACHE_MAX_FILE):
+        self.max_bytes = max_bytes
+        self.max_file = max_file
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._loading: dict = {}
+        self._lock = threading.Lock()
+
+    def cacheable(self, size: int) -> bool:
+        return size <= self.max_file and size <= self.max_bytes
+
+    async def read(self, sha256: str, path: str) -> bytes:
+        with self._lock:
+            data = self._entries.get(sha256)
+            if data is not None:
+                self._entries.move_to_end(sha256)
+                return data
+
+        pending = self._loading.get(sha256)
+        if pending is None:
+            pending = asyncio.ensure_future(run_in_threadpool(_read_file, path))
+            self._loading[sha256] = pending
+            try:
+                data = await asyncio.shield(pending)
+            finally:
+                del self._loading[sha256]
+            self._put(sha256, data)
+            return data
+        return await asyncio.shield(pending)
+
+    def _put(self, sha256: str, data: bytes):
+        with self._lock:
+            if sha256 in self._entries or not self.cacheable(len(data)):
+                return
+            self._entries[sha256] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def iter_file(path: str, start: int, end: int):
+    """Yields bytes start..end (inclusive) of a file in CHUNK_SIZE pieces."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+blob_cache = BlobCache()
+
+def extract_pdf_text(path: str) -> str | None:
+    """Plain text of a stored PDF for the search index. None when pypdf is not
+    installed; an empty string when the file has no extractable text."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    try:
+        reader = PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception:
+        logger.exception("Could not extract text from %s", path)
+        return ""
@@ -0,0 +1,253 @@
+"""In-process authoritative copy of the committee_state rows (one per committee).
+
+Reads are served from memory and mutations are applied in memory, then
+persisted by a background flusher that coalesces everything written within
+one flush window into a single UPDATE. The copy is authoritative for this
+process only, so the backend must run as a single worker while it is in use.
+
+Durability: the flusher writes at most COMMITTEE_FLUSH_INTERVAL seconds after
+a change, and stop() flushes whatever is pending on shutdown.
+
+Whenever the flusher is not running, the database row is the source of truth:
+every read goes to the database and every mutation locks the row, applies and
+commits. That covers scripts and CLI tools, and deployments with more than one
+worker (BROADCAST_BACKEND other than memory), where no process can own the
+row, so COMMITTEE_CACHE defaults to off.
+"""
+import logging
+import os
+import threading
+import time
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models
+from .database import SessionLocal
+from .versions import table_versions
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("COMMITTEE_FLUSH_INTERVAL", "0.25"))
+CACHE_ENABLED = os.getenv(
+    "COMMITTEE_CACHE",
+    "on" if os.getenv("BROADCAST_BACKEND", "memory") == "memory" else "off"
+) == "on"
+
+STATE_FIELDS = [column.name for column in models.CommitteeState.__table__.columns]
+
+def _copy_value(value):
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+class CommitteeNotFound(LookupError):
+    pass
+
+class CommitteeStateCache:
+    """Holds one committee_state row per committee id."""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL, enabled: bool = CACHE_ENABLED):
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._states: dict[int, dict] = {}
+        self._dirty: set[int] = set()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    # -- Lifecycle --
+    def start(self):
+        """Loads every committee's row and starts the write-behind flusher."""
+        if not self.enabled:
+            return
+        db = SessionLocal()
+        try:
+            self.reload(db)
+            for state in db.query(models.CommitteeState).all():
+                self._states[state.id] = self._values_of(state)
+        finally:
+            db.close()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="committee-state-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the flusher and persists anything still pending."""
+        thread = self._thread
+        self._thread = None
+        if thread is not None:
+            self._stopping = True
+            self._wake.set()
+            thread.join()
+        self.flush()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    # -- Reads --
+    def get(self, db: Session, committee_id: int = models.DEFAULT_COMMITTEE_ID) -> models.CommitteeState:
+        """Returns a detached snapshot of the committee's state. Raises CommitteeNotFound."""
+        if not self.running:
+            return self._snapshot(self._load(db, committee_id))
+        values = self._cached(db, committee_id)
+        with self._lock:
+            return self._snapshot(values)
+
+    def exists(self, db: Session, committee_id: int) -> bool:
+        try:
+            self.get(db, committee_id)
+        except CommitteeNotFound:
+            return False
+        return True
+
+    # -- Writes --
+    def create(self, db: Session, **fields) -> models.CommitteeState:
+        # The id column defaults to the default committee, so new ids are assigned here
+        next_id = (db.query(func.max(models.CommitteeState.id)).scalar() or models.DEFAULT_COMMITTEE_ID) + 1
+        state = models.CommitteeState(id=next_id, **fields)
+        db.add(state)
+        db.commit()
+        db.refresh(state)
+        table_versions.bump(state.id, "committee_state")
+        with self._lock:
+            self._states[state.id] = self._values_of(state)
+            return self._snapshot(self._states[state.id])
+
+    def update(self, db: Session, committee_id: int, **changes) -> models.CommitteeState:
+        return self.mutate(db, committee_id, lambda values: values.update(changes))
+
+    def mutate(self, db: Session, committee_id: int, fn) -> models.CommitteeState:
+        """Applies fn(values) to the in-memory state under the lock and schedules a flush.
+
+        Without the flusher the row is the source of truth: it is locked,
+        changed and committed in this session.
+        """
+        if not self.running:
+            values = self._load(db, committee_id, for_update=True)
+            fn(values)
+            self._write(db, {committee_id: values})
+            table_versions.bump(committee_id, "committee_state")
+            return self._snapshot(values)
+
+        values = self._cached(db, committee_id)
+        with self._lock:
+            fn(values)
+            self._dirty.add(committee_id)
+            snapshot = self._snapshot(values)
+        self._wake.set()
+        table_versions.bump(committee_id, "committee_state")
+        return snapshot
+
+    def reload(self, db: Session, committee_id: int | None = None):
+        """Discards in-memory copies (one committee, or all), including unflushed changes."""
+        with self._lock:
+            if committee_id is None:
+                self._states.clear()
+                self._dirty.clear()
+            else:
+                self._states.pop(committee_id, None)
+                self._dirty.discard(committee_id)
+
+    def flush(self):
+        """Writes every dirty committee. Called from the flusher thread and stop()."""
+        # Serialize flushes so an older snapshot can never land after a newer one
+        with self._flush_lock:
+            with self._lock:
+                pending = {
+                    committee_id: {field: _copy_value(self._states[committee_id][field]) for field in STATE_FIELDS}
+                    for committee_id in self._dirty if committee_id in self._states
+                }
+                self._dirty.clear()
+            if not pending:
+                return
+
+            db = SessionLocal()
+            try:
+                self._write(db, pending)
+            except Exception:
+                with self._lock:
+                    self._dirty.update(pending)
+                raise
+            finally:
+                db.close()
+
+    # -- Internals --
+    # Routes on the async session run this code in greenlets on the event loop
+    # thread, where a threading lock does not exclude other requests across a
+    # database round trip. So no lock is ever held during IO.
+    def _cached(self, db: Session, committee_id: int) -> dict:
+        values = self._states.get(committee_id)
+        if values is None:
+            loaded = self._load(db, committee_id)
+            with self._lock:
+                # Another request may have loaded it meanwhile; the first copy wins
+                values = self._states.setdefault(committee_id, loaded)
+        return values
+
+    def _write(self, db: Session, pending: dict):
+        try:
+            rows = {
+                row.id: row
+                for row in db.query(models.CommitteeState).filter(models.CommitteeState.id.in_(list(pending))).all()
+            }
+            for committee_id, values in pending.items():
+                row = rows.get(committee_id)
+                if row is None:
+                    row = models.CommitteeState(id=committee_id)
+                    db.add(row)
+                for field, value in values.items():
+                    setattr(row, field, value)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    def _load(self, db: Session, committee_id: int, for_update: bool = False) -> dict:
+        query = db.query(models.CommitteeState).filter(models.CommitteeState.id == committee_id).populate_existing()
+        if for_update:
+            # Shared-row mode: hold the row lock until flush() commits
+            query = query.with_for_update()
+        state = query.first()
+        if not state:
+            # Only the default committee is created on demand; others go through create()
+            if committee_id != models.DEFAULT_COMMITTEE_ID:
+                raise CommitteeNotFound(committee_id)
+            state = models.CommitteeState(id=committee_id)
+            db.add(state)
+            try:
+                db.commit()
+            except IntegrityError:
+                # A concurrent request created it first
+                db.rollback()
+                return self._load(db, committee_id, for_update)
+            db.refresh(state)
+        return self._values_of(state)
+
+    @staticmethod
+    def _values_of(state: models.CommitteeState) -> dict:
+        return {field: _copy_value(getattr(state, field)) for field in STATE_FIELDS}
+
+    @staticmethod
+    def _snapshot(values: dict) -> models.CommitteeState:
+        return models.CommitteeState(**{field: _copy_value(value) for field, value in values.items()})
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            if self._stopping:
+                return
+            # Let further mutations within the window coalesce into one write
+            self._wake.clear()
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Committee state flush failed, will retry")
+                self._wake.set()
+
+committee_cache = CommitteeStateCache()
@@ -0,0 +1,185 @@
+"""Negotiated gzip / brotli for HTTP responses.
+
+Conference Wi-Fi is the slowest link between us and the clients, and JSON
+lists compress 5-10x. CompressionMiddleware picks the best encoding the
+client accepts, brotli when the brotli package is installed and otherwise
+gzip. It compresses bodies of at least COMPRESSION_MIN_BYTES. Responses
+that are already encoded, partial (206), streamed or of a compressed media
+type (PDF downloads) pass through untouched.
+
+Responses that carry an ETag (see versions.py) are compressed once per
+body: the compressed bytes are kept in a small LRU keyed by a digest of the
+uncompressed body and the encoding, so a polling storm served from
+response_cache does not recompress the same body for every client. The
+ETag only marks a response as worth caching; it is a weak tag and is not
+trusted to identify the bytes.
+
+WebSockets are compressed by the server: uvicorn negotiates
+permessage-deflate with every client that offers it, and each connection
+keeps its own deflate context across messages (see render.yaml).
+"""
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# 4-5 is where brotli beats gzip on size for about the same CPU
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(8 * 1024 * 1024)))
+# Larger bodies are compressed off the event loop
+THREAD_MIN_BYTES = 256 * 1024
+
+SKIP_MEDIA_TYPES = ("application/pdf", "application/zip", "application/gzip", "image/", "audio/", "video/", "font/woff")
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+def supported_encodings() -> tuple:
+    """In order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """The preferred encoding the client accepts with q > 0, or None for identity."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+class CompressedBodies:
+    """LRU of compressed bodies bounded by total bytes."""
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: tuple) -> bytes | None:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: tuple, body: bytes):
+        if len(body) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+compressed_bodies = CompressedBodies()
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = start["headers"]
+            if message.get("more_body", False) or len(body) < self.minimum_size or not self._compressible(start):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            key = (hashlib.blake2b(body, digest_size=16).digest(), encoding) if _header(headers, b"etag") else None
+            compressed = compressed_bodies.get(key) if key else None
+            if compressed is None:
+                if len(body) >= THREAD_MIN_BYTES:
+                    compressed = await run_in_threadpool(compress, body, encoding)
+                else:
+                    compressed = compress(body, encoding)
+                if key:
+                    compressed_bodies.put(key, compressed)
+
+            start["headers"] = [(name, value) for name, value in headers if name not in (b"content-length", b"vary")] + [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", _vary(headers)),
+            ]
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(start) -> bool:
+        if start["status"] != 200:
+            return False
+        headers = start["headers"]
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        media_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+        return not media_type.startswith(SKIP_MEDIA_TYPES)
+
+def _header(headers, name: bytes) -> bytes | None:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+def _vary(headers) -> bytes:
+    vary = _header(headers, b"vary")
+    if not vary:
+        return b"Accept-Encoding"
+    if b"accept-encoding" in vary.lower():
+        return vary
+    return vary + b", Accept-Encoding"
@@ -1,43 +1,142 @@
+import time
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from . import models, schemas
+from sqlalchemy import and_, or_, delete, func
+from sqlalchemy.exc import IntegrityError
+from . import models, schemas, scoring, scoreboard
+from .committee_cache import committee_cache
+from .activity_buffer import activity_buffer
+from .search import SearchDoc, search_index
+from .versions import table_versions
+from .models import DEFAULT_COMMITTEE_ID
+
+# Every function is scoped to one committee; committee_id defaults to the
+# committee served by the unprefixed /api routes. Writes bump table_versions
+# after committing, which is what the GET routes' ETags are made of.
+
+def id_taken(db: Session, model, row_id: str) -> bool:
+    """Client-generated ids are primary keys shared by every committee."""
+    return db.get(model, row_id) is not None
 
 # -- Auth & Admins --
-def get_admin_by_name(db: Session, name: str):
-    return db.query(models.Admin).filter(models.Admin.name == name).first()
-
-def authenticate_admin(db: Session, name: str, password: str):
-    admin = get_admin_by_name(db, name)
+def get_admin_by_name(db: Session, name: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return db.query(models.Admin).filter(
+        models.Admin.committee_id == committee_id,
+        models.Admin.name == name
+    ).first()
+
+def authenticate_admin(db: Session, name: str, password: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    admin = get_admin_by_name(db, name, committee_id)
     if not admin:
         return False
     if admin.password == password:
         return admin
     return False
 
-def authenticate_delegate(db: Session, country: str, password: str):
-    delegate = db.query(models.Delegate).filter(models.Delegate.country == country).first()
+def authenticate_delegate(db: Session, country: str, password: str, committee_id: int = DEFAULT_COMMITTEE_ID, with_averages: bool = False):
+    delegate = db.query(models.Delegate).filter(
+        models.Delegate.committee_id == committee_id,
+        models.Delegate.country == country
+    ).first()
     if not delegate:
         return False
     if delegate.password == password:
-        # Attach calculated averages so the frontend gets the full marks data on login
-        state = get_committee_state(db)
-        avgs = calculate_delegate_averages(db, delegate, state)
-        delegate.gsl_avg = avgs["gsl_avg"]
-        delegate.chits_score = avgs["chits_score"]
-        delegate.mod_avg = avgs["mod_avg"]
-        delegate.total_score = avgs["total_score"]
+        if with_averages:
+            avgs = scoreboard.load_averages(db, [delegate])
+            scoring.apply_averages(delegate, avgs[delegate.id])
         return delegate
     return False
 
-def update_delegate_password(db: Session, delegate_id: str, new_password: str):
-    delegate = db.query(models.Delegate).filter(models.Delegate.id == delegate_id).first()
+def update_delegate_password(db: Session, delegate_id: str, new_password: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    delegate = get_delegate_row(db, delegate_id, committee_id)
     if delegate:
         delegate.password = new_password
         db.commit()
         db.refresh(delegate)
+        table_versions.bump(committee_id, "delegates")
         return True
     return False
 
+# -- Delta Sync Cursors --
+def next_sequence(db: Session, stream: str) -> int:
+    """Hands out the next seq for a table. The counter row stays locked until the
+    caller commits, so seqs become visible in the order they were handed out."""
+    counter = models.SyncCounter
+    updated = db.query(counter).filter(counter.name == stream).update(
+        {counter.value: counter.value + 1}, synchronize_session=False
+    )
+    if not updated:
+        db.add(counter(name=stream, value=1))
+        db.flush()
+        return 1
+    return db.query(counter.value).filter(counter.name == stream).scalar()
+
+def reserve_sequences(db: Session, stream: str, count: int) -> int:
+    """next_sequence for a batch: reserves count seqs and returns the first."""
+    counter = models.SyncCounter
+    updated = db.query(counter).filter(counter.name == stream).update(
+        {counter.value: counter.value + count}, synchronize_session=False
+    )
+    if not updated:
+        db.add(counter(name=stream, value=count))
+        db.flush()
+        return 1
+    return db.query(counter.value).filter(counter.name == stream).scalar() - count + 1
+
+def get_changes_since(db: Session, model, since: int, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Rows inserted or updated after the given cursor, plus the cursor to use next time."""
+    # Before the query; see ActivityBuffer.queued
+    queued = activity_buffer.queued(committee_id) if model is models.ActivityEntry else []
+    rows = db.query(model).filter(
+        model.committee_id == committee_id,
+        model.seq > since
+    ).order_by(model.seq).all()
+    if queued:
+        stored = {row.id for row in rows}
+        rows += [row for row in queued if row.seq > since and row.id not in stored]
+        rows.sort(key=lambda row: row.seq)
+    cursor = rows[-1].seq if rows else since
+    return rows, cursor
+
+# -- Keyset Pagination --
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+def parse_page_cursor(cursor: str | None):
+    """Cursors look like '<created_at>:<id>'; a bare '<created_at>' is also accepted.
+    Raises ValueError for anything else."""
+    if not cursor:
+        return None
+    created_at, _, row_id = cursor.partition(":")
+    return int(created_at), (row_id or None)
+
+def page_cursor(row) -> str:
+    return f"{row.created_at or 0}:{row.id}"
+
+def is_before(row, position) -> bool:
+    """newest_first's cursor filter, for rows that are not in the table yet."""
+    created_at, row_id = position
+    if row_id is None:
+        return (row.created_at or 0) < created_at
+    return (row.created_at or 0, row.id) < (created_at, row_id)
+
+def newest_first(db: Session, model, before: str | None = None, limit: int | None = None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Rows ordered by (created_at, id) descending, optionally starting after a cursor."""
+    query = db.query(model).filter(model.committee_id == committee_id)
+    position = parse_page_cursor(before)
+    if position:
+        created_at, row_id = position
+        if row_id is None:
+            query = query.filter(model.created_at < created_at)
+        else:
+            query = query.filter(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id)
+            ))
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
 # -- Helper for Averages --
 def calculate_delegate_averages(db: Session, delegate: models.Delegate, state: models.CommitteeState) -> dict:
     scores = delegate.scores or {}
@@ -53,6 +152,7 @@ def calculate_delegate_averages(db: Session, delegate: models.Delegate, state: m
     mod_total = sum(mod_data) if isinstance(mod_data, list) else mod_data
     
     total_mods = db.query(models.Motion).filter(
+        models.Motion.committee_id == delegate.committee_id,
         models.Motion.type.in_(['moderated_caucus', 'mod_caucus', 'Moderated Caucus']),
         models.Motion.status == 'passed'
     ).count()
@@ -61,6 +161,7 @@ def calculate_delegate_averages(db: Session, delegate: models.Delegate, state: m
 
     # 3. Chits Average (Questions + Answers)
     chits = db.query(models.Chit).filter(
+        models.Chit.committee_id == delegate.committee_id,
         or_(models.Chit.from_delegate == delegate.id, models.Chit.from_delegate == delegate.name)
     ).all()
     
@@ -88,269 +189,561 @@ def calculate_delegate_averages(db: Session, delegate: models.Delegate, state: m
     }
 
 # -- Delegates --
-def get_delegates(db: Session):
-    delegates = db.query(models.Delegate).all()
-    state = get_committee_state(db)
-    
-    for delegate in delegates:
-        avgs = calculate_delegate_averages(db, delegate, state)
-        delegate.gsl_avg = avgs["gsl_avg"]
-        delegate.chits_score = avgs["chits_score"]
-        delegate.mod_avg = avgs["mod_avg"]
-        delegate.total_score = avgs["total_score"]
-        
-    return delegates
-
-def get_delegate(db: Session, delegate_id: str):
-    delegate = db.query(models.Delegate).filter(models.Delegate.id == delegate_id).first()
+def get_delegates(db: Session, committee_id: int = DEFAULT_COMMITTEE_ID):
+    # Averages come from the materialized scoreboard in a single join
+    return scoreboard.load_delegates_with_averages(db, committee_id)
+
+def get_delegate_row(db: Session, delegate_id: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return db.query(models.Delegate).filter(
+        models.Delegate.committee_id == committee_id,
+        models.Delegate.id == delegate_id
+    ).first()
+
+def get_delegate(db: Session, delegate_id: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    delegate = get_delegate_row(db, delegate_id, committee_id)
     if delegate:
-        state = get_committee_state(db)
-        avgs = calculate_delegate_averages(db, delegate, state)
-        delegate.gsl_avg = avgs["gsl_avg"]
-        delegate.chits_score = avgs["chits_score"]
-        delegate.mod_avg = avgs["mod_avg"]
-        delegate.total_score = avgs["total_score"]
+        avgs = scoreboard.load_averages(db, [delegate])
+        scoring.apply_averages(delegate, avgs[delegate.id])
     return delegate
 
-def create_delegate(db: Session, delegate: schemas.DelegateCreate):
-    db_delegate = models.Delegate(**delegate.model_dump())
+def create_delegate(db: Session, delegate: schemas.DelegateCreate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_delegate = models.Delegate(**delegate.model_dump(), committee_id=committee_id)
     db.add(db_delegate)
+    scoreboard.refresh_delegates(db, [db_delegate])
     db.commit()
     db.refresh(db_delegate)
+    table_versions.bump(committee_id, "delegates")
     return db_delegate
 
-def update_delegate_score(db: Session, delegate_id: str, category: str, score: int):
-    db_delegate = db.query(models.Delegate).filter(models.Delegate.id == delegate_id).first()
+def update_delegate_score(db: Session, delegate_id: str, category: str, score: int, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_delegate = get_delegate_row(db, delegate_id, committee_id)
     if db_delegate:
         scores = db_delegate.scores.copy() if db_delegate.scores else {}
         scores[category] = score
         db_delegate.scores = scores
+        scoreboard.refresh_delegates(db, [db_delegate])
         db.commit()
         db.refresh(db_delegate)
-    return get_delegate(db, delegate_id) 
+        table_versions.bump(committee_id, "delegates")
+    return get_delegate(db, delegate_id, committee_id) 
 
 # -- Motions --
-def get_motions(db: Session):
-    return db.query(models.Motion).order_by(models.Motion.timestamp.desc()).all()
-
-def get_motion(db: Session, motion_id: str):
-    return db.query(models.Motion).filter(models.Motion.id == motion_id).first()
-
-def create_motion(db: Session, motion: schemas.MotionCreate):
-    db_motion = models.Motion(**motion.model_dump())
+def get_motions(db: Session, before: str | None = None, limit: int | None = None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return newest_first(db, models.Motion, before, limit, committee_id)
+
+def get_motion(db: Session, motion_id: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return db.query(models.Motion).filter(
+        models.Motion.committee_id == committee_id,
+        models.Motion.id == motion_id
+    ).first()
+
+def create_motion(db: Session, motion: schemas.MotionCreate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_motion = models.Motion(**motion.model_dump(), committee_id=committee_id)
+    db_motion.created_at = now_ms()
     db.add(db_motion)
+    if scoreboard.is_mod_caucus_pass_change(db_motion.type, None, db_motion.status):
+        scoreboard.rebuild(db, committee_id)
     db.commit()
     db.refresh(db_motion)
+    table_versions.bump(committee_id, "motions")
     return db_motion
 
-def update_motion(db: Session, motion_id: str, update_data: schemas.MotionUpdate):
-    db_motion = get_motion(db, motion_id)
+def update_motion(db: Session, motion_id: str, update_data: schemas.MotionUpdate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_motion = get_motion(db, motion_id, committee_id)
     if db_motion:
+        old_status = db_motion.status
         db_motion.status = update_data.status
         if update_data.status != 'pending':
             db_motion.votes_for = update_data.votes_for
             db_motion.votes_against = update_data.votes_against
             db_motion.votes_abstain = update_data.votes_abstain
+        if scoreboard.is_mod_caucus_pass_change(db_motion.type, old_status, db_motion.status):
+            scoreboard.rebuild(db, committee_id)
         db.commit()
         db.refresh(db_motion)
+        table_versions.bump(committee_id, "motions")
     return db_motion
 
 # -- Chits --
-def get_chits(db: Session):
-    return db.query(models.Chit).all()
+def get_chits(db: Session, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return db.query(models.Chit).filter(models.Chit.committee_id == committee_id).all()
+
+def get_delegate_chits(db: Session, delegate_keys, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Chits sent from or to any of delegate_keys (a delegate's id and country)."""
+    keys = list(delegate_keys)
+    return db.query(models.Chit).filter(
+        models.Chit.committee_id == committee_id,
+        or_(models.Chit.from_delegate.in_(keys), models.Chit.to_delegate.in_(keys))
+    ).all()
 
-def get_chit(db: Session, chit_id: str):
-    return db.query(models.Chit).filter(models.Chit.id == chit_id).first()
+def get_chit(db: Session, chit_id: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return db.query(models.Chit).filter(
+        models.Chit.committee_id == committee_id,
+        models.Chit.id == chit_id
+    ).first()
 
-def create_chit(db: Session, chit: schemas.ChitCreate):
-    db_chit = models.Chit(**chit.model_dump())
+def create_chit(db: Session, chit: schemas.ChitCreate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_chit = models.Chit(**chit.model_dump(), committee_id=committee_id)
+    db_chit.seq = next_sequence(db, "chits")
     db.add(db_chit)
+    scoreboard.refresh_chit_sender(db, db_chit.from_delegate, committee_id)
     db.commit()
     db.refresh(db_chit)
+    table_versions.bump(committee_id, "chits")
     return db_chit
 
-def update_chit(db: Session, chit_id: str, chit_update: schemas.ChitUpdate):
-    db_chit = get_chit(db, chit_id)
+def update_chit(db: Session, chit_id: str, chit_update: schemas.ChitUpdate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_chit = get_chit(db, chit_id, committee_id)
     if db_chit:
         update_data = chit_update.model_dump(exclude_unset=True)
+        old_sender = db_chit.from_delegate
         for key, value in update_data.items():
             setattr(db_chit, key, value)
+        db_chit.seq = next_sequence(db, "chits")
+        if update_data.keys() & {"marks", "type", "from_delegate"}:
+            # A chit moved to another sender changes both senders' averages
+            scoreboard.refresh_chit_sender(db, db_chit.from_delegate, committee_id)
+            if old_sender != db_chit.from_delegate:
+                scoreboard.refresh_chit_sender(db, old_sender, committee_id)
         db.commit()
         db.refresh(db_chit)
+        table_versions.bump(committee_id, "chits")
     return db_chit
 
 # -- Activity Log & Announcements --
-def get_activity_logs(db: Session):
-    return db.query(models.ActivityEntry).order_by(models.ActivityEntry.timestamp.desc()).all()
-
-def create_activity_log(db: Session, entry: schemas.ActivityEntryCreate):
-    db_entry = models.ActivityEntry(**entry.model_dump())
-    db.add(db_entry)
-    db.commit()
-    db.refresh(db_entry)
-    return db_entry
-
-def get_announcements(db: Session):
-    return db.query(models.Announcement).order_by(models.Announcement.timestamp.desc()).all()
-
-def create_announcement(db: Session, announcement: schemas.AnnouncementCreate):
-    db_announcement = models.Announcement(**announcement.model_dump())
+def get_activity_logs(db: Session, before: str | None = None, limit: int | None = None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    queued = activity_buffer.queued(committee_id)  # before the query; see ActivityBuffer.queued
+    rows = newest_first(db, models.ActivityEntry, before, limit, committee_id)
+    if not queued:
+        return rows
+    position = parse_page_cursor(before)
+    stored = {row.id for row in rows}
+    rows += [row for row in queued if row.id not in stored and (position is None or is_before(row, position))]
+    rows.sort(key=lambda row: (row.created_at or 0, row.id), reverse=True)
+    return rows[:limit] if limit else rows
+
+def create_activity_log(db: Session, entry: schemas.ActivityEntryCreate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    # Group-committed by activity_buffer. Readers merge in what is still queued,
+    # so the version can move as soon as it is queued.
+    row = activity_buffer.append(db, dict(entry.model_dump(), committee_id=committee_id, created_at=now_ms()))
+    table_versions.bump(committee_id, "activity_logs")
+    return row
+
+def get_announcements(db: Session, before: str | None = None, limit: int | None = None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return newest_first(db, models.Announcement, before, limit, committee_id)
+
+def create_announcement(db: Session, announcement: schemas.AnnouncementCreate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_announcement = models.Announcement(**announcement.model_dump(), committee_id=committee_id)
+    db_announcement.seq = next_sequence(db, "announcements")
+    db_announcement.created_at = now_ms()
     db.add(db_announcement)
     db.commit()
     db.refresh(db_announcement)
+    table_versions.bump(committee_id, "announcements")
     return db_announcement
 
 # -- Committee State --
-def get_committee_state(db: Session):
-    state = db.query(models.CommitteeState).first()
-    if not state:
-        state = models.CommitteeState()
-        db.add(state)
-        db.commit()
-        db.refresh(state)
-    return state
-
-def update_committee_phase(db: Session, phase: str):
-    state = get_committee_state(db)
-    state.phase = phase
-    db.commit()
-    db.refresh(state)
+# Each committee's committee_state row is served from and mutated in the in-process cache;
+# committee_cache persists changes in the background.
+def get_committees(db: Session):
+    committee_cache.get(db)  # the default committee is created on first use
+    return db.query(models.CommitteeState).order_by(models.CommitteeState.id).all()
+
+def create_committee(db: Session, committee: schemas.CommitteeCreate):
+    return committee_cache.create(db, **committee.model_dump(exclude_none=True))
+
+def get_committee_state(db: Session, committee_id: int = DEFAULT_COMMITTEE_ID):
+    state = committee_cache.get(db, committee_id)
+    if state.active_voting_motion_id:
+        state.delegate_votes = get_votes(db, state.active_voting_motion_id)
     return state
 
-def update_committee_speakers(db: Session, speakers_list: list, current_speaker: str | None):
-    state = get_committee_state(db)
-    state.speakers_list = speakers_list
-    state.current_speaker = current_speaker
-    db.commit()
-    db.refresh(state)
-    return state
-
-def update_committee_timer(db: Session, timer_seconds: int, timer_running: bool, timer_total: int, last_started_at: int | None):
-    state = get_committee_state(db)
-    state.timer_seconds = timer_seconds
-    state.timer_running = timer_running
-    state.timer_total = timer_total
-    state.last_started_at = last_started_at
-    db.commit()
-    db.refresh(state)
-    return state
-
-def update_committee_floor(db: Session, floor_open: bool):
-    state = get_committee_state(db)
-    state.floor_open = floor_open
-    db.commit()
-    db.refresh(state)
-    return state
-
-def update_motions_floor(db: Session, motions_floor_open: bool):
-    state = get_committee_state(db)
-    state.motions_floor_open = motions_floor_open
-    db.commit()
-    db.refresh(state)
-    return state
-
-def update_voting_session(db: Session, motion_id: str | None, votes: dict):
-    state = get_committee_state(db)
-    state.active_voting_motion_id = motion_id
-    state.delegate_votes = votes
-    db.commit()
-    db.refresh(state)
+def update_committee_phase(db: Session, phase: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return committee_cache.update(db, committee_id, phase=phase)
+
+def update_committee_speakers(db: Session, speakers_list: list, current_speaker: str | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return replace_committee_list(db, "speakers", speakers_list, current_speaker, committee_id)
+
+def update_committee_timer(db: Session, timer_seconds: int, timer_running: bool, timer_total: int, last_started_at: int | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    # Legacy whole-timer write. timer_seconds is what was left at last_started_at,
+    # both from the client's clock, so they are stored as a pair; re-stamping only
+    # last_started_at would restart the run with time it had already used. The
+    # server clock is used only when a running timer comes without a start time.
+    # Current clients send start/pause/reset ops (apply_timer_op) instead.
+    if timer_running and last_started_at is None:
+        last_started_at = now_ms()
+    return committee_cache.update(
+        db,
+        committee_id,
+        timer_seconds=timer_seconds,
+        timer_running=timer_running,
+        timer_total=timer_total,
+        last_started_at=last_started_at if timer_running else None
+    )
+
+def update_committee_floor(db: Session, floor_open: bool, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return committee_cache.update(db, committee_id, floor_open=floor_open)
+
+def update_motions_floor(db: Session, motions_floor_open: bool, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return committee_cache.update(db, committee_id, motions_floor_open=motions_floor_open)
+
+def update_voting_session(db: Session, motion_id: str | None, votes: dict, committee_id: int = DEFAULT_COMMITTEE_ID):
+    if motion_id:
+        open_vote(db, motion_id, votes, committee_id)
+    state = committee_cache.update(db, committee_id, active_voting_motion_id=motion_id, delegate_votes={})
+    if motion_id:
+        state.delegate_votes = get_votes(db, motion_id)
     return state
 
-def cast_delegate_vote(db: Session, delegate_id: str, vote: str | None):
-    state = get_committee_state(db)
-    current_votes = state.delegate_votes.copy() if state.delegate_votes else {}
-    if vote is None:
-        current_votes.pop(delegate_id, None)
-    else:
-        current_votes[delegate_id] = vote
-    state.delegate_votes = current_votes
-    db.commit()
-    db.refresh(state)
-    return state
-
-def update_caucus_session(db: Session, caucus_id: str | None):
-    state = get_committee_state(db)
-    state.active_caucus_id = caucus_id
+def update_caucus_session(db: Session, caucus_id: str | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    changes = {"active_caucus_id": caucus_id}
     if caucus_id is None:
-        state.caucus_speakers_list = []
-        state.caucus_current_speaker = None
-        state.caucus_floor_open = False
-    db.commit()
-    db.refresh(state)
-    return state
-
-def update_caucus_speakers(db: Session, speakers_list: list, current_speaker: str | None):
-    state = get_committee_state(db)
-    state.caucus_speakers_list = speakers_list
-    state.caucus_current_speaker = current_speaker
-    db.commit()
-    db.refresh(state)
-    return state
-
-def update_caucus_floor(db: Session, floor_open: bool):
-    state = get_committee_state(db)
-    state.caucus_floor_open = floor_open
-    db.commit()
-    db.refresh(state)
-    return state
+        changes.update(caucus_speakers_list=[], caucus_current_speaker=None, caucus_floor_open=False)
+    return committee_cache.update(db, committee_id, **changes)
+
+def update_caucus_speakers(db: Session, speakers_list: list, current_speaker: str | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return replace_committee_list(db, "caucus_speakers", speakers_list, current_speaker, committee_id)
+
+def update_caucus_floor(db: Session, floor_open: bool, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return committee_cache.update(db, committee_id, caucus_floor_open=floor_open)
+
+def update_yield_state(db: Session, yield_type: str | None, target: str | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return committee_cache.update(db, committee_id, current_yield_type=yield_type, yield_target=target)
+
+def update_committee_info(db: Session, name: str, agenda: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return committee_cache.update(db, committee_id, name=name, agenda=agenda)
+
+def update_question_queue(db: Session, queue: list, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return replace_committee_list(db, "question_queue", queue, None, committee_id)
+
+# -- Committee Lists --
+# Speakers lists and the question queue are edited with small server-side
+# operations instead of whole-list overwrites. Every change bumps the list's
+# version; callers may pass expected_version to refuse a stale edit.
+# name -> (list field, current speaker field, version field)
+COMMITTEE_LISTS = {
+    "speakers": ("speakers_list", "current_speaker", "speakers_version"),
+    "caucus_speakers": ("caucus_speakers_list", "caucus_current_speaker", "caucus_speakers_version"),
+    "question_queue": ("question_queue", None, "question_queue_version"),
+}
+
+class ListVersionConflict(ValueError):
+    def __init__(self, version: int):
+        super().__init__(f"List is at version {version}")
+        self.version = version
+
+def _list_view(name: str, values: dict) -> dict:
+    list_field, current_field, version_field = COMMITTEE_LISTS[name]
+    return {
+        "list": name,
+        "items": list(values[list_field] or []),
+        "current_speaker": values[current_field] if current_field else None,
+        "version": values[version_field] or 0,
+    }
 
-def update_yield_state(db: Session, yield_type: str | None, target: str | None):
-    state = get_committee_state(db)
-    state.current_yield_type = yield_type
-    state.yield_target = target
+def replace_committee_list(db: Session, name: str, items: list, current_speaker: str | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Whole-list overwrite, kept for older clients. Still bumps the version."""
+    list_field, current_field, version_field = COMMITTEE_LISTS[name]
+
+    def apply(values: dict):
+        values[list_field] = list(items)
+        if current_field:
+            values[current_field] = current_speaker
+        values[version_field] = (values[version_field] or 0) + 1
+    return committee_cache.mutate(db, committee_id, apply)
+
+def apply_list_op(db: Session, name: str, op: schemas.CommitteeListOp, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Applies one operation atomically. Returns (list view, delta); delta is None if nothing changed.
+
+    Raises ListVersionConflict when op.expected_version is stale.
+    """
+    list_field, current_field, version_field = COMMITTEE_LISTS[name]
+    result = {}
+
+    def apply(values: dict):
+        items = list(values[list_field] or [])
+        version = values[version_field] or 0
+        if op.expected_version is not None and op.expected_version != version:
+            raise ListVersionConflict(version)
+
+        delta = {"list": name, "op": op.op, "item": op.item}
+        if op.op == "append":
+            if op.item is None or op.item in items:
+                return
+            items.append(op.item)
+        elif op.op == "remove":
+            if op.item not in items:
+                return
+            items.remove(op.item)
+        elif op.op == "move":
+            if op.item not in items or op.index is None:
+                return
+            items.remove(op.item)
+            index = max(0, min(op.index, len(items)))
+            items.insert(index, op.item)
+            delta["index"] = index
+        elif op.op == "pop_next":
+            delta["item"] = items.pop(0) if items else None
+            if current_field:
+                values[current_field] = delta["item"]
+            elif delta["item"] is None:
+                return
+        elif op.op == "clear":
+            if not items:
+                return
+            items = []
+
+        values[list_field] = items
+        values[version_field] = version + 1
+        delta["version"] = version + 1
+        result["delta"] = delta
+
+    state = committee_cache.mutate(db, committee_id, apply)
+    return _list_view(name, {field: getattr(state, field) for field in (list_field, current_field, version_field) if field}), result.get("delta")
+
+# -- Timer --
+# The server owns the clock: last_started_at is always server time, and
+# timer_seconds is what was left at that instant. timers.py ends running timers.
+def timer_remaining(values: dict, now: int) -> int:
+    if not values["timer_running"] or not values["last_started_at"]:
+        return values["timer_seconds"] or 0
+    return max(0, values["timer_seconds"] - (now - values["last_started_at"]) // 1000)
+
+def apply_timer_op(db: Session, op: str, seconds: int | None = None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """start [seconds] / pause / reset [seconds] / set_total seconds. Raises ValueError."""
+    if op == "set_total" and seconds is None:
+        raise ValueError("set_total needs seconds")
+    if seconds is not None and seconds < 0:
+        raise ValueError("seconds must not be negative")
+    now = now_ms()
+
+    def apply(values: dict):
+        remaining = timer_remaining(values, now)
+        if op == "start":
+            if seconds is not None:
+                values["timer_total"] = seconds
+            start_from = seconds if seconds is not None else remaining
+            if start_from > 0:
+                values.update(timer_seconds=start_from, timer_running=True, last_started_at=now)
+        elif op == "pause":
+            values.update(timer_seconds=remaining, timer_running=False, last_started_at=None)
+        elif op == "reset":
+            total = seconds if seconds is not None else values["timer_total"]
+            values.update(timer_seconds=total, timer_total=total, timer_running=False, last_started_at=None)
+        elif op == "set_total":
+            values["timer_total"] = seconds
+
+    return committee_cache.mutate(db, committee_id, apply)
+
+def expire_timer(db: Session, started_at: int, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Stops the timer run that began at started_at. Returns None if that run already
+    ended or was changed (paused, restarted, or expired by another worker)."""
+    expired = []
+
+    def apply(values: dict):
+        if values["timer_running"] and values["last_started_at"] == started_at:
+            values.update(timer_seconds=0, timer_running=False, last_started_at=None)
+            expired.append(True)
+
+    state = committee_cache.mutate(db, committee_id, apply)
+    return state if expired else None
+
+# -- Voting --
+# Each vote is its own row, so concurrent voters never rewrite each other's
+# entries, and the tally row is adjusted with in-place increments. The tally
+# row is also the gate between casts and close_vote: a cast only counts if
+# its tally update lands while the row is still open, and closing takes the
+# same row lock before the final count.
+VOTE_COLUMNS = {
+    "for": models.VoteTally.votes_for,
+    "against": models.VoteTally.votes_against,
+    "abstain": models.VoteTally.votes_abstain,
+}
+
+def get_votes(db: Session, motion_id: str) -> dict:
+    rows = db.query(models.Vote.delegate_id, models.Vote.vote).filter(models.Vote.motion_id == motion_id).all()
+    return {delegate_id: vote for delegate_id, vote in rows}
+
+def get_vote_tally(db: Session, motion_id: str):
+    return db.query(models.VoteTally).filter(models.VoteTally.motion_id == motion_id).first()
+
+def count_votes(db: Session, motion_id: str) -> dict:
+    rows = db.query(models.Vote.vote, func.count()).filter(models.Vote.motion_id == motion_id).group_by(models.Vote.vote).all()
+    counts = {vote: 0 for vote in VOTE_COLUMNS}
+    counts.update({vote: count for vote, count in rows if vote in VOTE_COLUMNS})
+    return counts
+
+def open_vote(db: Session, motion_id: str, votes: dict, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Starts a fresh tally for the motion, seeded with any votes already given."""
+    db.query(models.Vote).filter(models.Vote.motion_id == motion_id).delete(synchronize_session=False)
+    db.query(models.VoteTally).filter(models.VoteTally.motion_id == motion_id).delete(synchronize_session=False)
+    counts = {vote: 0 for vote in VOTE_COLUMNS}
+    for delegate_id, vote in (votes or {}).items():
+        if vote in VOTE_COLUMNS:
+            db.add(models.Vote(motion_id=motion_id, delegate_id=delegate_id, committee_id=committee_id, vote=vote))
+            counts[vote] += 1
+    db.add(models.VoteTally(
+        motion_id=motion_id,
+        committee_id=committee_id,
+        votes_for=counts["for"],
+        votes_against=counts["against"],
+        votes_abstain=counts["abstain"]
+    ))
     db.commit()
-    db.refresh(state)
-    return state
-
-def update_committee_info(db: Session, name: str, agenda: str):
-    state = get_committee_state(db)
-    state.name = name
-    state.agenda = agenda
+    table_versions.bump(committee_id, "votes")
+
+class VoteClosed(Exception):
+    """The motion's vote was closed while the cast was in flight."""
+
+def record_vote(db: Session, motion_id: str, delegate_id: str, vote: str | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Replaces one delegate's vote and moves the tally by the difference. Returns the previous vote.
+
+    Raises VoteClosed, with nothing written, once close_vote has closed the tally.
+    """
+    previous = db.execute(
+        delete(models.Vote)
+        .where(models.Vote.motion_id == motion_id, models.Vote.delegate_id == delegate_id)
+        .returning(models.Vote.vote)
+    ).scalar()
+    if vote is not None:
+        db.add(models.Vote(motion_id=motion_id, delegate_id=delegate_id, committee_id=committee_id, vote=vote))
+
+    if previous != vote:
+        changes = {}
+        if previous in VOTE_COLUMNS:
+            changes[VOTE_COLUMNS[previous]] = VOTE_COLUMNS[previous] - 1
+        if vote is not None:
+            changes[VOTE_COLUMNS[vote]] = VOTE_COLUMNS[vote] + 1
+        updated = db.query(models.VoteTally).filter(
+            models.VoteTally.motion_id == motion_id,
+            models.VoteTally.closed.isnot(True)
+        ).update(changes, synchronize_session=False)
+        if not updated and get_vote_tally(db, motion_id) is not None:
+            db.rollback()
+            raise VoteClosed()
+        if not updated:
+            # Session opened before tallies existed: start one from the rows
+            db.flush()
+            counts = count_votes(db, motion_id)
+            db.add(models.VoteTally(
+                motion_id=motion_id,
+                committee_id=committee_id,
+                votes_for=counts["for"],
+                votes_against=counts["against"],
+                votes_abstain=counts["abstain"]
+            ))
     db.commit()
-    db.refresh(state)
-    return state
-
-def update_question_queue(db: Session, queue: list):
-    state = get_committee_state(db)
-    state.question_queue = queue
+    table_versions.bump(committee_id, "votes")
+    return previous
+
+def cast_delegate_vote(db: Session, delegate_id: str, vote: str | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Records a vote on the active motion and returns its tally, or None if no vote is open."""
+    if vote is not None and vote not in VOTE_COLUMNS:
+        raise ValueError(f"Unknown vote '{vote}'")
+    motion_id = committee_cache.get(db, committee_id).active_voting_motion_id
+    if not motion_id:
+        return None
+
+    # Two requests for the same delegate can both find no row to replace; the loser retries
+    for attempt in range(2):
+        try:
+            record_vote(db, motion_id, delegate_id, vote, committee_id)
+            break
+        except VoteClosed:
+            return None
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise
+    return get_vote_tally(db, motion_id)
+
+def close_vote(db: Session, status: str | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    """Writes the final counts for the active motion into Motion.votes_* and ends the session."""
+    motion_id = committee_cache.get(db, committee_id).active_voting_motion_id
+    if not motion_id:
+        return None
+    motion = get_motion(db, motion_id, committee_id)
+    if motion is None:
+        return None
+
+    # New casts find no open vote from here on. Casts that already read the
+    # motion id either committed their tally update before the row lock below
+    # (and are counted) or find the tally closed and write nothing.
+    committee_cache.update(db, committee_id, active_voting_motion_id=None, delegate_votes={})
+    closed = db.query(models.VoteTally).filter(
+        models.VoteTally.motion_id == motion_id
+    ).update({models.VoteTally.closed: True}, synchronize_session=False)
+    counts = count_votes(db, motion_id)
+    if not closed:
+        db.add(models.VoteTally(
+            motion_id=motion_id,
+            committee_id=committee_id,
+            votes_for=counts["for"],
+            votes_against=counts["against"],
+            votes_abstain=counts["abstain"],
+            closed=True
+        ))
+
+    old_status = motion.status
+    if status:
+        motion.status = status
+    motion.votes_for = counts["for"]
+    motion.votes_against = counts["against"]
+    motion.votes_abstain = counts["abstain"]
+    if scoreboard.is_mod_caucus_pass_change(motion.type, old_status, motion.status):
+        scoreboard.rebuild(db, committee_id)
     db.commit()
-    db.refresh(state)
-    return state
-
-def create_verbatim(db: Session, verbatim: schemas.VerbatimCreate):
-    db_verbatim = models.Verbatim(**verbatim.dict())
+    db.refresh(motion)
+    table_versions.bump(committee_id, "motions", "votes")
+    return motion
+
+def create_verbatim(db: Session, verbatim: schemas.VerbatimCreate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_verbatim = models.Verbatim(**verbatim.dict(), committee_id=committee_id)
+    db_verbatim.seq = next_sequence(db, "verbatims")
+    db_verbatim.created_at = now_ms()
     db.add(db_verbatim)
     db.commit()
     db.refresh(db_verbatim)
+    table_versions.bump(committee_id, "verbatims")
+    search_index.add(SearchDoc.from_verbatim(db_verbatim), committee_id)
     return db_verbatim
 
-def get_verbatims(db: Session):
-    return db.query(models.Verbatim).order_by(models.Verbatim.timestamp.desc()).all()
+def get_verbatims(db: Session, before: str | None = None, limit: int | None = None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return newest_first(db, models.Verbatim, before, limit, committee_id)
 
-def update_verbatim_permissions(db: Session, permissions: list):
-    state = get_committee_state(db)
-    state.verbatim_permissions = permissions
-    db.commit()
-    db.refresh(state)
-    return state
+def update_verbatim_permissions(db: Session, permissions: list, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return committee_cache.update(db, committee_id, verbatim_permissions=permissions)
 
 # --- NEW: Resolutions ---
-def get_resolutions(db: Session):
-    return db.query(models.Resolution).order_by(models.Resolution.timestamp.desc()).all()
-
-def get_resolution(db: Session, resolution_id: str):
-    return db.query(models.Resolution).filter(models.Resolution.id == resolution_id).first()
-
-def create_resolution(db: Session, resolution: schemas.ResolutionCreate):
-    db_res = models.Resolution(**resolution.model_dump())
+def get_resolutions(db: Session, before: str | None = None, limit: int | None = None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return newest_first(db, models.Resolution, before, limit, committee_id)
+
+def get_resolution(db: Session, resolution_id: str, committee_id: int = DEFAULT_COMMITTEE_ID):
+    return db.query(models.Resolution).filter(
+        models.Resolution.committee_id == committee_id,
+        models.Resolution.id == resolution_id
+    ).first()
+
+def create_resolution(db: Session, resolution: schemas.ResolutionCreate, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_res = models.Resolution(**resolution.model_dump(), committee_id=committee_id)
+    db_res.created_at = now_ms()
     db.add(db_res)
     db.commit()
     db.refresh(db_res)
+    table_versions.bump(committee_id, "resolutions")
+    search_index.add(SearchDoc.from_resolution(db_res), committee_id)
     return db_res
 
-def update_resolution(db: Session, resolution_id: str, status: str | None, marks: int | None):
-    db_res = get_resolution(db, resolution_id)
+def get_resolution_text(db: Session, sha256: str) -> str | None:
+    """Text already extracted from a stored file, so a re-upload skips extraction."""
+    row = db.query(models.Resolution.text).filter(
+        models.Resolution.sha256 == sha256,
+        models.Resolution.text.isnot(None)
+    ).first()
+    return row.text if row else None
+
+def update_resolution(db: Session, resolution_id: str, status: str | None, marks: int | None, committee_id: int = DEFAULT_COMMITTEE_ID):
+    db_res = get_resolution(db, resolution_id, committee_id)
     if db_res:
         if status is not None:
             db_res.status = status
@@ -358,4 +751,19 @@ def update_resolution(db: Session, resolution_id: str, status: str | None, marks
             db_res.marks = marks
         db.commit()
         db.refresh(db_res)
-    return db_res
\ No newline at end of file
+        table_versions.bump(committee_id, "resolutions")
+    return db_res
+# -- Search --
+def search(db: Session, query: str, delegate: str | None = None, types: list | None = None,
+           since: int | None = None, until: int | None = None, limit: int = 20,
+           committee_id: int = DEFAULT_COMMITTEE_ID) -> list:
+    delegate_keys = None
+    if delegate:
+        # Verbatims name delegates by id, resolutions by country: match either
+        delegate_keys = {delegate}
+        for d in db.query(models.Delegate).filter(
+            models.Delegate.committee_id == committee_id,
+            or_(models.Delegate.id == delegate, models.Delegate.country == delegate)
+        ).all():
+            delegate_keys.update((d.id, d.country))
+    return search_index.search(db, committee_id, query, delegate_keys, set(types) if types else None, since, until, limit)
\ No newline at end of file
@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Load environment variables from .env file
@@ -20,6 +21,27 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def to_async_url(url: str) -> str:
+    """Same database, async driver: asyncpg for Postgres, aiosqlite for SQLite."""
+    if url.startswith("sqlite"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            # asyncpg spells libpq's sslmode as ssl
+            return "postgresql+asyncpg://" + url[len(prefix):].replace("sslmode=", "ssl=")
+    return url
+
+# Async engine for the hot routes, so they don't each hold a threadpool slot
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=1800
+)
+# Objects are serialized after the route returns, outside the session's greenlet,
+# so they must not expire on commit
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency to get DB session
@@ -28,4 +50,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async dependency. The crud functions are shared with the sync routes and run
+# on the async connection through db.run_sync(crud.fn, ...).
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -1,7 +1,10 @@
 import os
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_
 from fastapi.middleware.cors import CORSMiddleware
-from . import models
+from . import models, migrations
 from .database import engine, SessionLocal
 from .routers import (
     delegates, 
@@ -12,17 +15,54 @@ from .routers import (
     announcements, 
     verbatims, 
     auth, 
-    resolutions 
+    resolutions,
+    snapshot,
+    committees,
+    search
 )
-from .ws import manager
+from .ws import manager, may_relay, Subscription
+from .pubsub import create_backend
+from . import scoreboard
+from .committee_cache import committee_cache
+from .ws import DEFAULT_COMMITTEE
+from .presence import presence
+from .search import search_index
+from .timers import scheduler
+from .activity_buffer import activity_buffer
+from .crud import now_ms
+from .sessions import Principal, current_principal, is_admin_for, principal_cache, TRUST_ROLE_HEADER
+from .versions import table_versions
+from .response_cache import response_cache
+from .compression import CompressionMiddleware
 
 # Models needed for the secret reset endpoint
-from .models import Chit, Motion, ActivityEntry, Announcement, Verbatim, Resolution, CommitteeState, Delegate
+from .models import Chit, Motion, ActivityEntry, Announcement, Verbatim, Resolution, CommitteeState, Delegate, Vote, VoteTally
 
 # Create all database tables if they don't exist
 models.Base.metadata.create_all(bind=engine)
+# Add and backfill columns introduced after a table was first created
+migrations.run(engine)
 
-app = FastAPI(title="DigiMUN API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Committee state lives in memory while the app runs; flush it on the way out
+    committee_cache.start()
+    activity_buffer.start()
+    await manager.start(create_backend())
+    await scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        await presence.stop()
+        await manager.stop()
+        activity_buffer.stop()
+        committee_cache.stop()
+
+app = FastAPI(title="DigiMUN API", lifespan=lifespan)
+
+# gzip / brotli for larger responses; WebSocket frames are deflated by uvicorn
+app.add_middleware(CompressionMiddleware)
 
 # Fetch the frontend URL from Render environment variables (fallback to localhost for local dev)
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
@@ -41,27 +81,124 @@ app.add_middleware(
 )
 
 # Register all API Routes
-app.include_router(delegates.router)
-app.include_router(motions.router)
-app.include_router(chits.router)
-app.include_router(committee.router)
-app.include_router(activity.router)      
-app.include_router(announcements.router) 
-app.include_router(verbatims.router)     
-app.include_router(auth.router)          
-app.include_router(resolutions.router)   
+app.include_router(committees.router)
+
+# Every committee's routes live under /api/committees/{committee_id}; the
+# unprefixed /api routes keep serving the default committee.
+committee_routers = [
+    delegates.router,
+    motions.router,
+    chits.router,
+    committee.router,
+    activity.router,
+    announcements.router,
+    verbatims.router,
+    auth.router,
+    resolutions.router,
+    snapshot.router,
+    search.router,
+]
+for router in committee_routers:
+    app.include_router(router, prefix="/api")
+    app.include_router(router, prefix="/api/committees/{committee_id}")
+
+def resolve_delegate_keys(committee_id: int, keys: list) -> set:
+    """Events address delegates by id (scores) or by country (chits); subscribe to both."""
+    resolved = set(keys)
+    if not keys:
+        return resolved
+    db = SessionLocal()
+    try:
+        for d in db.query(Delegate).filter(
+            Delegate.committee_id == committee_id,
+            or_(Delegate.id.in_(keys), Delegate.country.in_(keys))
+        ).all():
+            resolved.update([d.id, d.country])
+    finally:
+        db.close()
+    return resolved
+
+def committee_exists(committee_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return committee_cache.exists(db, committee_id)
+    finally:
+        db.close()
 
 # WebSocket Endpoint for Real-Time Updates
-@app.websocket("/api/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+# ?token=<session token> scopes what the socket receives to that admin or delegate.
+# Without one the socket gets public events only (or, with TRUST_ROLE_HEADER=on,
+# whatever ?role=<role>&delegate=<id or country> asks for). A socket that asks for
+# a role or delegate, or brings a token that is expired or for another committee,
+# is closed with UNAUTHORIZED_CLOSE_CODE so the client logs in again.
+UNAUTHORIZED_CLOSE_CODE = 4401
+
+async def serve_websocket(websocket: WebSocket, committee_id: int):
+    if not await run_in_threadpool(committee_exists, committee_id):
+        await websocket.close(code=1008)
+        return
+
+    params = websocket.query_params
+    principal = principal_cache.resolve(params.get("token"))
+    if principal is not None and principal.committee_id == committee_id:
+        role = principal.role
+        delegate_keys = [principal.subject, principal.name] if not principal.is_admin else []
+    elif TRUST_ROLE_HEADER:
+        role = params.get("role")
+        delegate_keys = params.getlist("delegate") if role not in ('chair', 'vice-chair') else []
+    elif params.get("token") or params.get("role") or params.get("delegate"):
+        # Accepted first: a socket closed during the handshake only sees a 403
+        await websocket.accept()
+        await websocket.close(code=UNAUTHORIZED_CLOSE_CODE, reason="Session token missing or expired")
+        return
+    else:
+        role = None
+        delegate_keys = []
+    subscription = Subscription(
+        committee=committee_id,
+        role=role,
+        delegate_keys=await run_in_threadpool(resolve_delegate_keys, committee_id, delegate_keys)
+    )
+    await manager.connect(websocket, subscription)
     try:
         while True:
             data = await websocket.receive_json()
-            await manager.broadcast(data)
+            # Only event types the sender's role may relay; broadcast routes them
+            # through route_topics, so private ones never go committee-wide
+            if may_relay(role, data):
+                await manager.broadcast(data, committee_id)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
+@app.websocket("/api/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    committee_id = websocket.query_params.get("committee", str(DEFAULT_COMMITTEE))
+    if not committee_id.isdigit():
+        await websocket.close(code=1008)
+        return
+    await serve_websocket(websocket, int(committee_id))
+
+@app.websocket("/api/committees/{committee_id}/ws")
+async def committee_websocket_endpoint(websocket: WebSocket, committee_id: int):
+    await serve_websocket(websocket, committee_id)
+
+# Server clock for client-side timer offset sync
+@app.get("/api/clock")
+def read_clock(t0: int | None = None):
+    """Server time in epoch ms. Clients send their own send time as t0 and take
+    offset = server_time - (t0 + receive time) / 2 from the fastest round trip."""
+    return {"server_time": now_ms(), "client_time": t0}
+
+# Per-connection queue depth and delivery lag for the broadcast fan-out
+@app.get("/api/ws/stats")
+def websocket_stats():
+    return manager.stats()
+
+# Hit/miss counters and size of the pre-serialized GET response cache
+@app.get("/api/cache/stats")
+def response_cache_stats():
+    return response_cache.stats()
+
 # Root Test Endpoint
 @app.get("/")
 def read_root():
@@ -70,23 +207,36 @@ def read_root():
 # =====================================================================
 # SECRET ENDPOINT TO RESET DB WITHOUT LOSING PASSWORDS
 # =====================================================================
+# Wipes every committee, so it takes an admin token (Authorization: Bearer ...)
+# for the default committee
 @app.get("/api/secret-reset-mun-data-999")
-def secret_reset_database():
+def secret_reset_database(x_role: str = Header(None), principal: Principal | None = Depends(current_principal)):
+    if not is_admin_for(principal, models.DEFAULT_COMMITTEE_ID, x_role):
+        raise HTTPException(status_code=403, detail="Only the chair or vice-chair can reset the data")
     db = SessionLocal()
     try:
         # 1. Delete all transactional data
         db.query(Chit).delete()
         db.query(Motion).delete()
+        activity_buffer.flush()
         db.query(ActivityEntry).delete() 
         db.query(Announcement).delete()
         db.query(Verbatim).delete()
         db.query(Resolution).delete()
+        db.query(Vote).delete()
+        db.query(VoteTally).delete()
         db.commit() 
+        resolutions.download_index.clear()
+        search_index.clear()
 
-        # 2. Reset Committee State
+        # 2. Reset Committee State (every committee keeps its id and name)
+        names = {c.id: c.name for c in db.query(CommitteeState).all()}
+        names[models.DEFAULT_COMMITTEE_ID] = "UNGA DISEC"
         db.query(CommitteeState).delete()
-        db.add(CommitteeState(name="UNGA DISEC"))
+        for committee_id, name in names.items():
+            db.add(CommitteeState(id=committee_id, name=name))
         db.commit() 
+        committee_cache.reload(db)
 
         # 3. Reset Delegate Scores & Stats
         delegates = db.query(Delegate).all()
@@ -98,6 +248,15 @@ def secret_reset_database():
             d.scores = {}
             d.present = False 
             db.commit() 
+
+        # 4. Recompute the materialized scoreboard from the wiped data
+        scoreboard.rebuild(db)
+        db.commit()
+        # Last, so no tag can describe the half-reset data
+        table_versions.reset()
+        response_cache.clear()
+        for committee_id in names:
+            table_versions.bump(committee_id, "votes")
             
         return {"status": "success", "message": "Database completely wiped! Passwords and users saved."}
 
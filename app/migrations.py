@@ -0,0 +1,188 @@
+"""Additive schema migrations, run once at startup after create_all().
+
+create_all() only creates missing tables, so columns added to existing models
+are added here with ALTER TABLE and then backfilled. Every step is idempotent.
+"""
+import os
+import re
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from . import models
+from .database import SessionLocal
+
+# Tables whose rows carry a delta-sync seq, keyed by SyncCounter name
+SEQUENCED_MODELS = {
+    "chits": models.Chit,
+    "activity_logs": models.ActivityEntry,
+    "announcements": models.Announcement,
+    "verbatims": models.Verbatim,
+}
+
+# Tables that get a server-side epoch created_at for ordering and keyset paging
+TIMESTAMPED_MODELS = [
+    models.Motion,
+    models.ActivityEntry,
+    models.Announcement,
+    models.Verbatim,
+    models.Resolution,
+]
+
+# Client-generated ids end in Date.now() (ms); resolution ids end in epoch seconds
+_ID_EPOCH = re.compile(r"(\d{10}|\d{13})$")
+
+def add_missing_columns(engine: Engine, table) -> list:
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    added = [column for column in table.columns if column.name not in existing]
+    if not added:
+        return []
+
+    with engine.begin() as conn:
+        for column in added:
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        for index in table.indexes:
+            if any(column.name in index.columns for column in added):
+                index.create(bind=conn, checkfirst=True)
+    return [column.name for column in added]
+
+def backfill_committee_ids():
+    """Rows from before multi-committee support belong to the default committee."""
+    db = SessionLocal()
+    try:
+        for table in models.Base.metadata.sorted_tables:
+            if "committee_id" in table.columns:
+                db.execute(
+                    table.update()
+                    .where(table.c.committee_id.is_(None))
+                    .values(committee_id=models.DEFAULT_COMMITTEE_ID)
+                )
+        db.commit()
+    finally:
+        db.close()
+
+def relax_delegate_country_unique(engine: Engine):
+    """Country used to be unique across the whole database; it is now unique per
+    committee (uq_delegates_committee_country), so the old unique index goes."""
+    for index in inspect(engine).get_indexes("delegates"):
+        if index["name"] == "ix_delegates_country" and index.get("unique"):
+            with engine.begin() as conn:
+                conn.execute(text("DROP INDEX ix_delegates_country"))
+                for table_index in models.Delegate.__table__.indexes:
+                    if table_index.name == "ix_delegates_country":
+                        table_index.create(bind=conn, checkfirst=True)
+
+def backfill_sequences():
+    """Gives pre-existing rows a seq (in id order) and seeds each SyncCounter."""
+    db = SessionLocal()
+    try:
+        for name, model in SEQUENCED_MODELS.items():
+            counter = db.query(models.SyncCounter).filter(models.SyncCounter.name == name).first()
+            if counter is None:
+                counter = models.SyncCounter(name=name, value=0)
+                db.add(counter)
+            value = counter.value or 0
+
+            for row in db.query(model).filter(model.seq.is_(None)).order_by(model.id).all():
+                value += 1
+                row.seq = value
+            counter.value = value
+        db.commit()
+    finally:
+        db.close()
+
+def created_at_from_id(row_id: str) -> int:
+    match = _ID_EPOCH.search(row_id or "")
+    if not match:
+        return 0
+    digits = match.group(1)
+    return int(digits) if len(digits) == 13 else int(digits) * 1000
+
+def backfill_created_at():
+    """Recovers an epoch for rows written before created_at existed.
+
+    The old free-form timestamp ("03:15 PM") has no date, but the ids the
+    clients generate embed the creation time. Rows without one sort oldest.
+    """
+    db = SessionLocal()
+    try:
+        for model in TIMESTAMPED_MODELS:
+            for row in db.query(model).filter(model.created_at.is_(None)).all():
+                row.created_at = created_at_from_id(row.id)
+        db.commit()
+    finally:
+        db.close()
+
+def backfill_votes():
+    """Moves a vote left in progress in committee_state.delegate_votes into vote rows."""
+    from . import crud
+
+    db = SessionLocal()
+    try:
+        for state in db.query(models.CommitteeState).filter(models.CommitteeState.active_voting_motion_id.isnot(None)).all():
+            if state.delegate_votes and crud.get_vote_tally(db, state.active_voting_motion_id) is None:
+                crud.open_vote(db, state.active_voting_motion_id, state.delegate_votes, state.id)
+    finally:
+        db.close()
+
+def backfill_scoreboard():
+    """Scoreboard rows for delegates added outside crud (seed scripts, direct inserts)."""
+    from . import scoreboard
+
+    db = SessionLocal()
+    try:
+        if scoreboard.fill_missing(db):
+            db.commit()
+    finally:
+        db.close()
+
+def backfill_resolution_hashes():
+    """Hashes PDFs uploaded before content-addressed storage. They stay where they are."""
+    from .blobstore import hash_file
+
+    db = SessionLocal()
+    try:
+        for res in db.query(models.Resolution).filter(models.Resolution.sha256.is_(None)).all():
+            if res.file_path and os.path.exists(res.file_path):
+                res.sha256, res.size = hash_file(res.file_path)
+        db.commit()
+    finally:
+        db.close()
+
+def backfill_resolution_text():
+    """Extracts searchable text from PDFs stored before search existed."""
+    from .blobstore import extract_pdf_text
+
+    db = SessionLocal()
+    try:
+        for res in db.query(models.Resolution).filter(models.Resolution.text.is_(None)).all():
+            if res.file_path and os.path.exists(res.file_path):
+                text = extract_pdf_text(res.file_path)
+                if text is None:
+                    return  # pypdf is not installed; try again next start
+                res.text = text
+        db.commit()
+    finally:
+        db.close()
+
+def create_search_indexes(engine: Engine):
+    """GIN indexes behind Postgres full-text search (see search.py)."""
+    from .search import RESOLUTION_TSVECTOR, VERBATIM_TSVECTOR
+
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_verbatims_fts ON verbatims USING GIN ({VERBATIM_TSVECTOR})"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_resolutions_fts ON resolutions USING GIN ({RESOLUTION_TSVECTOR})"))
+
+def run(engine: Engine):
+    for table in models.Base.metadata.sorted_tables:
+        add_missing_columns(engine, table)
+    backfill_committee_ids()
+    relax_delegate_country_unique(engine)
+    backfill_sequences()
+    backfill_created_at()
+    backfill_votes()
+    backfill_scoreboard()
+    backfill_resolution_hashes()
+    backfill_resolution_text()
+    create_search_indexes(engine)
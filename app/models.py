@@ -1,18 +1,24 @@
-from sqlalchemy import Column, String, Integer, Boolean, JSON, BigInteger
+from sqlalchemy import Column, String, Integer, Boolean, JSON, BigInteger, Float, Index, Text
 from .database import Base
 
+# committee_state.id doubles as the committee id; the unprefixed /api routes use this one
+DEFAULT_COMMITTEE_ID = 1
+
 class Admin(Base):
     __tablename__ = "admins"
     id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
     role = Column(String, index=True) # 'chair' or 'vice-chair'
     name = Column(String)
     password = Column(String)
 
 class Delegate(Base):
     __tablename__ = "delegates"
+    __table_args__ = (Index("uq_delegates_committee_country", "committee_id", "country", unique=True),)
     id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
     name = Column(String, index=True)
-    country = Column(String, unique=True, index=True)
+    country = Column(String, index=True) # Unique within a committee
     present = Column(Boolean, default=True)
     speeches = Column(Integer, default=0)
     votes_for = Column(Integer, default=0)
@@ -27,12 +33,15 @@ class Delegate(Base):
 
 class Motion(Base):
     __tablename__ = "motions"
+    __table_args__ = (Index("ix_motions_committee_created_at", "committee_id", "created_at", "id"),)
     id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
     type = Column(String)
     proposed_by = Column(String)
     description = Column(String)
     status = Column(String, default="pending") 
     timestamp = Column(String)
+    created_at = Column(BigInteger, index=True) # Epoch ms, set by the server on insert
     votes_for = Column(Integer, default=0)
     votes_against = Column(Integer, default=0)
     votes_abstain = Column(Integer, default=0)
@@ -46,6 +55,7 @@ class Motion(Base):
 class Chit(Base):
     __tablename__ = "chits"
     id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
     from_delegate = Column(String) 
     to_delegate = Column(String)
     message = Column(String)
@@ -55,25 +65,34 @@ class Chit(Base):
     via_eb = Column(Boolean, default=False)
     eb_status = Column(String, default="pending") 
     marks = Column(Integer, nullable=True, default=0)
+    seq = Column(BigInteger, index=True) # Delta-sync cursor, bumped on insert and update
 
 class Announcement(Base):
     __tablename__ = "announcements"
+    __table_args__ = (Index("ix_announcements_committee_created_at", "committee_id", "created_at", "id"),)
     id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
     message = Column(String)
     urgent = Column(Boolean, default=False)
     timestamp = Column(String)
+    created_at = Column(BigInteger, index=True)
+    seq = Column(BigInteger, index=True)
 
 class ActivityEntry(Base):
     __tablename__ = "activity_logs"
+    __table_args__ = (Index("ix_activity_logs_committee_created_at", "committee_id", "created_at", "id"),)
     id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
     type = Column(String) 
     description = Column(String)
     actor = Column(String)
     timestamp = Column(String)
+    created_at = Column(BigInteger, index=True)
+    seq = Column(BigInteger, index=True)
 
 class CommitteeState(Base):
     __tablename__ = "committee_state"
-    id = Column(Integer, primary_key=True, index=True, default=1)
+    id = Column(Integer, primary_key=True, index=True, default=DEFAULT_COMMITTEE_ID)
     name = Column(String, default="United Nations Human Rights Council")
     agenda = Column(String, default="Addressing Climate-Induced Displacement and Migration")
     phase = Column(String, default="debate")
@@ -95,24 +114,76 @@ class CommitteeState(Base):
     yield_target = Column(String, nullable=True)
     question_queue = Column(JSON, default=[])
     verbatim_permissions = Column(JSON, default=[])
+    # Bumped on every change to the matching list, for optimistic concurrency
+    speakers_version = Column(Integer, default=0)
+    caucus_speakers_version = Column(Integer, default=0)
+    question_queue_version = Column(Integer, default=0)
+
+class Vote(Base):
+    """One row per delegate per motion; replaces the shared delegate_votes dict."""
+    __tablename__ = "votes"
+    motion_id = Column(String, primary_key=True)
+    delegate_id = Column(String, primary_key=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
+    vote = Column(String) # 'for', 'against' or 'abstain'
+
+class VoteTally(Base):
+    """Running totals for a motion, adjusted in the same transaction as each vote."""
+    __tablename__ = "vote_tallies"
+    motion_id = Column(String, primary_key=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
+    votes_for = Column(Integer, default=0)
+    votes_against = Column(Integer, default=0)
+    votes_abstain = Column(Integer, default=0)
+    closed = Column(Boolean, default=False) # Set by close_vote; later casts are refused
+
+    @property
+    def votes(self):
+        return {"for_votes": self.votes_for, "against": self.votes_against, "abstain": self.votes_abstain}
     
 class Verbatim(Base):
     __tablename__ = "verbatims"
+    __table_args__ = (Index("ix_verbatims_committee_created_at", "committee_id", "created_at", "id"),)
     id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
     delegate_id = Column(String)
     type = Column(String) 
     topic = Column(String)
     text = Column(String)
     timestamp = Column(String)
+    created_at = Column(BigInteger, index=True)
+    seq = Column(BigInteger, index=True)
     
 class Resolution(Base):
     __tablename__ = "resolutions"
+    __table_args__ = (Index("ix_resolutions_committee_created_at", "committee_id", "created_at", "id"),)
     id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
     title = Column(String)
     file_path = Column(String) # Path where the PDF is saved
+    sha256 = Column(String, index=True) # Content hash; names the stored file
+    size = Column(BigInteger)
+    text = Column(Text) # Extracted from the PDF for search
     uploaded_by = Column(String)
     authors = Column(JSON, default=[])
     signatories = Column(JSON, default=[])
     status = Column(String, default="pending") # 'pending', 'approved', 'rejected'
     marks = Column(Integer, nullable=True, default=0)
-    timestamp = Column(String)
\ No newline at end of file
+    timestamp = Column(String)
+    created_at = Column(BigInteger, index=True)
+
+class DelegateScoreboard(Base):
+    # Materialized averages per delegate, kept current by app/scoreboard.py
+    __tablename__ = "delegate_scoreboard"
+    delegate_id = Column(String, primary_key=True, index=True)
+    committee_id = Column(Integer, index=True, default=DEFAULT_COMMITTEE_ID)
+    gsl_avg = Column(Float, default=0.0)
+    chits_score = Column(Float, default=0.0)
+    mod_avg = Column(Float, default=0.0)
+    total_score = Column(Float, default=0.0)
+
+class SyncCounter(Base):
+    # One row per delta-synced table holding the last handed-out seq
+    __tablename__ = "sync_counters"
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, default=0)
\ No newline at end of file
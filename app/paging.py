@@ -0,0 +1,28 @@
+from fastapi import HTTPException, Query, Response
+from . import crud
+
+MAX_PAGE_SIZE = 500
+
+def page_limit(limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE)):
+    return limit
+
+def keyset_page(response: Response, fetch, db, before: str | None, limit: int | None, committee_id: int):
+    """Runs a crud newest-first getter and advertises the next page via X-Next-Cursor."""
+    try:
+        rows = fetch(db, before=before, limit=limit, committee_id=committee_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid 'before' cursor")
+    return _advertise_next(response, rows, limit)
+
+async def keyset_page_async(response: Response, fetch, db, before: str | None, limit: int | None, committee_id: int):
+    """keyset_page for routes on the async session."""
+    try:
+        rows = await db.run_sync(fetch, before=before, limit=limit, committee_id=committee_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid 'before' cursor")
+    return _advertise_next(response, rows, limit)
+
+def _advertise_next(response: Response, rows: list, limit: int | None) -> list:
+    if limit and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.page_cursor(rows[-1])
+    return rows
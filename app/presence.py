@@ -0,0 +1,50 @@
+"""Coalesces delegate presence changes into small PRESENCE events.
+
+A roll call logs in most of a committee within a few seconds. Instead of a
+broadcast per login, changes are collected per committee and sent as one
+PRESENCE event PRESENCE_WINDOW seconds after the first of them.
+"""
+import asyncio
+import os
+from .ws import manager
+
+PRESENCE_WINDOW = float(os.getenv("PRESENCE_WINDOW", "0.25"))
+
+class PresenceBatcher:
+    def __init__(self, window: float = PRESENCE_WINDOW):
+        self.window = window
+        self._pending: dict[int, dict[str, bool]] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def mark(self, committee_id: int, delegate_id: str, present: bool):
+        """Queues a change; the latest value per delegate wins within a window."""
+        self._pending.setdefault(committee_id, {})[delegate_id] = present
+        if committee_id not in self._tasks:
+            self._tasks[committee_id] = asyncio.create_task(self._send_later(committee_id))
+
+    async def _send_later(self, committee_id: int):
+        await asyncio.sleep(self.window)
+        self._tasks.pop(committee_id, None)
+        await self._send(committee_id)
+
+    async def _send(self, committee_id: int):
+        changes = self._pending.pop(committee_id, None)
+        if not changes:
+            return
+        await manager.broadcast({
+            "type": "PRESENCE",
+            "data": {
+                "present": [d for d, present in changes.items() if present],
+                "absent": [d for d, present in changes.items() if not present],
+            }
+        }, committee_id)
+
+    async def stop(self):
+        """Sends whatever is still waiting instead of dropping it."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        for committee_id in list(self._pending):
+            await self._send(committee_id)
+
+presence = PresenceBatcher()
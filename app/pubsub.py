@@ -0,0 +1,249 @@
+"""Pluggable transport that carries WebSocket broadcasts between workers.
+
+ConnectionManager publishes every broadcast here; each worker subscribes and
+fans the message out to the sockets it holds. Pick one with BROADCAST_BACKEND:
+
+    memory    single worker, delivery is a direct call (default)
+    postgres  LISTEN/NOTIFY on DATABASE_URL, for multiple workers or hosts
+    unix      a Unix domain socket hub for several workers on one machine
+"""
+import asyncio
+import fcntl
+import json
+import os
+import random
+import uuid
+
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory")
+BROADCAST_CHANNEL = os.getenv("BROADCAST_CHANNEL", "digimun_broadcast")
+BROADCAST_SOCKET = os.getenv("BROADCAST_SOCKET", "/tmp/digimun-broadcast.sock")
+# Longest message line the unix hub accepts; asyncio's default of 64 KiB is
+# smaller than a large verbatim or snapshot broadcast once escaped
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+class InProcessBackend:
+    # The manager delivers directly instead of encoding an envelope for itself
+    local = True
+
+    async def start(self, on_message):
+        self.on_message = on_message
+
+    async def publish(self, payload: str):
+        await self.on_message(payload)
+
+    async def stop(self):
+        pass
+
+class PostgresBackend:
+    """LISTEN/NOTIFY on a dedicated autocommit connection.
+
+    NOTIFY payloads are capped at 8000 bytes, so larger messages are split
+    into parts and reassembled by the listener. The cap applies to each part
+    as sent: after JSON escaping of quotes, backslashes and non-ASCII text,
+    which can take a character to six or twelve bytes.
+    """
+    local = False
+    MAX_PART_BYTES = 7900
+
+    def __init__(self, dsn: str, channel: str = BROADCAST_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._parts: dict = {}
+
+    async def start(self, on_message):
+        import psycopg2
+        import psycopg2.extensions
+
+        self.on_message = on_message
+        self.loop = asyncio.get_running_loop()
+        self.listen_conn = psycopg2.connect(self.dsn)
+        self.listen_conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        self.publish_conn = psycopg2.connect(self.dsn)
+        self.publish_conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        self._publish_lock = asyncio.Lock()
+
+        with self.listen_conn.cursor() as cur:
+            cur.execute(f'LISTEN "{self.channel}"')
+        self.loop.add_reader(self.listen_conn.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        self.listen_conn.poll()
+        while self.listen_conn.notifies:
+            notify = self.listen_conn.notifies.pop(0)
+            payload = self._reassemble(notify.payload)
+            if payload is not None:
+                self.loop.create_task(self.on_message(payload))
+
+    def _reassemble(self, raw: str) -> str | None:
+        part = json.loads(raw)
+        if part["n"] == 1:
+            return part["p"]
+        chunks = self._parts.setdefault(part["id"], {})
+        chunks[part["i"]] = part["p"]
+        if len(chunks) < part["n"]:
+            return None
+        del self._parts[part["id"]]
+        return "".join(chunks[i] for i in range(part["n"]))
+
+    def _notify(self, parts: list):
+        with self.publish_conn.cursor() as cur:
+            for part in parts:
+                cur.execute("SELECT pg_notify(%s, %s)", (self.channel, part))
+
+    @classmethod
+    def split(cls, payload: str) -> list:
+        """The NOTIFY parts for payload, each at most MAX_PART_BYTES."""
+        message_id = uuid.uuid4().hex
+        # Sized with len(payload) standing in for i and n, which is never shorter
+        bound = len(payload)
+        chunks = []
+        start = 0
+        while start < len(payload) or not chunks:
+            length = min(len(payload) - start, cls.MAX_PART_BYTES)
+            while True:
+                size = len(json.dumps({"id": message_id, "i": bound, "n": bound, "p": payload[start:start + length]}))
+                if size <= cls.MAX_PART_BYTES:
+                    break
+                length = max(1, min(length - 1, length * cls.MAX_PART_BYTES // size))
+            chunks.append(payload[start:start + length])
+            start += length
+        return [json.dumps({"id": message_id, "i": i, "n": len(chunks), "p": chunk}) for i, chunk in enumerate(chunks)]
+
+    async def publish(self, payload: str):
+        parts = self.split(payload)
+        async with self._publish_lock:
+            await asyncio.to_thread(self._notify, parts)
+
+    async def stop(self):
+        self.loop.remove_reader(self.listen_conn.fileno())
+        self.listen_conn.close()
+        self.publish_conn.close()
+
+class UnixSocketBackend:
+    """Stand-in for a broker when all workers share one machine.
+
+    The first worker to start binds the socket and acts as the hub, relaying
+    each newline-delimited message to every other worker. The rest connect to
+    it as clients. Publishers deliver to their own sockets directly.
+
+    The hub is whoever holds an exclusive flock on <path>.lock, kept for as
+    long as it serves. The lock dies with its process, so only the worker
+    that wins it may remove a stale socket file and bind a new one; two
+    workers starting together can never both become the hub.
+    """
+    local = False
+
+    def __init__(self, path: str = BROADCAST_SOCKET):
+        self.path = path
+        self.server = None
+        self.peers: set = set()
+        self.writer = None
+        self.reader_task = None
+        self.lock_file = None
+        self.stopping = False
+
+    async def start(self, on_message):
+        self.on_message = on_message
+        await self._join()
+
+    async def _join(self):
+        while not self.stopping:
+            if await self._connect():
+                return
+            if self._take_hub_lock():
+                # Any socket file left now belongs to a hub that exited
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+                self.server = await asyncio.start_unix_server(self._serve_peer, path=self.path, limit=MAX_LINE_BYTES)
+                return
+            # Another worker holds the lock and is still binding the socket
+            await asyncio.sleep(random.uniform(0.05, 0.25))
+
+    def _take_hub_lock(self) -> bool:
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self.lock_file = lock_file
+        return True
+
+    async def _connect(self) -> bool:
+        try:
+            reader, self.writer = await asyncio.open_unix_connection(self.path, limit=MAX_LINE_BYTES)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+        self.reader_task = asyncio.create_task(self._read_from_hub(reader))
+        return True
+
+    async def _read_from_hub(self, reader):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            await self.on_message(line.decode().rstrip("\n"))
+
+        # The hub worker went away: reconnect, or take over as the hub
+        self.writer = None
+        if not self.stopping:
+            await asyncio.sleep(random.uniform(0.05, 0.25))
+            await self._join()
+
+    async def _serve_peer(self, reader, writer):
+        self.peers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                self._relay(line, exclude=writer)
+                await self.on_message(line.decode().rstrip("\n"))
+        finally:
+            self.peers.discard(writer)
+            writer.close()
+
+    def _relay(self, line: bytes, exclude=None):
+        for peer in list(self.peers):
+            if peer is not exclude:
+                peer.write(line)
+
+    async def publish(self, payload: str):
+        line = (payload + "\n").encode()
+        if self.server is not None:
+            self._relay(line)
+        elif self.writer is not None:
+            self.writer.write(line)
+            await self.writer.drain()
+        await self.on_message(payload)
+
+    async def stop(self):
+        self.stopping = True
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.writer:
+            self.writer.close()
+        if self.server:
+            self.server.close()
+            for peer in list(self.peers):
+                peer.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        if self.lock_file:
+            # Released only after the socket file is gone, so the next hub binds a fresh one
+            self.lock_file.close()
+
+def create_backend(name: str = BROADCAST_BACKEND):
+    if name == "memory":
+        return InProcessBackend()
+    if name == "postgres":
+        # psycopg2 wants a plain libpq URL, not SQLAlchemy's driver-qualified form
+        dsn = os.getenv("DATABASE_URL", "").replace("postgresql+psycopg2://", "postgresql://")
+        return PostgresBackend(dsn)
+    if name == "unix":
+        return UnixSocketBackend()
+    raise ValueError(f"Unknown BROADCAST_BACKEND '{name}'. Use memory, postgres or unix.")
@@ -0,0 +1,189 @@
+"""Pre-serialized GET responses, keyed by endpoint, parameters and version.
+
+Delegates, motions, announcements and resolutions are re-read and
+re-serialized for every poll although they change a few times a minute.
+Routes hand their builder to response_cache together with the Version from
+conditional_get. The Version's ETag already names the committee, the
+admin/public view and the versions of every table the body was built from.
+The first request after a change builds the body, and every later one gets
+the same bytes until one of those tables is bumped. Concurrent misses for
+the same key wait for that one build.
+
+Entries are dropped as soon as a crud write bumps one of their tables, and
+otherwise by LRU within RESPONSE_CACHE_BYTES. Set it to 0 to turn caching
+off. Without versions (CONDITIONAL_GET off) nothing is cached.
+"""
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from fastapi import Response
+from .versions import Version, table_versions
+
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+class CachedResponse:
+    __slots__ = ("body", "headers", "status_code", "version")
+
+    def __init__(self, response: Response, version: Version):
+        self.body = response.body
+        self.headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in response.raw_headers]
+        self.status_code = response.status_code
+        self.version = version
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    def response(self) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        response.raw_headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in self.headers]
+        return response
+
+class ResponseCache:
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict = OrderedDict()
+        # (committee_id, table) -> keys of the entries built from it
+        self._by_table: dict[tuple[int, str], set] = {}
+        self._building: dict = {}
+        self._lock = threading.Lock()
+
+    # -- Lookups --
+    def get_or_build(self, version: Version | None, params: tuple, build) -> Response:
+        """For sync routes. build() returns the Response to cache."""
+        if version is None or not self.max_bytes:
+            return build()
+        key = (params, version.tables, version.etag)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry.response()
+
+        with self._lock:
+            pending = self._building.get(key)
+            building = pending is None
+            if building:
+                pending = self._building[key] = Future()
+        if not building:
+            with self._lock:
+                self.coalesced += 1
+            return pending.result().response()
+
+        try:
+            entry = CachedResponse(build(), version)
+            self._store(key, entry)
+            pending.set_result(entry)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._building[key]
+        return entry.response()
+
+    async def get_or_build_async(self, version: Version | None, params: tuple, build) -> Response:
+        """For async routes. build() is a coroutine function returning the Response to cache."""
+        if version is None or not self.max_bytes:
+            return await build()
+        key = (params, version.tables, version.etag)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry.response()
+
+        pending = self._building.get(key)
+        if pending is not None:
+            with self._lock:
+                self.coalesced += 1
+            return (await asyncio.shield(pending)).response()
+
+        async def run() -> CachedResponse:
+            entry = CachedResponse(await build(), version)
+            self._store(key, entry)
+            return entry
+
+        pending = self._building[key] = asyncio.ensure_future(run())
+        try:
+            entry = await asyncio.shield(pending)
+        finally:
+            self._building.pop(key, None)
+        return entry.response()
+
+    # -- Invalidation --
+    def invalidate(self, committee_id: int, tables: tuple):
+        """Drops every entry built from one of the committee's tables."""
+        with self._lock:
+            for table in tables:
+                for key in self._by_table.pop((committee_id, table), ()):
+                    if self._discard(key):
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    # -- Internals --
+    def _lookup(self, key: tuple) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _store(self, key: tuple, entry: CachedResponse):
+        # A write that landed during the build has already invalidated this key;
+        # storing it now would only hold memory nobody can reach
+        if entry.size > self.max_bytes or not table_versions.is_current(entry.version):
+            return
+        version = entry.version
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = entry
+            self.size += entry.size
+            for table in version.tables:
+                self._by_table.setdefault((version.committee_id, table), set()).add(key)
+            while self.size > self.max_bytes:
+                evicted, _ = next(iter(self._entries.items()))
+                self._discard(evicted)
+                self.evictions += 1
+
+    def _discard(self, key: tuple) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= entry.size
+        version = entry.version
+        for table in version.tables:
+            keys = self._by_table.get((version.committee_id, table))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[(version.committee_id, table)]
+        return True
+
+response_cache = ResponseCache()
+table_versions.subscribe(response_cache.invalidate)
@@ -1,15 +1,39 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
-from ..database import get_db
+from typing import List, Optional, Union
+from .. import crud, schemas, models
+from ..activity_buffer import activity_buffer
+from ..database import get_async_db, get_db
+from ..tenancy import committee_scope, committee_scope_async
+from ..paging import keyset_page_async, page_limit
+from ..versions import conditional_get
+from ..serialization import delta_response, rows_response
 
-router = APIRouter(prefix="/api/activity", tags=["activity"])
+router = APIRouter(prefix="/activity", tags=["activity"])
 
-@router.get("/", response_model=List[schemas.ActivityEntryResponse])
-def read_activity(db: Session = Depends(get_db)):
-    return crud.get_activity_logs(db)
+@router.get("/", response_model=Union[List[schemas.ActivityEntryResponse], schemas.ActivityEntryDeltaResponse], dependencies=[Depends(conditional_get("activity_logs"))])
+async def read_activity(
+    response: Response,
+    since: Optional[int] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = Depends(page_limit),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # ?since=<cursor> returns only rows added or changed after that cursor
+    if since is not None:
+        items, cursor = await db.run_sync(crud.get_changes_since, models.ActivityEntry, since, committee_id=committee_id)
+        return delta_response(items, cursor, schemas.ActivityEntryResponse, response)
+    # Otherwise newest first, paged with ?before=<cursor>&limit=N
+    return rows_response(await keyset_page_async(response, crud.get_activity_logs, db, before, limit, committee_id), schemas.ActivityEntryResponse, response)
 
 @router.post("/", response_model=schemas.ActivityEntryResponse)
-def create_activity(entry: schemas.ActivityEntryCreate, db: Session = Depends(get_db)):
-    return crud.create_activity_log(db=db, entry=entry)
\ No newline at end of file
+def create_activity(entry: schemas.ActivityEntryCreate, committee_id: int = Depends(committee_scope), db: Session = Depends(get_db)):
+    # Ids are client-generated and shared by every committee; never hand back another entry
+    if crud.id_taken(db, models.ActivityEntry, entry.id) or activity_buffer.is_queued(entry.id):
+        raise HTTPException(status_code=409, detail="Activity entry already exists")
+    try:
+        return crud.create_activity_log(db=db, entry=entry, committee_id=committee_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
\ No newline at end of file
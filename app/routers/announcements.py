@@ -1,15 +1,36 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
-from ..database import get_db
+from typing import List, Optional, Union
+from .. import crud, schemas, models
+from ..database import get_async_db, get_db
+from ..tenancy import committee_scope, committee_scope_async
+from ..paging import keyset_page_async, page_limit
+from ..versions import Version, conditional_get
+from ..response_cache import response_cache
+from ..serialization import delta_response, rows_response
 
-router = APIRouter(prefix="/api/announcements", tags=["announcements"])
+router = APIRouter(prefix="/announcements", tags=["announcements"])
 
-@router.get("/", response_model=List[schemas.AnnouncementResponse])
-def read_announcements(db: Session = Depends(get_db)):
-    return crud.get_announcements(db)
+@router.get("/", response_model=Union[List[schemas.AnnouncementResponse], schemas.AnnouncementDeltaResponse])
+async def read_announcements(
+    response: Response,
+    version: Version | None = Depends(conditional_get("announcements")),
+    since: Optional[int] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = Depends(page_limit),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def build():
+        # ?since=<cursor> returns only rows added or changed after that cursor
+        if since is not None:
+            items, cursor = await db.run_sync(crud.get_changes_since, models.Announcement, since, committee_id=committee_id)
+            return delta_response(items, cursor, schemas.AnnouncementResponse, response)
+        # Otherwise newest first, paged with ?before=<cursor>&limit=N
+        return rows_response(await keyset_page_async(response, crud.get_announcements, db, before, limit, committee_id), schemas.AnnouncementResponse, response)
+    return await response_cache.get_or_build_async(version, ("announcements", since, before, limit), build)
 
 @router.post("/", response_model=schemas.AnnouncementResponse)
-def create_announcement(announcement: schemas.AnnouncementCreate, db: Session = Depends(get_db)):
-    return crud.create_announcement(db=db, announcement=announcement)
\ No newline at end of file
+def create_announcement(announcement: schemas.AnnouncementCreate, committee_id: int = Depends(committee_scope), db: Session = Depends(get_db)):
+    return crud.create_announcement(db=db, announcement=announcement, committee_id=committee_id)
\ No newline at end of file
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import crud, schemas
-from ..database import get_db
-from ..ws import manager  # <-- Added WebSocket manager import
+from ..database import get_async_db
+from ..tenancy import committee_scope_async
+from ..presence import presence
+from ..sessions import bearer_token, issue_token, principal_cache
+from ..versions import table_versions
 
-router = APIRouter(prefix="/api/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"])
 
-# Note: We changed this to 'async def' so we can await the WebSocket broadcast
 @router.post("/login")
-async def login(request: schemas.LoginRequest, db: Session = Depends(get_db)):
+async def login(request: schemas.LoginRequest, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
     if request.role in ['chair', 'vice-chair']:
         # Authenticate Admin
-        admin = crud.authenticate_admin(db, request.username, request.password)
+        admin = await db.run_sync(crud.authenticate_admin, request.username, request.password, committee_id=committee_id)
         if not admin:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -23,30 +25,31 @@ async def login(request: schemas.LoginRequest, db: Session = Depends(get_db)):
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Selected role does not match account role",
             )
-        return {"message": "Login successful", "user": {"id": admin.id, "name": admin.name, "role": admin.role}}
+        return {
+            "message": "Login successful",
+            "token": issue_token("admin", admin.id, admin.role, admin.name, committee_id),
+            "user": {"id": admin.id, "name": admin.name, "role": admin.role}
+        }
         
     elif request.role == 'delegate':
         # Authenticate Delegate (username is the Country)
-        delegate = crud.authenticate_delegate(db, request.username, request.password)
+        delegate = await db.run_sync(crud.authenticate_delegate, request.username, request.password, committee_id=committee_id)
         if not delegate:
              raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid country or password",
             )
         
-        # ==========================================
-        # NEW CODE: Mark as Present & Notify EB
-        # ==========================================
-        delegate.present = True
-        db.commit()
-        
-        await manager.broadcast({
-            "type": "DELEGATES_REFRESH"
-        })
-        # ==========================================
+        # Mark as present; the change reaches clients in a batched PRESENCE event
+        if not delegate.present:
+            delegate.present = True
+            await db.commit()
+            table_versions.bump(committee_id, "delegates")
+            presence.mark(committee_id, delegate.id, True)
 
         return {
             "message": "Login successful", 
+            "token": issue_token("delegate", delegate.id, "delegate", delegate.country, committee_id),
             "user": {
                 "id": delegate.id, 
                 "name": delegate.name, 
@@ -59,9 +62,18 @@ async def login(request: schemas.LoginRequest, db: Session = Depends(get_db)):
     else:
         raise HTTPException(status_code=400, detail="Invalid role specified")
 
+@router.post("/logout")
+async def logout(authorization: str = Header(None)):
+    token = bearer_token(authorization)
+    if token:
+        principal_cache.revoke(token)
+    return {"message": "Logged out"}
+
 @router.put("/delegate/{delegate_id}/password")
-def update_password(delegate_id: str, payload: schemas.PasswordUpdate, db: Session = Depends(get_db)):
-    success = crud.update_delegate_password(db, delegate_id, payload.new_password)
+async def update_password(delegate_id: str, payload: schemas.PasswordUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    success = await db.run_sync(crud.update_delegate_password, delegate_id, payload.new_password, committee_id=committee_id)
     if not success:
         raise HTTPException(status_code=404, detail="Delegate not found")
+    # Sessions opened with the old password end here
+    principal_cache.revoke_subject("delegate", delegate_id)
     return {"message": "Password updated successfully"}
\ No newline at end of file
@@ -1,25 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
-from ..database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from .. import crud, schemas, models
+from ..database import get_async_db
+from ..tenancy import committee_scope_async
+from ..serialization import delta_response, rows_response
+from ..sessions import Principal, current_principal, is_admin_for
+from ..versions import conditional_get
 
-router = APIRouter(prefix="/api/chits", tags=["chits"])
+router = APIRouter(prefix="/chits", tags=["chits"])
 
-@router.get("/", response_model=List[schemas.ChitResponse])
-def read_chits(db: Session = Depends(get_db)):
-    return crud.get_chits(db)
+@router.get("/", response_model=Union[List[schemas.ChitResponse], schemas.ChitDeltaResponse], dependencies=[Depends(conditional_get("chits"))])
+async def read_chits(response: Response, since: Optional[int] = None, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    # ?since=<cursor> returns only rows added or changed after that cursor
+    if since is not None:
+        items, cursor = await db.run_sync(crud.get_changes_since, models.Chit, since, committee_id=committee_id)
+        return delta_response(items, cursor, schemas.ChitResponse, response)
+    return rows_response(await db.run_sync(crud.get_chits, committee_id=committee_id), schemas.ChitResponse, response)
 
 @router.post("/", response_model=schemas.ChitResponse)
-def create_chit(chit: schemas.ChitCreate, db: Session = Depends(get_db)):
-    db_chit = crud.get_chit(db, chit_id=chit.id)
-    if db_chit:
+async def create_chit(chit: schemas.ChitCreate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    if await db.run_sync(crud.id_taken, models.Chit, chit.id):
         raise HTTPException(status_code=400, detail="Chit already exists")
-    return crud.create_chit(db=db, chit=chit)
+    return await db.run_sync(crud.create_chit, chit=chit, committee_id=committee_id)
 
 @router.put("/{chit_id}", response_model=schemas.ChitResponse)
-def update_chit_status(chit_id: str, chit_update: schemas.ChitUpdate, db: Session = Depends(get_db)):
-    db_chit = crud.update_chit(db, chit_id, chit_update)
+async def update_chit_status(
+    chit_id: str,
+    chit_update: schemas.ChitUpdate,
+    x_role: str = Header(None),
+    principal: Principal | None = Depends(current_principal),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Marking a chit (eb_status, marks) is the EB's call; anyone may set read
+    if (chit_update.eb_status is not None or chit_update.marks is not None) and not is_admin_for(principal, committee_id, x_role):
+        raise HTTPException(status_code=403, detail="Only the chair or vice-chair can mark chits")
+    db_chit = await db.run_sync(crud.update_chit, chit_id, chit_update, committee_id=committee_id)
     if not db_chit:
         raise HTTPException(status_code=404, detail="Chit not found")
     return db_chit
\ No newline at end of file
@@ -1,66 +1,123 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import crud, schemas
-from ..database import get_db
+from ..database import get_async_db
+from ..tenancy import committee_scope_async
+from ..ws import manager
+from ..timers import scheduler
+from ..versions import conditional_get
 
-router = APIRouter(prefix="/api/committee", tags=["committee"])
+router = APIRouter(prefix="/committee", tags=["committee"])
 
-@router.get("/", response_model=schemas.CommitteeStateResponse)
-def read_committee_state(db: Session = Depends(get_db)):
-    return crud.get_committee_state(db)
+# delegate_votes is read from the votes table while a vote is open
+@router.get("/", response_model=schemas.CommitteeStateResponse, dependencies=[Depends(conditional_get("committee_state", "votes"))])
+async def read_committee_state(committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.get_committee_state, committee_id=committee_id)
 
 @router.put("/phase", response_model=schemas.CommitteeStateResponse)
-def update_phase(phase: str, db: Session = Depends(get_db)):
-    return crud.update_committee_phase(db, phase)
+async def update_phase(phase: str, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_committee_phase, phase, committee_id=committee_id)
 
 @router.put("/speakers", response_model=schemas.CommitteeStateResponse)
-def update_speakers(update_data: schemas.CommitteeSpeakersUpdate, db: Session = Depends(get_db)):
-    return crud.update_committee_speakers(db, update_data.speakers_list, update_data.current_speaker)
+async def update_speakers(update_data: schemas.CommitteeSpeakersUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_committee_speakers, update_data.speakers_list, update_data.current_speaker, committee_id=committee_id)
 
 @router.put("/timer", response_model=schemas.CommitteeStateResponse)
-def update_timer(update_data: schemas.CommitteeTimerUpdate, db: Session = Depends(get_db)):
-    return crud.update_committee_timer(db, update_data.timer_seconds, update_data.timer_running, update_data.timer_total, update_data.last_started_at)
+async def update_timer(update_data: schemas.CommitteeTimerUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    state = await db.run_sync(crud.update_committee_timer, update_data.timer_seconds, update_data.timer_running, update_data.timer_total, update_data.last_started_at, committee_id=committee_id)
+    await scheduler.publish(committee_id, state, "updated")
+    return state
+
+# The server runs the countdown: clients send start/pause/reset/set_total and
+# receive TIMER_UPDATE (including "expired") over the WebSocket
+TIMER_EVENTS = {"start": "started", "pause": "paused", "reset": "reset", "set_total": "total"}
+
+@router.post("/timer", response_model=schemas.CommitteeStateResponse)
+async def timer_op(payload: schemas.CommitteeTimerOp, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    try:
+        state = await db.run_sync(crud.apply_timer_op, payload.op, payload.seconds, committee_id=committee_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await scheduler.publish(committee_id, state, TIMER_EVENTS[payload.op])
+    return state
 
 @router.put("/floor", response_model=schemas.CommitteeStateResponse)
-def update_floor(update_data: schemas.CommitteeFloorUpdate, db: Session = Depends(get_db)):
-    return crud.update_committee_floor(db, update_data.floor_open)
+async def update_floor(update_data: schemas.CommitteeFloorUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_committee_floor, update_data.floor_open, committee_id=committee_id)
 
 @router.put("/motions_floor", response_model=schemas.CommitteeStateResponse)
-def update_motions_floor(update_data: schemas.CommitteeMotionsFloorUpdate, db: Session = Depends(get_db)):
-    return crud.update_motions_floor(db, update_data.motions_floor_open)
+async def update_motions_floor(update_data: schemas.CommitteeMotionsFloorUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_motions_floor, update_data.motions_floor_open, committee_id=committee_id)
 
 @router.put("/voting_session", response_model=schemas.CommitteeStateResponse)
-def update_voting_session(update_data: schemas.CommitteeVotingSessionUpdate, db: Session = Depends(get_db)):
-    return crud.update_voting_session(db, update_data.active_voting_motion_id, update_data.delegate_votes)
-
-@router.put("/cast_vote", response_model=schemas.CommitteeStateResponse)
-def cast_vote(update_data: schemas.CommitteeDelegateVoteUpdate, db: Session = Depends(get_db)):
-    return crud.cast_delegate_vote(db, update_data.delegate_id, update_data.vote)
+async def update_voting_session(update_data: schemas.CommitteeVotingSessionUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_voting_session, update_data.active_voting_motion_id, update_data.delegate_votes, committee_id=committee_id)
+
+# Votes go to their own rows; every cast pushes the new tally to the committee
+@router.put("/cast_vote", response_model=schemas.VoteTallyResponse)
+async def cast_vote(update_data: schemas.CommitteeDelegateVoteUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    try:
+        tally = await db.run_sync(crud.cast_delegate_vote, update_data.delegate_id, update_data.vote, committee_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if tally is None:
+        raise HTTPException(status_code=409, detail="No vote is in progress")
+
+    await manager.broadcast({
+        "type": "DELEGATE_VOTE_CAST",
+        "data": {"delegateId": update_data.delegate_id, "vote": update_data.vote, "motionId": tally.motion_id, "tally": tally.votes}
+    }, committee_id)
+    return tally
+
+@router.put("/close_vote", response_model=schemas.MotionResponse)
+async def close_vote(update_data: schemas.CommitteeCloseVote, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    motion = await db.run_sync(crud.close_vote, update_data.status, committee_id)
+    if motion is None:
+        raise HTTPException(status_code=409, detail="No vote is in progress")
+
+    updates = {"status": motion.status, "votes_for": motion.votes_for, "votes_against": motion.votes_against, "votes_abstain": motion.votes_abstain}
+    await manager.broadcast({"type": "MOTION_STATUS_UPDATE", "data": {"id": motion.id, "updates": updates}}, committee_id)
+    await manager.broadcast({"type": "VOTING_SESSION_UPDATE", "data": {"motionId": None, "votes": {}}}, committee_id)
+    return motion
 
 @router.put("/caucus_session", response_model=schemas.CommitteeStateResponse)
-def update_caucus_session(update_data: schemas.CommitteeCaucusSessionUpdate, db: Session = Depends(get_db)):
-    return crud.update_caucus_session(db, update_data.active_caucus_id)
+async def update_caucus_session(update_data: schemas.CommitteeCaucusSessionUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_caucus_session, update_data.active_caucus_id, committee_id=committee_id)
 
 @router.put("/caucus_speakers", response_model=schemas.CommitteeStateResponse)
-def update_caucus_speakers(update_data: schemas.CommitteeCaucusSpeakersUpdate, db: Session = Depends(get_db)):
-    return crud.update_caucus_speakers(db, update_data.caucus_speakers_list, update_data.caucus_current_speaker)
+async def update_caucus_speakers(update_data: schemas.CommitteeCaucusSpeakersUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_caucus_speakers, update_data.caucus_speakers_list, update_data.caucus_current_speaker, committee_id=committee_id)
 
 @router.put("/caucus_floor", response_model=schemas.CommitteeStateResponse)
-def update_caucus_floor(update_data: schemas.CommitteeCaucusFloorUpdate, db: Session = Depends(get_db)):
-    return crud.update_caucus_floor(db, update_data.caucus_floor_open)
+async def update_caucus_floor(update_data: schemas.CommitteeCaucusFloorUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_caucus_floor, update_data.caucus_floor_open, committee_id=committee_id)
 
 @router.put("/yield", response_model=schemas.CommitteeStateResponse)
-def update_yield_state(update_data: schemas.CommitteeYieldUpdate, db: Session = Depends(get_db)):
-    return crud.update_yield_state(db, update_data.current_yield_type, update_data.yield_target)
+async def update_yield_state(update_data: schemas.CommitteeYieldUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_yield_state, update_data.current_yield_type, update_data.yield_target, committee_id=committee_id)
+
+# Server-side edits to the speakers lists and question queue; only the delta is broadcast
+@router.post("/lists/{name}", response_model=schemas.CommitteeListResponse)
+async def apply_list_op(name: str, op: schemas.CommitteeListOp, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    if name not in crud.COMMITTEE_LISTS:
+        raise HTTPException(status_code=404, detail="Unknown list")
+    try:
+        view, delta = await db.run_sync(crud.apply_list_op, name, op, committee_id)
+    except crud.ListVersionConflict as e:
+        raise HTTPException(status_code=409, detail={"message": "List was changed by someone else", "version": e.version})
+
+    if delta is not None:
+        await manager.broadcast({"type": "COMMITTEE_LIST_OP", "data": delta}, committee_id)
+    return view
 
 @router.put("/info", response_model=schemas.CommitteeStateResponse)
-def update_info(update_data: schemas.CommitteeInfoUpdate, db: Session = Depends(get_db)):
-    return crud.update_committee_info(db, update_data.name, update_data.agenda)
+async def update_info(update_data: schemas.CommitteeInfoUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_committee_info, update_data.name, update_data.agenda, committee_id=committee_id)
 
 @router.put("/question_queue", response_model=schemas.CommitteeStateResponse)
-def update_question_queue(update_data: schemas.CommitteeQuestionQueueUpdate, db: Session = Depends(get_db)):
-    return crud.update_question_queue(db, update_data.question_queue)
+async def update_question_queue(update_data: schemas.CommitteeQuestionQueueUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_question_queue, update_data.question_queue, committee_id=committee_id)
 
 @router.put("/verbatim_permissions", response_model=schemas.CommitteeStateResponse)
-def update_verbatim_perms(update_data: schemas.CommitteeVerbatimPermUpdate, db: Session = Depends(get_db)):
-    return crud.update_verbatim_permissions(db, update_data.verbatim_permissions)
\ No newline at end of file
+async def update_verbatim_perms(update_data: schemas.CommitteeVerbatimPermUpdate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.update_verbatim_permissions, update_data.verbatim_permissions, committee_id=committee_id)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List
+from .. import crud, schemas
+from ..database import get_db
+
+# Committees themselves; everything inside one lives under /api/committees/{committee_id}/...
+router = APIRouter(prefix="/api/committees", tags=["committees"])
+
+@router.get("/", response_model=List[schemas.CommitteeSummary])
+def read_committees(db: Session = Depends(get_db)):
+    return crud.get_committees(db)
+
+@router.post("/", response_model=schemas.CommitteeStateResponse)
+def create_committee(committee: schemas.CommitteeCreate, db: Session = Depends(get_db)):
+    return crud.create_committee(db, committee)
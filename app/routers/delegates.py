@@ -1,35 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Union
-from .. import crud, schemas, models
-from ..database import get_db
+from .. import crud, schemas, models, scoreboard
+from ..database import get_async_db
+from ..tenancy import committee_scope_async
+from ..sessions import Principal, current_principal, is_admin_for, require_admin
+from ..serialization import rows_response
+from ..versions import Version, conditional_get, table_versions
+from ..response_cache import response_cache
 
-router = APIRouter(prefix="/api/delegates", tags=["delegates"])
+router = APIRouter(prefix="/delegates", tags=["delegates"])
 
 @router.get("/", response_model=List[Union[schemas.DelegateScoreResponse, schemas.DelegatePublicResponse]])
-def read_delegates(
+async def read_delegates(
+    response: Response,
+    # Averages are derived from chit marks and passed caucuses as well as the delegate rows
+    version: Version | None = Depends(conditional_get("delegates", "chits", "motions", by_role=True)),
     x_role: str = Header(None), 
-    db: Session = Depends(get_db)
+    principal: Principal | None = Depends(current_principal),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    delegates = crud.get_delegates(db)
-    
-    # Secure Filter: Strip scores if the user is not an Admin
-    if x_role not in ['chair', 'vice-chair']:
-        return [schemas.DelegatePublicResponse.model_validate(d) for d in delegates]
-    
-    # Send full data to Admins
-    return [schemas.DelegateScoreResponse.model_validate(d) for d in delegates]
+    # Secure Filter: Strip scores if the user is not an Admin (the version tag names the view)
+    schema = schemas.DelegatePublicResponse
+    if is_admin_for(principal, committee_id, x_role):
+        # Send full data to Admins
+        schema = schemas.DelegateScoreResponse
+
+    async def build():
+        delegates = await db.run_sync(crud.get_delegates, committee_id=committee_id)
+        return rows_response(delegates, schema, response)
+    return await response_cache.get_or_build_async(version, ("delegates",), build)
 
 @router.post("/", response_model=schemas.DelegateScoreResponse)
-def create_delegate(delegate: schemas.DelegateCreate, db: Session = Depends(get_db)):
-    db_delegate = crud.get_delegate(db, delegate_id=delegate.id)
-    if db_delegate:
+async def create_delegate(delegate: schemas.DelegateCreate, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    if await db.run_sync(crud.id_taken, models.Delegate, delegate.id):
         raise HTTPException(status_code=400, detail="Delegate already exists")
-    return crud.create_delegate(db=db, delegate=delegate)
+    return await db.run_sync(crud.create_delegate, delegate=delegate, committee_id=committee_id)
 
-@router.put("/{delegate_id}/scores", response_model=schemas.DelegateScoreResponse)
-def update_score(delegate_id: str, category: str, score: int, db: Session = Depends(get_db)):
-    db_delegate = crud.update_delegate_score(db, delegate_id, category, score)
+@router.put("/{delegate_id}/scores", response_model=schemas.DelegateScoreResponse, dependencies=[Depends(require_admin)])
+async def update_score(delegate_id: str, category: str, score: int, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
+    db_delegate = await db.run_sync(crud.update_delegate_score, delegate_id, category, score, committee_id=committee_id)
     if not db_delegate:
         raise HTTPException(status_code=404, detail="Delegate not found")
     return db_delegate
@@ -37,17 +48,19 @@ def update_score(delegate_id: str, category: str, score: int, db: Session = Depe
 # ==========================================
 # NEW ROUTE: Delete Delegate
 # ==========================================
-@router.delete("/{delegate_id}", status_code=status.HTTP_200_OK)
-def delete_delegate(delegate_id: str, db: Session = Depends(get_db)):
+@router.delete("/{delegate_id}", status_code=status.HTTP_200_OK, dependencies=[Depends(require_admin)])
+async def delete_delegate(delegate_id: str, committee_id: int = Depends(committee_scope_async), db: AsyncSession = Depends(get_async_db)):
     """Permanently delete a delegate from the database."""
     # Find the delegate
-    delegate = db.query(models.Delegate).filter(models.Delegate.id == delegate_id).first()
+    delegate = await db.run_sync(crud.get_delegate_row, delegate_id, committee_id=committee_id)
     
     if not delegate:
         raise HTTPException(status_code=404, detail="Delegate not found")
         
     # Delete and save
-    db.delete(delegate)
-    db.commit()
+    await db.delete(delegate)
+    await db.run_sync(scoreboard.drop_delegate, delegate_id)
+    await db.commit()
+    table_versions.bump(committee_id, "delegates")
     
     return {"message": f"Delegate {delegate.country} removed successfully"}
\ No newline at end of file
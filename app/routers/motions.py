@@ -1,25 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
-from ..database import get_db
+from typing import List, Optional
+from .. import crud, schemas, models
+from ..database import get_async_db, get_db
+from ..tenancy import committee_scope, committee_scope_async
+from ..paging import keyset_page_async, page_limit
+from ..versions import Version, conditional_get
+from ..response_cache import response_cache
+from ..serialization import rows_response
 
-router = APIRouter(prefix="/api/motions", tags=["motions"])
+router = APIRouter(prefix="/motions", tags=["motions"])
 
 @router.get("/", response_model=List[schemas.MotionResponse])
-def read_motions(db: Session = Depends(get_db)):
-    return crud.get_motions(db)
+async def read_motions(
+    response: Response,
+    version: Version | None = Depends(conditional_get("motions")),
+    before: Optional[str] = None,
+    limit: Optional[int] = Depends(page_limit),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def build():
+        return rows_response(await keyset_page_async(response, crud.get_motions, db, before, limit, committee_id), schemas.MotionResponse, response)
+    return await response_cache.get_or_build_async(version, ("motions", before, limit), build)
 
 @router.post("/", response_model=schemas.MotionResponse)
-def create_motion(motion: schemas.MotionCreate, db: Session = Depends(get_db)):
-    db_motion = crud.get_motion(db, motion_id=motion.id)
-    if db_motion:
+def create_motion(motion: schemas.MotionCreate, committee_id: int = Depends(committee_scope), db: Session = Depends(get_db)):
+    if crud.id_taken(db, models.Motion, motion.id):
         raise HTTPException(status_code=400, detail="Motion already exists")
-    return crud.create_motion(db=db, motion=motion)
+    return crud.create_motion(db=db, motion=motion, committee_id=committee_id)
 
 @router.put("/{motion_id}", response_model=schemas.MotionResponse)
-def update_motion(motion_id: str, update_data: schemas.MotionUpdate, db: Session = Depends(get_db)):
-    db_motion = crud.update_motion(db, motion_id, update_data)
+def update_motion(motion_id: str, update_data: schemas.MotionUpdate, committee_id: int = Depends(committee_scope), db: Session = Depends(get_db)):
+    db_motion = crud.update_motion(db, motion_id, update_data, committee_id=committee_id)
     if not db_motion:
         raise HTTPException(status_code=404, detail="Motion not found")
     return db_motion
\ No newline at end of file
@@ -1,69 +1,202 @@
 import os
 import json
-import shutil
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+import re
+import uuid
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File, Form, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
 from .. import crud, schemas
-from ..database import get_db
+from ..blobstore import UploadTooLarge, blob_cache, extract_pdf_text, hash_file, iter_file, store_upload
+from ..database import get_db, get_async_db
+from ..tenancy import committee_scope, committee_scope_async
+from ..paging import keyset_page_async, page_limit
+from ..serialization import rows_response
+from ..versions import Version, conditional_get, etag_matches, table_versions
+from ..response_cache import response_cache
 
-router = APIRouter(prefix="/api/resolutions", tags=["resolutions"])
+router = APIRouter(prefix="/resolutions", tags=["resolutions"])
 
-# Create a folder to store the uploaded PDFs locally
-UPLOAD_DIR = "uploads/resolutions"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+class DownloadInfo:
+    """What a download needs, so a hot resolution is served without the database or a stat()."""
+    __slots__ = ("path", "sha256", "size", "filename")
+
+    def __init__(self, path: str, sha256: str, size: int, filename: str):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.filename = filename
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256}"'
+
+# (committee_id, res_id) -> DownloadInfo. A resolution's file never changes
+# after upload, so entries only go away when the data is reset.
+download_index: dict[tuple[int, str], DownloadInfo] = {}
+
+def _remember(res, committee_id: int) -> DownloadInfo:
+    info = DownloadInfo(res.file_path, res.sha256, res.size, f"{res.title}.pdf")
+    download_index[(committee_id, res.id)] = info
+    return info
+
+def _load_download_info(db: Session, res_id: str, committee_id: int) -> DownloadInfo | None:
+    res = crud.get_resolution(db, res_id, committee_id=committee_id)
+    if not res or not res.file_path or not os.path.exists(res.file_path):
+        return None
+    if not res.sha256:
+        # Stored before hashing existed and missed by the startup backfill
+        res.sha256, res.size = hash_file(res.file_path)
+        db.commit()
+        table_versions.bump(committee_id, "resolutions")
+    return _remember(res, committee_id)
+
+def _parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Returns (start, end) inclusive for a single byte range, None to send the
+    whole file. Raises ValueError when the range cannot be satisfied."""
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        # Multiple ranges or other units: answering with the full body is allowed
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename*=utf-8''{quoted}"
 
 @router.post("/", response_model=schemas.ResolutionResponse)
-def upload_resolution(
+async def upload_resolution(
     title: str = Form(...),
     uploaded_by: str = Form(...),
     authors: str = Form(...),      # Received as JSON string from frontend
     signatories: str = Form(...),  # Received as JSON string from frontend
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed.")
 
-    # Generate a unique ID and file path
-    res_id = f"res_{int(datetime.now().timestamp())}"
-    file_path = os.path.join(UPLOAD_DIR, f"{res_id}.pdf")
-    
-    # Save the file to disk
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Stream to content-addressed storage; an identical draft reuses the stored file
+    try:
+        blob = await store_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # Searchable text; a re-uploaded draft reuses what was extracted the first time
+    text = await db.run_sync(crud.get_resolution_text, blob.sha256) if blob.existed else None
+    if text is None:
+        text = await run_in_threadpool(extract_pdf_text, blob.path)
 
     # Prepare data for DB
     res_data = schemas.ResolutionCreate(
-        id=res_id,
+        id=f"res_{uuid.uuid4().hex}",
         title=title,
         uploaded_by=uploaded_by,
         authors=json.loads(authors),
         signatories=json.loads(signatories),
-        file_path=file_path,
+        file_path=blob.path,
+        sha256=blob.sha256,
+        size=blob.size,
+        text=text,
         status="pending",
         marks=0,
         timestamp=datetime.now().strftime("%I:%M %p")
     )
-    return crud.create_resolution(db, res_data)
+    res = await db.run_sync(crud.create_resolution, res_data, committee_id=committee_id)
+    _remember(res, committee_id)
+    return res
 
 @router.get("/", response_model=list[schemas.ResolutionResponse])
-def read_resolutions(db: Session = Depends(get_db)):
-    return crud.get_resolutions(db)
+async def read_resolutions(
+    response: Response,
+    version: Version | None = Depends(conditional_get("resolutions")),
+    before: str | None = None,
+    limit: int | None = Depends(page_limit),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def build():
+        return rows_response(await keyset_page_async(response, crud.get_resolutions, db, before, limit, committee_id), schemas.ResolutionResponse, response)
+    return await response_cache.get_or_build_async(version, ("resolutions", before, limit), build)
 
 @router.put("/{res_id}", response_model=schemas.ResolutionResponse)
-def review_resolution(res_id: str, update_data: schemas.ResolutionUpdate, db: Session = Depends(get_db)):
-    res = crud.update_resolution(db, res_id, update_data.status, update_data.marks)
+def review_resolution(res_id: str, update_data: schemas.ResolutionUpdate, committee_id: int = Depends(committee_scope), db: Session = Depends(get_db)):
+    res = crud.update_resolution(db, res_id, update_data.status, update_data.marks, committee_id=committee_id)
     if not res:
         raise HTTPException(status_code=404, detail="Resolution not found")
     return res
 
 @router.get("/download/{res_id}")
-def download_resolution(res_id: str, db: Session = Depends(get_db)):
-    res = crud.get_resolution(db, res_id)
-    if not res or not os.path.exists(res.file_path):
+async def download_resolution(
+    res_id: str,
+    range_header: str | None = Header(None, alias="range"),
+    if_range: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    info = download_index.get((committee_id, res_id))
+    if info is None:
+        info = await db.run_sync(_load_download_info, res_id, committee_id)
+        if info is None:
+            raise HTTPException(status_code=404, detail="File not found")
+
+    headers = {
+        "ETag": info.etag,
+        "Accept-Ranges": "bytes",
+        # Revalidating costs a 304 once the client holds this ETag
+        "Cache-Control": "public, max-age=0, must-revalidate",
+    }
+    if etag_matches(if_none_match, info.etag):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = _content_disposition(info.filename)
+    # A Range is only honoured if the client's copy is still this version
+    if if_range is not None and if_range.strip() != info.etag:
+        range_header = None
+    try:
+        byte_range = _parse_range(range_header, info.size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{info.size}"
+        return Response(status_code=416, headers=headers)
+
+    status_code = 200
+    start, end = 0, info.size - 1
+    if byte_range is not None:
+        status_code = 206
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+
+    if blob_cache.cacheable(info.size):
+        try:
+            data = await blob_cache.read(info.sha256, info.path)
+        except FileNotFoundError:
+            download_index.pop((committee_id, res_id), None)
+            raise HTTPException(status_code=404, detail="File not found")
+        return Response(content=data[start:end + 1], status_code=status_code, headers=headers, media_type="application/pdf")
+
+    if not await run_in_threadpool(os.path.exists, info.path):
+        download_index.pop((committee_id, res_id), None)
         raise HTTPException(status_code=404, detail="File not found")
-    
-    # Serve the PDF file back to the browser
-    return FileResponse(res.file_path, media_type="application/pdf", filename=f"{res.title}.pdf")
\ No newline at end of file
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_file(info.path, start, end), status_code=status_code, headers=headers, media_type="application/pdf")
\ No newline at end of file
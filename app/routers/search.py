@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from .. import crud, schemas
+from ..database import get_async_db
+from ..tenancy import committee_scope_async
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+@router.get("/", response_model=List[schemas.SearchResult])
+async def search(
+    q: str = Query(..., min_length=1),
+    delegate: Optional[str] = None,         # delegate id or country
+    type: Optional[List[str]] = Query(None),  # gsl, mod_caucus, resolution; repeatable
+    since: Optional[int] = None,            # created_at bounds, epoch ms
+    until: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ranked matches across speeches and resolution text; every term must appear."""
+    if since is not None and until is not None and since > until:
+        raise HTTPException(status_code=400, detail="'since' is after 'until'")
+    return await db.run_sync(crud.search, q, delegate, type, since, until, limit, committee_id=committee_id)
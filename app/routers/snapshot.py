@@ -0,0 +1,122 @@
+import asyncio
+import os
+import time
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import crud, schemas
+from ..database import AsyncSessionLocal, async_engine, get_async_db
+from ..tenancy import committee_scope_async
+from ..serialization import dumps, serializer_for
+from ..sessions import Principal, current_principal, view_of
+from ..versions import Version, conditional_get, table_versions
+
+router = APIRouter(prefix="/snapshot", tags=["snapshot"])
+
+# How long a built snapshot is shared between clients (seconds)
+SNAPSHOT_TTL = float(os.getenv("SNAPSHOT_CACHE_TTL", "1.0"))
+
+class SnapshotCache:
+    """Short-lived shared cache so a connection storm builds each snapshot once.
+
+    Concurrent misses for the same key and ETag await the first builder
+    instead of all hitting the database. An entry built under one ETag is
+    never served under another, so a write inside the TTL is never hidden
+    behind a new tag.
+    """
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict = {}
+        self._building: dict = {}
+
+    async def get_or_build(self, key: str, build, etag: str | None = None) -> bytes:
+        """build() is a coroutine function returning the payload."""
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic() and entry[1] == etag:
+            return entry[2]
+
+        pending = self._building.get((key, etag))
+        if pending is None:
+            async def run() -> bytes:
+                payload = await build()
+                self._entries[key] = (time.monotonic() + self.ttl, etag, payload)
+                return payload
+
+            pending = self._building[(key, etag)] = asyncio.ensure_future(run())
+            pending.add_done_callback(lambda _: self._building.pop((key, etag), None))
+        # Shielded, so one client hanging up doesn't cancel the build for the rest
+        return await asyncio.shield(pending)
+
+    def clear(self):
+        self._entries.clear()
+
+snapshot_cache = SnapshotCache(SNAPSHOT_TTL)
+
+def consistent_read_session() -> AsyncSession:
+    """A session of its own, so the isolation level is set when its connection
+    is checked out. On Postgres every query in it sees the same snapshot."""
+    if async_engine.dialect.name == "postgresql":
+        return AsyncSessionLocal(bind=async_engine.execution_options(isolation_level="REPEATABLE READ"))
+    return AsyncSessionLocal()
+
+def build_snapshot(db: Session, is_admin: bool, committee_id: int, delegate_keys=()) -> dict:
+    """Call on a fresh consistent_read_session(), through run_sync.
+
+    Chits are private as in ws.route_topics: admins get every chit, anyone
+    else only those sent from or to one of delegate_keys (their id and
+    country), so a caller without a delegate token gets none.
+
+    While the committee cache runs it is authoritative and the table can lag
+    it by a flush window, so the committee state is the cache's copy rather
+    than a row read in db. committee_version is the committee_state version
+    that copy reflects; it is read first, so a write landing in between only
+    makes the copy newer than it claims.
+    """
+    committee_version = table_versions.get(committee_id, "committee_state")
+    if is_admin:
+        chits = crud.get_chits(db, committee_id=committee_id)
+    else:
+        chits = crud.get_delegate_chits(db, delegate_keys, committee_id=committee_id) if delegate_keys else []
+    delegate_schema = schemas.DelegateScoreResponse if is_admin else schemas.DelegatePublicResponse
+    return {
+        "delegates": serializer_for(delegate_schema).to_list(crud.get_delegates(db, committee_id=committee_id)),
+        "motions": serializer_for(schemas.MotionResponse).to_list(crud.get_motions(db, committee_id=committee_id)),
+        "chits": serializer_for(schemas.ChitResponse).to_list(chits),
+        "committee": serializer_for(schemas.CommitteeStateResponse).to_dict(crud.get_committee_state(db, committee_id=committee_id)),
+        "committee_version": committee_version,
+        "activity": serializer_for(schemas.ActivityEntryResponse).to_list(crud.get_activity_logs(db, committee_id=committee_id)),
+        "announcements": serializer_for(schemas.AnnouncementResponse).to_list(crud.get_announcements(db, committee_id=committee_id)),
+        "verbatims": serializer_for(schemas.VerbatimResponse).to_list(crud.get_verbatims(db, committee_id=committee_id)),
+        "resolutions": serializer_for(schemas.ResolutionResponse).to_list(crud.get_resolutions(db, committee_id=committee_id)),
+    }
+
+SNAPSHOT_TABLES = (
+    "delegates", "motions", "chits", "committee_state", "votes",
+    "activity_logs", "announcements", "verbatims", "resolutions",
+)
+
+@router.get("/")
+async def read_snapshot(
+    response: Response,
+    version: Version | None = Depends(conditional_get(*SNAPSHOT_TABLES, by_viewer=True)),
+    x_role: str = Header(None),
+    principal: Principal | None = Depends(current_principal),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Everything a client needs on first load, in one payload."""
+    # Only the committee check used the request's session. Hand its connection
+    # back before waiting on a build, which reads on a session of its own:
+    # otherwise a burst of waiters can hold the whole pool and starve the builder
+    await db.close()
+    view = view_of(principal, committee_id, x_role)
+    # Events address a delegate by id or by country
+    delegate_keys = (principal.subject, principal.name) if view.startswith("delegate") else ()
+
+    async def build() -> bytes:
+        async with consistent_read_session() as snapshot_db:
+            return dumps(await snapshot_db.run_sync(build_snapshot, view == "admin", committee_id, delegate_keys))
+
+    key = f"{committee_id}:{view}"
+    payload = await snapshot_cache.get_or_build(key, build, version.etag if version else None)
+    return Response(content=payload, media_type="application/json", headers=dict(response.headers))
@@ -1,15 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
-from ..database import get_db
+from typing import List, Optional, Union
+from .. import crud, schemas, models
+from ..database import get_async_db, get_db
+from ..tenancy import committee_scope, committee_scope_async
+from ..paging import keyset_page_async, page_limit
+from ..versions import conditional_get
+from ..serialization import delta_response, rows_response
 
-router = APIRouter(prefix="/api/verbatims", tags=["verbatims"])
+router = APIRouter(prefix="/verbatims", tags=["verbatims"])
 
-@router.get("/")
-def read_verbatims(db: Session = Depends(get_db)):
-    return crud.get_verbatims(db)
+@router.get("/", response_model=Union[List[schemas.VerbatimResponse], schemas.VerbatimDeltaResponse], dependencies=[Depends(conditional_get("verbatims"))])
+async def read_verbatims(
+    response: Response,
+    since: Optional[int] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = Depends(page_limit),
+    committee_id: int = Depends(committee_scope_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # ?since=<cursor> returns only rows added or changed after that cursor
+    if since is not None:
+        items, cursor = await db.run_sync(crud.get_changes_since, models.Verbatim, since, committee_id=committee_id)
+        return delta_response(items, cursor, schemas.VerbatimResponse, response)
+    # Otherwise newest first, paged with ?before=<cursor>&limit=N
+    return rows_response(await keyset_page_async(response, crud.get_verbatims, db, before, limit, committee_id), schemas.VerbatimResponse, response)
 
 @router.post("/")
-def create_verbatim(verbatim: schemas.VerbatimCreate, db: Session = Depends(get_db)):
-    return crud.create_verbatim(db, verbatim)
\ No newline at end of file
+def create_verbatim(verbatim: schemas.VerbatimCreate, committee_id: int = Depends(committee_scope), db: Session = Depends(get_db)):
+    return crud.create_verbatim(db, verbatim, committee_id=committee_id)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 class Votes(BaseModel):
     for_votes: int = 0
@@ -74,6 +74,7 @@ class MotionUpdate(BaseModel):
 class MotionResponse(MotionBase):
     id: str
     votes: Optional[Votes] = None
+    created_at: Optional[int] = None
     class Config:
         from_attributes = True
 
@@ -99,9 +100,14 @@ class ChitUpdate(BaseModel):
 class ChitResponse(ChitBase):
     id: str
     marks: Optional[int] = 0
+    seq: Optional[int] = None
     class Config:
         from_attributes = True
 
+class ChitDeltaResponse(BaseModel):
+    items: List[ChitResponse]
+    cursor: int
+
 class ActivityEntryBase(BaseModel):
     type: str
     description: str
@@ -113,9 +119,15 @@ class ActivityEntryCreate(ActivityEntryBase):
 
 class ActivityEntryResponse(ActivityEntryBase):
     id: str
+    seq: Optional[int] = None
+    created_at: Optional[int] = None
     class Config:
         from_attributes = True
 
+class ActivityEntryDeltaResponse(BaseModel):
+    items: List[ActivityEntryResponse]
+    cursor: int
+
 class AnnouncementBase(BaseModel):
     message: str
     urgent: bool = False
@@ -126,9 +138,15 @@ class AnnouncementCreate(AnnouncementBase):
 
 class AnnouncementResponse(AnnouncementBase):
     id: str
+    seq: Optional[int] = None
+    created_at: Optional[int] = None
     class Config:
         from_attributes = True
 
+class AnnouncementDeltaResponse(BaseModel):
+    items: List[AnnouncementResponse]
+    cursor: int
+
 class CommitteeStateBase(BaseModel):
     name: str
     agenda: str
@@ -151,6 +169,20 @@ class CommitteeStateBase(BaseModel):
     yield_target: Optional[str] = None
     question_queue: List[str] = [] 
     verbatim_permissions: list = []
+    speakers_version: Optional[int] = 0
+    caucus_speakers_version: Optional[int] = 0
+    question_queue_version: Optional[int] = 0
+
+class CommitteeCreate(BaseModel):
+    name: str
+    agenda: Optional[str] = None
+
+class CommitteeSummary(BaseModel):
+    id: int
+    name: str
+    agenda: str
+    class Config:
+        from_attributes = True
 
 class CommitteeStateResponse(CommitteeStateBase):
     id: int
@@ -181,6 +213,31 @@ class CommitteeDelegateVoteUpdate(BaseModel):
     delegate_id: str
     vote: Optional[str] = None
 
+class CommitteeListOp(BaseModel):
+    op: Literal["append", "remove", "move", "pop_next", "clear"]
+    item: Optional[str] = None
+    index: Optional[int] = None           # Target position for "move"
+    expected_version: Optional[int] = None  # Rejected with 409 if the list has moved on
+
+class CommitteeTimerOp(BaseModel):
+    op: Literal["start", "pause", "reset", "set_total"]
+    seconds: Optional[int] = None  # start from / reset to / new total
+
+class CommitteeListResponse(BaseModel):
+    list: str
+    items: List[str]
+    current_speaker: Optional[str] = None
+    version: int
+
+class CommitteeCloseVote(BaseModel):
+    status: Optional[str] = None
+
+class VoteTallyResponse(BaseModel):
+    motion_id: str
+    votes: Votes
+    class Config:
+        from_attributes = True
+
 class CommitteeCaucusSessionUpdate(BaseModel):
     active_caucus_id: Optional[str] = None
 
@@ -212,6 +269,17 @@ class VerbatimBase(BaseModel):
 class VerbatimCreate(VerbatimBase):
     id: str
 
+class VerbatimResponse(VerbatimBase):
+    id: str
+    seq: Optional[int] = None
+    created_at: Optional[int] = None
+    class Config:
+        from_attributes = True
+
+class VerbatimDeltaResponse(BaseModel):
+    items: List[VerbatimResponse]
+    cursor: int
+
 class CommitteeVerbatimPermUpdate(BaseModel):
     verbatim_permissions: list
     
@@ -229,6 +297,9 @@ class ResolutionBase(BaseModel):
 class ResolutionCreate(ResolutionBase):
     id: str
     file_path: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    text: Optional[str] = None
 
 class ResolutionUpdate(BaseModel):
     status: Optional[str] = None
@@ -237,6 +308,22 @@ class ResolutionUpdate(BaseModel):
 class ResolutionResponse(ResolutionBase):
     id: str
     file_path: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    created_at: Optional[int] = None
     
+    class Config:
+        from_attributes = True
+
+class SearchResult(BaseModel):
+    kind: str  # 'verbatim' or 'resolution'
+    id: str
+    delegate_id: Optional[str] = None
+    type: Optional[str] = None
+    title: Optional[str] = None
+    created_at: Optional[int] = None
+    score: float
+    snippet: str
+
     class Config:
         from_attributes = True
\ No newline at end of file
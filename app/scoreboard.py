@@ -0,0 +1,180 @@
+"""Persistent delegate_scoreboard projection.
+
+Write paths in crud.py call into here before committing so the stored averages
+change in the same transaction as the data they are derived from. Reads become
+a primary-key lookup (or a single join for the whole committee) and never
+write: rows missing for delegates inserted outside crud are filled at startup
+(fill_missing) and computed on the fly until then.
+
+Recovery from the command line:
+    python -m app.scoreboard rebuild
+    python -m app.scoreboard check
+"""
+import sys
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from . import models, scoring
+
+AVERAGE_FIELDS = ("gsl_avg", "chits_score", "mod_avg", "total_score")
+
+# -- Maintenance --
+def refresh_delegates(db: Session, delegates: list) -> dict:
+    """Recomputes and stores the scoreboard rows for the given delegates. Does not commit."""
+    if not delegates:
+        return {}
+    db.flush()
+
+    averages = scoring.compute_all_averages(db, delegates)
+    committees = {d.id: d.committee_id for d in delegates}
+    ids = list(averages.keys())
+    rows = {
+        row.delegate_id: row
+        for row in db.query(models.DelegateScoreboard).filter(models.DelegateScoreboard.delegate_id.in_(ids)).all()
+    }
+    for delegate_id, avgs in averages.items():
+        row = rows.get(delegate_id)
+        if row is None:
+            row = models.DelegateScoreboard(delegate_id=delegate_id)
+            db.add(row)
+        row.committee_id = committees[delegate_id]
+        for field in AVERAGE_FIELDS:
+            setattr(row, field, avgs[field])
+    return averages
+
+def refresh_delegate_ids(db: Session, delegate_ids) -> dict:
+    delegate_ids = [d for d in delegate_ids if d]
+    if not delegate_ids:
+        return {}
+    delegates = db.query(models.Delegate).filter(models.Delegate.id.in_(delegate_ids)).all()
+    return refresh_delegates(db, delegates)
+
+def refresh_chit_sender(db: Session, sender: str | None, committee_id: int) -> dict:
+    """A chit's from_delegate may hold either a delegate id or a delegate name."""
+    if not sender:
+        return {}
+    delegates = db.query(models.Delegate).filter(
+        models.Delegate.committee_id == committee_id,
+        or_(models.Delegate.id == sender, models.Delegate.name == sender)
+    ).all()
+    return refresh_delegates(db, delegates)
+
+def rebuild(db: Session, committee_id: int | None = None) -> int:
+    """Full recompute of one committee's rows (or every committee's), dropping rows
+    for delegates that no longer exist. Does not commit."""
+    delegates = db.query(models.Delegate)
+    stale = db.query(models.DelegateScoreboard)
+    if committee_id is not None:
+        delegates = delegates.filter(models.Delegate.committee_id == committee_id)
+        stale = stale.filter(models.DelegateScoreboard.committee_id == committee_id)
+    delegates = delegates.all()
+    live_ids = [d.id for d in delegates]
+    if live_ids:
+        stale = stale.filter(models.DelegateScoreboard.delegate_id.notin_(live_ids))
+    stale.delete(synchronize_session=False)
+    refresh_delegates(db, delegates)
+    return len(delegates)
+
+def fill_missing(db: Session) -> int:
+    """Stores rows for delegates that have none (inserted outside crud). Does not commit."""
+    delegates = db.query(models.Delegate).outerjoin(
+        models.DelegateScoreboard,
+        models.DelegateScoreboard.delegate_id == models.Delegate.id
+    ).filter(models.DelegateScoreboard.delegate_id.is_(None)).all()
+    refresh_delegates(db, delegates)
+    return len(delegates)
+
+def drop_delegate(db: Session, delegate_id: str):
+    db.query(models.DelegateScoreboard).filter(
+        models.DelegateScoreboard.delegate_id == delegate_id
+    ).delete(synchronize_session=False)
+
+def is_mod_caucus_pass_change(motion_type: str | None, old_status: str | None, new_status: str | None) -> bool:
+    """Passing (or un-passing) a moderated caucus changes every delegate's mod_avg."""
+    if motion_type not in scoring.MOD_CAUCUS_TYPES:
+        return False
+    return (old_status == 'passed') != (new_status == 'passed')
+
+# -- Reads --
+def load_averages(db: Session, delegates: list) -> dict:
+    """Returns {delegate_id: averages} from the projection; missing rows are computed, not stored."""
+    if not delegates:
+        return {}
+    ids = [d.id for d in delegates]
+    rows = db.query(models.DelegateScoreboard).filter(models.DelegateScoreboard.delegate_id.in_(ids)).all()
+    averages = {row.delegate_id: {field: getattr(row, field) for field in AVERAGE_FIELDS} for row in rows}
+
+    missing = [d for d in delegates if d.id not in averages]
+    if missing:
+        averages.update(scoring.compute_all_averages(db, missing))
+    return averages
+
+def load_delegates_with_averages(db: Session, committee_id: int) -> list:
+    """Whole-committee read: one join against the projection."""
+    pairs = db.query(models.Delegate, models.DelegateScoreboard).outerjoin(
+        models.DelegateScoreboard,
+        models.DelegateScoreboard.delegate_id == models.Delegate.id
+    ).filter(models.Delegate.committee_id == committee_id).all()
+
+    delegates = []
+    missing = []
+    for delegate, row in pairs:
+        if row is None:
+            missing.append(delegate)
+        else:
+            scoring.apply_averages(delegate, {field: getattr(row, field) for field in AVERAGE_FIELDS})
+        delegates.append(delegate)
+
+    if missing:
+        averages = scoring.compute_all_averages(db, missing)
+        for delegate in missing:
+            scoring.apply_averages(delegate, averages[delegate.id])
+    return delegates
+
+# -- Consistency --
+def check(db: Session) -> list:
+    """Compares every stored row against crud.calculate_delegate_averages.
+
+    Returns a list of (delegate_id, stored, expected) for rows that disagree;
+    stored is None when the row is missing.
+    """
+    from . import crud
+
+    rows = {row.delegate_id: row for row in db.query(models.DelegateScoreboard).all()}
+    mismatches = []
+    for delegate in db.query(models.Delegate).all():
+        # The state argument is unused by the scoring arithmetic
+        expected = crud.calculate_delegate_averages(db, delegate, None)
+        row = rows.pop(delegate.id, None)
+        stored = {field: getattr(row, field) for field in AVERAGE_FIELDS} if row else None
+        if stored != expected:
+            mismatches.append((delegate.id, stored, expected))
+    for orphan_id, row in rows.items():
+        mismatches.append((orphan_id, {field: getattr(row, field) for field in AVERAGE_FIELDS}, None))
+    return mismatches
+
+def main(argv: list) -> int:
+    from .database import SessionLocal
+
+    command = argv[0] if argv else ""
+    if command not in ("rebuild", "check"):
+        print("usage: python -m app.scoreboard [rebuild|check]")
+        return 2
+
+    db = SessionLocal()
+    try:
+        if command == "rebuild":
+            count = rebuild(db)
+            db.commit()
+            print(f"Rebuilt scoreboard for {count} delegates")
+            return 0
+
+        mismatches = check(db)
+        for delegate_id, stored, expected in mismatches:
+            print(f"{delegate_id}: stored={stored} expected={expected}")
+        print("Scoreboard is consistent" if not mismatches else f"{len(mismatches)} inconsistent rows")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,117 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func
+from . import models
+
+MOD_CAUCUS_TYPES = ['moderated_caucus', 'mod_caucus', 'Moderated Caucus']
+
+# -- Helpers --
+def _category_total(scores: dict, *keys) -> int:
+    data = scores.get(keys[0], scores.get(keys[1], 0))
+    return sum(data) if isinstance(data, list) else data
+
+def count_passed_mod_caucuses(db: Session, committee_id: int) -> int:
+    return db.query(models.Motion).filter(
+        models.Motion.committee_id == committee_id,
+        models.Motion.type.in_(MOD_CAUCUS_TYPES),
+        models.Motion.status == 'passed'
+    ).count()
+
+def chit_marks_by_sender(db: Session, senders, committee_id: int) -> dict:
+    """Returns {from_delegate: {kind: (count, marks)}} where kind is 'question', 'answer' or 'other'."""
+    senders = list(senders)
+    if not senders:
+        return {}
+
+    lowered = func.lower(models.Chit.type)
+    kind = case(
+        (lowered == 'question', 'question'),
+        (lowered == 'answer', 'answer'),
+        else_='other'
+    )
+    rows = db.query(
+        models.Chit.from_delegate,
+        kind,
+        func.count(models.Chit.id),
+        func.sum(func.coalesce(models.Chit.marks, 0))
+    ).filter(
+        models.Chit.committee_id == committee_id,
+        models.Chit.from_delegate.in_(senders)
+    ).group_by(models.Chit.from_delegate, kind).all()
+
+    grouped = {}
+    for sender, chit_kind, count, marks in rows:
+        grouped.setdefault(sender, {})[chit_kind] = (count, int(marks or 0))
+    return grouped
+
+# -- Scoring --
+def averages_from_totals(scores: dict, speeches: int, total_mods: int, chit_groups: dict) -> dict:
+    """Same arithmetic as crud.calculate_delegate_averages, fed from pre-aggregated totals."""
+    scores = scores or {}
+
+    gsl_total = _category_total(scores, "GSL", "gsl")
+    gsl_avg = (gsl_total / speeches) if speeches > 0 else 0.0
+
+    mod_total = _category_total(scores, "Moderated Caucus", "mod_caucus")
+    mod_avg = (mod_total / total_mods) if total_mods > 0 else 0.0
+
+    q_count, q_marks = chit_groups.get('question', (0, 0))
+    a_count, a_marks = chit_groups.get('answer', (0, 0))
+    o_count, o_marks = chit_groups.get('other', (0, 0))
+
+    q_avg = (q_marks / q_count) if q_count else 0.0
+    a_avg = (a_marks / a_count) if a_count else 0.0
+
+    chits_score = q_avg + a_avg
+
+    if not q_count and not a_count and o_count:
+        chits_score = o_marks / o_count
+
+    total_score = gsl_avg + mod_avg + chits_score
+
+    return {
+        "gsl_avg": round(gsl_avg, 2),
+        "chits_score": round(chits_score, 2),
+        "mod_avg": round(mod_avg, 2),
+        "total_score": round(total_score, 2)
+    }
+
+def _merge_groups(chit_totals: dict, keys) -> dict:
+    merged = {}
+    for key in keys:
+        for kind, (count, marks) in chit_totals.get(key, {}).items():
+            prev_count, prev_marks = merged.get(kind, (0, 0))
+            merged[kind] = (prev_count + count, prev_marks + marks)
+    return merged
+
+def compute_all_averages(db: Session, delegates: list) -> dict:
+    """Scores every delegate with a fixed number of queries per committee, regardless of committee size.
+
+    Returns {delegate_id: averages} matching crud.calculate_delegate_averages.
+    """
+    by_committee = {}
+    for d in delegates:
+        by_committee.setdefault(d.committee_id, []).append(d)
+
+    results = {}
+    for committee_id, members in by_committee.items():
+        total_mods = count_passed_mod_caucuses(db, committee_id)
+
+        # A chit counts towards a delegate if it was sent under their id or their name
+        senders = set()
+        for d in members:
+            senders.add(d.id)
+            if d.name is not None:
+                senders.add(d.name)
+        chit_totals = chit_marks_by_sender(db, senders, committee_id)
+
+        for d in members:
+            keys = {d.id} if d.name is None else {d.id, d.name}
+            results[d.id] = averages_from_totals(d.scores, d.speeches or 0, total_mods, _merge_groups(chit_totals, keys))
+    return results
+
+def apply_averages(delegate: models.Delegate, avgs: dict):
+    delegate.gsl_avg = avgs["gsl_avg"]
+    delegate.chits_score = avgs["chits_score"]
+    delegate.mod_avg = avgs["mod_avg"]
+    delegate.total_score = avgs["total_score"]
+    return delegate
@@ -0,0 +1,280 @@
+"""Full-text search over verbatims and resolutions.
+
+Two backends, picked with SEARCH_BACKEND (defaults to the database dialect):
+
+    postgres  native full-text search (to_tsvector / websearch_to_tsquery),
+              backed by the GIN expression indexes created in migrations.py
+    memory    an in-process inverted index per committee, ranked with BM25.
+              Built from the database on a committee's first search and kept
+              current by the crud create paths, so it only sees writes made
+              by this process: use it with a single worker.
+
+Both match documents containing every query term and support the same
+delegate / type / time filters.
+"""
+import heapq
+import math
+import os
+import re
+import threading
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import Session
+from . import models
+from .database import engine
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "postgres" if engine.dialect.name == "postgresql" else "memory")
+
+RESOLUTION_TYPE = "resolution"
+SNIPPET_CHARS = 160
+
+_WORD = re.compile(r"\w+")
+
+def _stem(word: str) -> str:
+    # Just enough folding that "refugee" finds "refugees"
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def tokenize(value: str | None) -> list:
+    return [_stem(word) for word in _WORD.findall((value or "").lower())]
+
+class SearchHit:
+    __slots__ = ("kind", "id", "delegate_id", "type", "title", "created_at", "score", "snippet")
+
+    def __init__(self, kind, id, delegate_id, type, title, created_at, score, snippet):
+        self.kind = kind
+        self.id = id
+        self.delegate_id = delegate_id
+        self.type = type
+        self.title = title
+        self.created_at = created_at
+        self.score = score
+        self.snippet = snippet
+
+class SearchDoc:
+    __slots__ = ("kind", "id", "delegate_keys", "delegate_id", "type", "title", "body", "created_at", "length")
+
+    def __init__(self, kind, id, delegate_keys, delegate_id, type, title, body, created_at):
+        self.kind = kind
+        self.id = id
+        self.delegate_keys = delegate_keys
+        self.delegate_id = delegate_id
+        self.type = type
+        self.title = title
+        self.body = body
+        self.created_at = created_at or 0
+        self.length = 0
+
+    @classmethod
+    def from_verbatim(cls, v: models.Verbatim) -> "SearchDoc":
+        return cls("verbatim", v.id, {v.delegate_id}, v.delegate_id, v.type, v.topic, v.text, v.created_at)
+
+    @classmethod
+    def from_resolution(cls, r: models.Resolution) -> "SearchDoc":
+        keys = {r.uploaded_by, *(r.authors or [])}
+        return cls(RESOLUTION_TYPE, r.id, keys, r.uploaded_by, RESOLUTION_TYPE, r.title, r.text, r.created_at)
+
+def _snippet(body: str | None, terms: set) -> str:
+    body = body or ""
+    for match in _WORD.finditer(body):
+        if _stem(match.group().lower()) in terms:
+            start = max(match.start() - SNIPPET_CHARS // 3, 0)
+            return ("…" if start else "") + body[start:start + SNIPPET_CHARS].strip()
+    return body[:SNIPPET_CHARS].strip()
+
+class CommitteeIndex:
+    """Inverted index over one committee's documents. BM25 ranking."""
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.postings: dict[str, dict[tuple, int]] = {}
+        self.docs: dict[tuple, SearchDoc] = {}
+        self.total_length = 0
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def add(self, doc: SearchDoc):
+        key = (doc.kind, doc.id)
+        terms: dict[str, int] = {}
+        for term in tokenize(doc.title) + tokenize(doc.body):
+            terms[term] = terms.get(term, 0) + 1
+        doc.length = sum(terms.values())
+        with self._lock:
+            self._remove(key)
+            self.docs[key] = doc
+            self.total_length += doc.length
+            for term, count in terms.items():
+                self.postings.setdefault(term, {})[key] = count
+
+    def _remove(self, key: tuple):
+        old = self.docs.pop(key, None)
+        if old is None:
+            return
+        self.total_length -= old.length
+        for term in set(tokenize(old.title) + tokenize(old.body)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query: str, delegate_keys: set | None, types: set | None,
+               since: int | None, until: int | None, limit: int) -> list:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            postings = [self.postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = postings[0].keys()
+            for posting in postings[1:]:
+                candidates = candidates & posting.keys()
+
+            n_docs = len(self.docs)
+            avg_length = self.total_length / n_docs if n_docs else 1.0
+            idf = [math.log(1 + (n_docs - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+            k1, b = self.K1, self.B
+            docs = self.docs
+            scored = []
+            for key in candidates:
+                doc = docs[key]
+                if types and doc.type not in types:
+                    continue
+                if delegate_keys and doc.delegate_keys.isdisjoint(delegate_keys):
+                    continue
+                if since is not None and doc.created_at < since:
+                    continue
+                if until is not None and doc.created_at > until:
+                    continue
+                norm = k1 * (1 - b + b * doc.length / avg_length)
+                score = 0.0
+                for weight, posting in zip(idf, postings):
+                    tf = posting[key]
+                    score += weight * tf * (k1 + 1) / (tf + norm)
+                scored.append((score, doc.created_at, doc))
+
+        scored = heapq.nlargest(limit, scored, key=lambda entry: (entry[0], entry[1]))
+        matched = set(terms)
+        return [
+            SearchHit(doc.kind, doc.id, doc.delegate_id, doc.type, doc.title, doc.created_at,
+                      round(score, 4), _snippet(doc.body, matched))
+            for score, _, doc in scored
+        ]
+
+class InMemorySearch:
+    def __init__(self):
+        self._indexes: dict[int, CommitteeIndex] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, db: Session, committee_id: int) -> CommitteeIndex:
+        index = self._indexes.get(committee_id)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(committee_id)
+                building = index is None
+                if building:
+                    # Registered before loading, so inserts made meanwhile land in it too
+                    index = self._indexes[committee_id] = CommitteeIndex()
+            if building:
+                try:
+                    self._load(db, committee_id, index)
+                except Exception:
+                    self._indexes.pop(committee_id, None)
+                    raise
+                finally:
+                    index.ready.set()
+        index.ready.wait()
+        return index
+
+    @staticmethod
+    def _load(db: Session, committee_id: int, index: CommitteeIndex):
+        for v in db.query(models.Verbatim).filter(models.Verbatim.committee_id == committee_id):
+            index.add(SearchDoc.from_verbatim(v))
+        for r in db.query(models.Resolution).filter(models.Resolution.committee_id == committee_id):
+            index.add(SearchDoc.from_resolution(r))
+
+    def add(self, doc: SearchDoc, committee_id: int):
+        index = self._indexes.get(committee_id)
+        if index is not None:
+            index.add(doc)
+
+    def search(self, db: Session, committee_id: int, query: str, delegate_keys: set | None = None,
+               types: set | None = None, since: int | None = None, until: int | None = None, limit: int = 20) -> list:
+        return self._index(db, committee_id).search(query, delegate_keys, types, since, until, limit)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+# Expressions must match the GIN indexes in migrations.py for the planner to use them
+VERBATIM_TSVECTOR = "to_tsvector('english', coalesce(topic, '') || ' ' || coalesce(text, ''))"
+RESOLUTION_TSVECTOR = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(text, ''))"
+
+class PostgresSearch:
+    def add(self, doc: SearchDoc, committee_id: int):
+        pass  # the database indexes rows as they are written
+
+    def search(self, db: Session, committee_id: int, query: str, delegate_keys: set | None = None,
+               types: set | None = None, since: int | None = None, until: int | None = None, limit: int = 20) -> list:
+        params = {"query": query, "committee_id": committee_id, "limit": limit}
+        shared = "committee_id = :committee_id"
+        if since is not None:
+            shared += " AND created_at >= :since"
+            params["since"] = since
+        if until is not None:
+            shared += " AND created_at <= :until"
+            params["until"] = until
+
+        verbatim_filter = shared
+        resolution_filter = shared
+        if delegate_keys:
+            params["delegate_keys"] = list(delegate_keys)
+            verbatim_filter += " AND delegate_id = ANY(:delegate_keys)"
+            resolution_filter += " AND (uploaded_by = ANY(:delegate_keys) OR CAST(authors AS jsonb) ?| :delegate_keys)"
+
+        selects = []
+        verbatim_types = (types or set()) - {RESOLUTION_TYPE}
+        if not types or verbatim_types:
+            if verbatim_types:
+                params["types"] = list(verbatim_types)
+                verbatim_filter += " AND type = ANY(:types)"
+            selects.append(f"""
+                SELECT 'verbatim' AS kind, id, delegate_id, type, topic AS title, created_at,
+                       ts_rank({VERBATIM_TSVECTOR}, q) AS score, text AS body
+                FROM verbatims, websearch_to_tsquery('english', :query) q
+                WHERE {verbatim_filter} AND {VERBATIM_TSVECTOR} @@ q""")
+        if not types or RESOLUTION_TYPE in types:
+            selects.append(f"""
+                SELECT 'resolution' AS kind, id, uploaded_by AS delegate_id, 'resolution' AS type, title, created_at,
+                       ts_rank({RESOLUTION_TSVECTOR}, q) AS score, text AS body
+                FROM resolutions, websearch_to_tsquery('english', :query) q
+                WHERE {resolution_filter} AND {RESOLUTION_TSVECTOR} @@ q""")
+        if not selects:
+            return []
+
+        rows = db.execute(sql_text(
+            " UNION ALL ".join(selects) + " ORDER BY score DESC, created_at DESC LIMIT :limit"
+        ), params).all()
+        matched = set(tokenize(query))
+        return [
+            SearchHit(row.kind, row.id, row.delegate_id, row.type, row.title, row.created_at,
+                      round(float(row.score), 4), _snippet(row.body, matched))
+            for row in rows
+        ]
+
+    def clear(self):
+        pass
+
+def create_search(name: str = SEARCH_BACKEND):
+    if name == "memory":
+        return InMemorySearch()
+    if name == "postgres":
+        return PostgresSearch()
+    raise ValueError(f"Unknown SEARCH_BACKEND '{name}'. Use memory or postgres.")
+
+search_index = create_search()
@@ -0,0 +1,110 @@
+"""Fast JSON for list responses built from trusted ORM rows.
+
+With response_model=List[Schema], FastAPI validates every row back into a
+Pydantic model (from_attributes) and only then encodes it. For rows we just
+read from our own database that validation is redundant. A RowSerializer
+is compiled once per schema: it knows the schema's field names, reads them
+off each row and hands plain dicts to orjson (or the standard json module
+when orjson is not installed).
+
+Loaded column values are read straight from the instance __dict__ with one
+itemgetter call, which skips SQLAlchemy's attribute instrumentation.
+Properties (Motion.votes) and expired attributes still go through getattr.
+
+Routes keep their response_model so the OpenAPI docs are unchanged; they
+return rows_response(...) / delta_response(...) instead of the rows.
+"""
+import json
+import operator
+import typing
+from functools import lru_cache
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+def _model_of(annotation):
+    """The BaseModel inside a field annotation (Votes, Optional[Votes]), if any."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        model = _model_of(arg)
+        if model is not None:
+            return model
+    return None
+
+class RowSerializer:
+    def __init__(self, schema: type[BaseModel]):
+        fields = schema.model_fields
+        self.fields = tuple(fields)
+        self._plans: dict[type, tuple] = {}
+        self._defaults = {name: field.get_default(call_default_factory=True) for name, field in fields.items()}
+        self._nested = {
+            name: serializer_for(model)
+            for name, field in fields.items()
+            if (model := _model_of(field.annotation)) is not None
+        }
+
+    def _plan(self, cls: type) -> tuple:
+        """Splits the fields into stored values and properties, once per row class."""
+        plan = self._plans.get(cls)
+        if plan is None:
+            computed = tuple(name for name in self.fields if isinstance(getattr(cls, name, None), property))
+            stored = tuple(name for name in self.fields if name not in computed)
+            # itemgetter with several keys returns a tuple; make one key do the same
+            get_stored = operator.itemgetter(*stored, *stored[:1]) if len(stored) == 1 else operator.itemgetter(*stored)
+            plan = self._plans[cls] = (stored, get_stored, computed)
+        return plan
+
+    def to_dict(self, row) -> dict:
+        if isinstance(row, dict):
+            return self._finish({name: row.get(name, self._defaults[name]) for name in self.fields})
+
+        stored, get_stored, computed = self._plan(type(row))
+        try:
+            item = dict(zip(stored, get_stored(row.__dict__)))
+        except KeyError:
+            # Expired or unset attributes load (or take the schema default) as validation would
+            item = {name: getattr(row, name, self._defaults[name]) for name in stored}
+        for name in computed:
+            item[name] = getattr(row, name)
+        return self._finish(item)
+
+    def _finish(self, item: dict) -> dict:
+        for name, nested in self._nested.items():
+            value = item[name]
+            if isinstance(value, BaseModel):
+                item[name] = value.model_dump()
+            elif value is not None:
+                item[name] = nested.to_dict(value)
+        return item
+
+    def to_list(self, rows) -> list:
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+@lru_cache(maxsize=None)
+def serializer_for(schema: type[BaseModel]) -> RowSerializer:
+    return RowSerializer(schema)
+
+def rows_response(rows, schema: type[BaseModel], response: Response | None = None) -> Response:
+    """Pass the route's injected response to keep headers set on it (X-Next-Cursor, ETag)."""
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=dumps(serializer_for(schema).to_list(rows)), media_type="application/json", headers=headers)
+
+def delta_response(items, cursor: int, schema: type[BaseModel], response: Response | None = None) -> Response:
+    """The {"items": [...], "cursor": n} shape of the ?since= delta routes."""
+    headers = dict(response.headers) if response is not None else None
+    return Response(
+        content=dumps({"items": serializer_for(schema).to_list(items), "cursor": cursor}),
+        media_type="application/json",
+        headers=headers
+    )
@@ -0,0 +1,173 @@
+"""Signed session tokens and the in-memory principal cache.
+
+/api/auth/login issues a token of the form <payload>.<signature>: the payload
+is base64url JSON naming who logged in, the signature an HMAC-SHA256 over it
+with SESSION_SECRET. Checking a token needs no database; resolved principals
+are kept in an LRU so repeat requests skip even the HMAC.
+
+Revocation (logout, password change) is in-memory and per process. Set
+SESSION_SECRET explicitly when running several workers or when tokens should
+survive a restart; otherwise a random secret is generated at startup.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Depends, Header, HTTPException
+from .models import DEFAULT_COMMITTEE_ID
+
+SESSION_SECRET = os.getenv("SESSION_SECRET") or secrets.token_hex(32)
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(12 * 3600)))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+# Honour the legacy X-Role header / ?role= for clients that don't send a token yet
+TRUST_ROLE_HEADER = os.getenv("TRUST_ROLE_HEADER", "off") == "on"
+
+ADMIN_ROLES = ('chair', 'vice-chair')
+
+class Principal:
+    """Who a token belongs to."""
+    __slots__ = ("kind", "subject", "role", "name", "committee_id", "token_id", "issued_at", "expires_at")
+
+    def __init__(self, kind, subject, role, name, committee_id, token_id, issued_at, expires_at):
+        self.kind = kind              # 'admin' or 'delegate'
+        self.subject = subject        # Admin or Delegate id
+        self.role = role              # 'chair', 'vice-chair' or 'delegate'
+        self.name = name              # Admin name, or the delegate's country
+        self.committee_id = committee_id
+        self.token_id = token_id
+        self.issued_at = issued_at
+        self.expires_at = expires_at
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role in ADMIN_ROLES
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(SESSION_SECRET.encode(), payload.encode(), hashlib.sha256).digest())
+
+def issue_token(kind: str, subject: str, role: str, name: str, committee_id: int) -> str:
+    # Sub-second iat so a login right after revoke_subject() isn't caught by it
+    now = time.time()
+    payload = _b64encode(json.dumps({
+        "k": kind, "sub": subject, "r": role, "n": name, "c": committee_id,
+        "jti": secrets.token_hex(8), "iat": now, "exp": int(now) + SESSION_TTL,
+    }, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+def decode_token(token: str) -> Principal | None:
+    """Verifies signature and expiry. Returns None for anything invalid."""
+    payload, _, signature = token.partition(".")
+    if not signature or not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+    if claims["exp"] <= time.time():
+        return None
+    return Principal(claims["k"], claims["sub"], claims["r"], claims["n"], claims["c"], claims["jti"], claims["iat"], claims["exp"])
+
+class PrincipalCache:
+    """LRU of token -> Principal with a TTL, plus revocation lists."""
+
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._revoked: dict[str, float] = {}                 # token id -> token expiry
+        self._not_before: dict[tuple[str, str], float] = {}  # (kind, subject) -> revoked at
+        self._lock = threading.Lock()
+
+    def resolve(self, token: str | None) -> Principal | None:
+        if not token:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                principal, cached_until = entry
+                if cached_until > now:
+                    self._entries.move_to_end(token)
+                    return principal
+                del self._entries[token]
+
+        principal = decode_token(token)
+        if principal is None or self._is_revoked(principal):
+            return None
+        with self._lock:
+            self._entries[token] = (principal, min(now + self.ttl, principal.expires_at))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return principal
+
+    def _is_revoked(self, principal: Principal) -> bool:
+        if principal.token_id in self._revoked:
+            return True
+        revoked_at = self._not_before.get((principal.kind, principal.subject))
+        return revoked_at is not None and principal.issued_at <= revoked_at
+
+    def revoke(self, token: str):
+        """Logs out one token."""
+        principal = decode_token(token)
+        if principal is None:
+            return
+        with self._lock:
+            now = time.time()
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._revoked[principal.token_id] = principal.expires_at
+            self._entries.pop(token, None)
+
+    def revoke_subject(self, kind: str, subject: str):
+        """Invalidates every token issued so far to one admin or delegate."""
+        with self._lock:
+            self._not_before[(kind, subject)] = time.time()
+            for token, (principal, _) in list(self._entries.items()):
+                if principal.kind == kind and principal.subject == subject:
+                    del self._entries[token]
+
+principal_cache = PrincipalCache()
+
+def bearer_token(authorization: str | None) -> str | None:
+    if authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return None
+
+# -- Dependencies --
+async def current_principal(authorization: str = Header(None)) -> Principal | None:
+    return principal_cache.resolve(bearer_token(authorization))
+
+def is_admin_for(principal: Principal | None, committee_id: int, x_role: str | None = None) -> bool:
+    """Admin view of a committee: an admin token for it, or X-Role where still trusted."""
+    if principal is not None:
+        return principal.is_admin and principal.committee_id == committee_id
+    return TRUST_ROLE_HEADER and x_role in ADMIN_ROLES
+
+async def require_admin(
+    committee_id: int = DEFAULT_COMMITTEE_ID,
+    x_role: str | None = Header(None),
+    principal: Principal | None = Depends(current_principal)
+):
+    """Route dependency for chair-only writes: 403 unless is_admin_for the committee."""
+    if not is_admin_for(principal, committee_id, x_role):
+        raise HTTPException(status_code=403, detail="Only the chair or vice-chair can do this")
+
+def view_of(principal: Principal | None, committee_id: int, x_role: str | None = None) -> str:
+    """'admin', 'delegate-<hash of id>' for a delegate token of this committee, else 'public'."""
+    if is_admin_for(principal, committee_id, x_role):
+        return "admin"
+    if principal is not None and principal.kind == "delegate" and principal.committee_id == committee_id:
+        return "delegate-" + hashlib.blake2s(principal.subject.encode(), digest_size=8).hexdigest()
+    return "public"
@@ -0,0 +1,23 @@
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .committee_cache import committee_cache
+from .database import get_db, get_async_db
+from .models import DEFAULT_COMMITTEE_ID
+
+def committee_scope(committee_id: int = DEFAULT_COMMITTEE_ID, db: Session = Depends(get_db)) -> int:
+    """The committee a request operates on.
+
+    Routers are mounted under /api/committees/{committee_id}, which fills this
+    from the path, and under the legacy /api prefix, which falls back to the
+    default committee.
+    """
+    if not committee_cache.exists(db, committee_id):
+        raise HTTPException(status_code=404, detail="Committee not found")
+    return committee_id
+
+async def committee_scope_async(committee_id: int = DEFAULT_COMMITTEE_ID, db: AsyncSession = Depends(get_async_db)) -> int:
+    """committee_scope for routes on the async session."""
+    if not await db.run_sync(committee_cache.exists, committee_id):
+        raise HTTPException(status_code=404, detail="Committee not found")
+    return committee_id
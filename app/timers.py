@@ -0,0 +1,80 @@
+"""Server-side countdown timers.
+
+Timer changes go through crud.apply_timer_op, which stamps them with the
+server clock. The route then hands the new state to the scheduler, which
+broadcasts it as TIMER_UPDATE and keeps one asyncio task per running timer.
+When a timer runs out, its task stops it and broadcasts the "expired" event,
+so expiry no longer depends on any client's clock or on a tab being open.
+
+Clients render the countdown from timer_seconds and last_started_at, using
+the offset they measure against GET /api/clock.
+
+Only the worker that started a timer holds its task. If several workers
+resume the same timer after a restart, crud.expire_timer lets only one of
+them end it.
+"""
+import asyncio
+import logging
+from . import crud, models
+from .database import AsyncSessionLocal, SessionLocal
+from .ws import manager
+
+logger = logging.getLogger(__name__)
+
+TIMER_FIELDS = ("timer_seconds", "timer_running", "timer_total", "last_started_at")
+
+def timer_message(state: models.CommitteeState, event: str) -> dict:
+    data = {field: getattr(state, field) for field in TIMER_FIELDS}
+    data.update(event=event, server_time=crud.now_ms())
+    return {"type": "TIMER_UPDATE", "data": data}
+
+class TimerScheduler:
+    def __init__(self):
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    async def start(self):
+        """Picks up timers that were running when the process last stopped."""
+        db = SessionLocal()
+        try:
+            running = db.query(models.CommitteeState).filter(models.CommitteeState.timer_running.is_(True)).all()
+            for state in running:
+                self._schedule(state.id, state)
+        finally:
+            db.close()
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def publish(self, committee_id: int, state: models.CommitteeState, event: str):
+        """(Re)schedules the committee's timer from its new state and tells every client."""
+        self._schedule(committee_id, state)
+        await manager.broadcast(timer_message(state, event), committee_id)
+
+    def _schedule(self, committee_id: int, state: models.CommitteeState):
+        task = self._tasks.pop(committee_id, None)
+        if task is not None:
+            task.cancel()
+        if state.timer_running and state.last_started_at:
+            deadline = state.last_started_at + state.timer_seconds * 1000
+            self._tasks[committee_id] = asyncio.create_task(
+                self._expire_at(committee_id, state.last_started_at, deadline)
+            )
+
+    async def _expire_at(self, committee_id: int, started_at: int, deadline: int):
+        await asyncio.sleep(max(0, deadline - crud.now_ms()) / 1000)
+        if self._tasks.get(committee_id) is asyncio.current_task():
+            del self._tasks[committee_id]
+        try:
+            async with AsyncSessionLocal() as db:
+                state = await db.run_sync(crud.expire_timer, started_at, committee_id)
+        except Exception:
+            logger.exception("Could not expire timer for committee %s", committee_id)
+            return
+        if state is not None:
+            await manager.broadcast(timer_message(state, "expired"), committee_id)
+
+scheduler = TimerScheduler()
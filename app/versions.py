@@ -0,0 +1,122 @@
+"""Per-committee table versions for conditional GETs.
+
+Every crud write bumps a counter for the tables it changed, after its commit.
+A GET route declares which tables its body depends on; its weak ETag is
+built from those counters (plus the admin/public view where that matters),
+so a client that re-fetches after a *_REFRESH broadcast gets a bodiless 304
+unless something it reads actually changed. The check runs before the route
+opens the database.
+
+The same tags key the pre-serialized bodies in response_cache.py, which
+drops entries as soon as one of their tables is bumped.
+
+Tags carry a per-process epoch, so counters that restart from zero (a new
+process, or the reset endpoint) never match a tag handed out earlier.
+
+The counters only see writes made by this process, so like the committee
+cache CONDITIONAL_GET defaults to off when BROADCAST_BACKEND spans several
+workers. Routes then answer every request in full and send no ETag.
+"""
+import os
+import secrets
+import threading
+from typing import NamedTuple
+from fastapi import Depends, Header, HTTPException, Response
+from .models import DEFAULT_COMMITTEE_ID
+from .sessions import Principal, current_principal, is_admin_for, view_of
+
+CONDITIONAL_GET = os.getenv(
+    "CONDITIONAL_GET",
+    "on" if os.getenv("BROADCAST_BACKEND", "memory") == "memory" else "off"
+) == "on"
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored on both sides."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+class Version(NamedTuple):
+    """What a GET route's ETag was built from."""
+    committee_id: int
+    tables: tuple
+    variant: str
+    etag: str
+
+class TableVersions:
+    def __init__(self, enabled: bool = CONDITIONAL_GET):
+        self.enabled = enabled
+        self._versions: dict[tuple[int, str], int] = {}
+        self._listeners: list = []
+        self._lock = threading.Lock()
+        self._epoch = secrets.token_hex(4)
+
+    def subscribe(self, listener):
+        """listener(committee_id, tables) runs after every bump."""
+        self._listeners.append(listener)
+
+    def bump(self, committee_id: int, *tables: str):
+        """Call after the change is committed (or applied to the committee cache)."""
+        with self._lock:
+            for table in tables:
+                key = (committee_id, table)
+                self._versions[key] = self._versions.get(key, 0) + 1
+        for listener in self._listeners:
+            listener(committee_id, tables)
+
+    def get(self, committee_id: int, table: str) -> int:
+        return self._versions.get((committee_id, table), 0)
+
+    def etag(self, committee_id: int, tables: tuple, variant: str = "") -> str:
+        versions = ".".join(str(self.get(committee_id, table)) for table in tables)
+        suffix = f"-{variant}" if variant else ""
+        return f'W/"{self._epoch}-{committee_id}-{versions}{suffix}"'
+
+    def is_current(self, version: Version) -> bool:
+        """False once any of its tables has been bumped since it was taken."""
+        return self.etag(version.committee_id, version.tables, version.variant) == version.etag
+
+    def reset(self):
+        """Forgets every counter; tags issued before are never matched again."""
+        with self._lock:
+            self._versions.clear()
+            self._epoch = secrets.token_hex(4)
+
+table_versions = TableVersions()
+
+def conditional_get(*tables: str, by_role: bool = False, by_viewer: bool = False):
+    """Route dependency: 304 while the client's ETag for these tables is current.
+
+    by_role adds the admin/public view to the tag for routes that strip
+    fields for non-admins; by_viewer also tells delegates apart (view_of),
+    for bodies that include a delegate's private rows. Otherwise the tag is set on the injected response;
+    routes that build their own Response copy it from there. Returns the
+    Version (None while CONDITIONAL_GET is off) for response_cache.
+    """
+    async def check(
+        response: Response,
+        committee_id: int = DEFAULT_COMMITTEE_ID,
+        if_none_match: str | None = Header(None),
+        x_role: str | None = Header(None),
+        principal: Principal | None = Depends(current_principal)
+    ) -> Version | None:
+        if not table_versions.enabled:
+            return None
+        variant = ""
+        if by_viewer:
+            variant = view_of(principal, committee_id, x_role)
+        elif by_role:
+            variant = "admin" if is_admin_for(principal, committee_id, x_role) else "public"
+        if variant:
+            response.headers["Vary"] = "Authorization, X-Role"
+        etag = table_versions.etag(committee_id, tables, variant)
+        response.headers["ETag"] = etag
+        # Caches may keep the body but must ask before reusing it
+        response.headers["Cache-Control"] = "no-cache"
+        if etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=dict(response.headers))
+        return Version(committee_id, tables, variant, etag)
+    return check
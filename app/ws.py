@@ -1,27 +1,226 @@
+import asyncio
+import json
+import os
+import time
+from itertools import count
 from fastapi import WebSocket
+from .models import DEFAULT_COMMITTEE_ID
+
+# Messages a single socket may have waiting before it is treated as too slow
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+
+# 1013 "Try Again Later": the client reconnects and resyncs, as on any drop
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+_connection_ids = count(1)
+
+DEFAULT_COMMITTEE = DEFAULT_COMMITTEE_ID
+ADMIN_ROLES = ('chair', 'vice-chair')
+
+# -- Topics --
+# Every socket subscribes to its committee's "all" topic, its role group and,
+# for delegates, one topic per identifier they are addressed by (id, country).
+def topic_all(committee: int) -> str:
+    return f"{committee}/all"
+
+def topic_role(committee: int, role: str | None) -> str:
+    return f"{committee}/role/{'admin' if role in ADMIN_ROLES else 'delegate'}"
+
+def topic_delegate(committee: int, key: str) -> str:
+    return f"{committee}/delegate/{key}"
+
+class Subscription:
+    def __init__(self, committee: int = DEFAULT_COMMITTEE, role: str | None = None, delegate_keys=()):
+        self.committee = committee or DEFAULT_COMMITTEE
+        self.role = role
+        self.delegate_keys = {key for key in delegate_keys if key}
+
+    def topics(self) -> set:
+        topics = {topic_all(self.committee), topic_role(self.committee, self.role)}
+        if self.role not in ADMIN_ROLES:
+            topics.update(topic_delegate(self.committee, key) for key in self.delegate_keys)
+        return topics
+
+def _private(committee: int, *delegate_keys) -> set | None:
+    """Admins plus the named delegates; None (everyone) if no delegate is named."""
+    keys = [key for key in delegate_keys if key]
+    if not keys:
+        return None
+    return {topic_role(committee, 'chair')} | {topic_delegate(committee, key) for key in keys}
+
+def route_topics(message: dict, committee: int = DEFAULT_COMMITTEE) -> set:
+    """Which topics an event goes to. Anything not listed here is committee-wide."""
+    msg_type = message.get("type") if isinstance(message, dict) else None
+    data = message.get("data") if isinstance(message, dict) else None
+    data = data if isinstance(data, dict) else {}
+
+    topics = None
+    if msg_type in ("CHIT_UPDATE", "CHIT_EB_UPDATE"):
+        # Chits are addressed by country; only the EB and the two parties see them
+        topics = _private(committee, data.get("from_delegate"), data.get("to_delegate"))
+    elif msg_type == "SCORE_UPDATE":
+        topics = _private(committee, data.get("delegateId"))
+    return topics or {topic_all(committee)}
+
+# -- Client events --
+# What a socket may relay to the rest of its committee; anything else it sends
+# is dropped. route_topics still decides who receives each relayed event.
+DELEGATE_EVENTS = frozenset({
+    "POINT_RAISED", "MOTION_UPDATE", "CHIT_UPDATE", "ACTIVITY_UPDATE",
+    "VERBATIM_UPDATE", "VERBATIM_PERMS_UPDATE", "RESOLUTION_UPLOADED",
+})
+ADMIN_EVENTS = DELEGATE_EVENTS | {
+    "POINT_DISMISSED", "ANNOUNCEMENT_UPDATE", "COMMITTEE_INFO_UPDATE", "PHASE_UPDATE",
+    "FLOOR_UPDATE", "MOTIONS_FLOOR_UPDATE", "MOTION_STATUS_UPDATE", "SPEAKER_UPDATE",
+    "SPEECH_FINISHED", "YIELD_UPDATE", "CAUCUS_SESSION_UPDATE", "CAUCUS_FLOOR_UPDATE",
+    "CAUCUS_SPEAKER_UPDATE", "VOTING_SESSION_UPDATE", "CHIT_EB_UPDATE", "SCORE_UPDATE",
+    "RESOLUTION_REVIEWED",
+}
+
+def may_relay(role: str | None, message) -> bool:
+    msg_type = message.get("type") if isinstance(message, dict) else None
+    if role in ADMIN_ROLES:
+        return msg_type in ADMIN_EVENTS
+    return role == "delegate" and msg_type in DELEGATE_EVENTS
+
+class Connection:
+    """One socket with its own bounded outbound queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int, subscription: Subscription):
+        self.id = next(_connection_ids)
+        self.websocket = websocket
+        self.subscription = subscription
+        self.topics = subscription.topics()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task | None = None
+        self.connected_at = time.time()
+        self.sent = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "id": self.id,
+            "role": self.subscription.role,
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "lag_ms_last": round(self.last_lag * 1000, 2),
+            "lag_ms_max": round(self.max_lag * 1000, 2),
+            "connected_for_s": round(time.time() - self.connected_at, 1),
+        }
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
+    def __init__(self, queue_size: int = SEND_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.connections: dict[WebSocket, Connection] = {}
+        self.by_topic: dict[str, set[Connection]] = {}
+        self.evicted = 0
+        self.backend = None
+
+    # -- Cross-worker transport (see pubsub.py) --
+    async def start(self, backend):
+        await backend.start(self._on_published)
+        self.backend = backend
+
+    async def stop(self):
+        backend, self.backend = self.backend, None
+        if backend is not None:
+            await backend.stop()
+
+    async def _on_published(self, payload: str):
+        envelope = json.loads(payload)
+        self._deliver(envelope["topics"], envelope["text"])
+
+    @property
+    def active_connections(self) -> list[WebSocket]:
+        return list(self.connections.keys())
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, subscription: Subscription | None = None):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = Connection(websocket, self.queue_size, subscription or Subscription())
+        connection.writer = asyncio.create_task(self._write_loop(connection))
+        self.connections[websocket] = connection
+        for topic in connection.topics:
+            self.by_topic.setdefault(topic, set()).add(connection)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        connection = self.connections.pop(websocket, None)
+        if not connection:
+            return
+        for topic in connection.topics:
+            subscribers = self.by_topic.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self.by_topic[topic]
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
 
-    async def broadcast(self, message: dict):
-        dead_connections = []
-        for connection in self.active_connections:
+    def subscribers(self, topics) -> set:
+        targets = set()
+        for topic in topics:
+            targets |= self.by_topic.get(topic, set())
+        return targets
+
+    async def broadcast(self, message: dict, committee: int = DEFAULT_COMMITTEE, topics=None):
+        """Publishes to every worker; each delivers to its sockets subscribed to the event's topics."""
+        if topics is None:
+            topics = route_topics(message, committee)
+
+        # Serialize once, compactly; each socket's writer task does the actual sending
+        text = json.dumps(message, separators=(",", ":"))
+        if self.backend is None or self.backend.local:
+            # Single worker: no envelope to encode and parse back
+            self._deliver(topics, text)
+        else:
+            await self.backend.publish(json.dumps({"topics": sorted(topics), "text": text}, separators=(",", ":")))
+
+    def _deliver(self, topics, text: str):
+        targets = self.subscribers(topics)
+        enqueued_at = time.monotonic()
+        for connection in targets:
             try:
-                await connection.send_json(message)
-            except:
-                dead_connections.append(connection)
-        
-        # Clean up dead connections
-        for dead in dead_connections:
-            self.disconnect(dead)
+                connection.queue.put_nowait((text, enqueued_at))
+            except asyncio.QueueFull:
+                self._evict(connection)
+
+    def stats(self) -> dict:
+        connections = [c.stats() for c in self.connections.values()]
+        return {
+            "connections": len(connections),
+            "topics": {topic: len(subscribers) for topic, subscribers in self.by_topic.items()},
+            "evicted": self.evicted,
+            "max_queued": max((c["queued"] for c in connections), default=0),
+            "max_lag_ms": max((c["lag_ms_max"] for c in connections), default=0.0),
+            "per_connection": connections,
+        }
+
+    async def _write_loop(self, connection: Connection):
+        websocket = connection.websocket
+        try:
+            while True:
+                text, enqueued_at = await connection.queue.get()
+                await websocket.send_text(text)
+                lag = time.monotonic() - enqueued_at
+                connection.sent += 1
+                connection.last_lag = lag
+                connection.max_lag = max(connection.max_lag, lag)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Dead socket: drop it so broadcasts stop queueing for it
+            self.disconnect(websocket)
+
+    def _evict(self, connection: Connection):
+        """Drops a consumer whose queue overflowed instead of stalling everyone else."""
+        self.evicted += 1
+        self.disconnect(connection.websocket)
+        asyncio.create_task(self._close(connection.websocket, SLOW_CONSUMER_CLOSE_CODE))
+
+    async def _close(self, websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
 
 manager = ConnectionManager()
\ No newline at end of file
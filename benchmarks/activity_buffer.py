@@ -0,0 +1,131 @@
+"""Activity log insert throughput, one commit per entry vs group commit.
+
+For each mode this posts --entries activity lines through
+crud.create_activity_log from --threads threads (as the threadpool would)
+on a throwaway SQLite database (or --database-url), and reports:
+
+    direct     the buffer off: every entry is its own INSERT and commit
+               (how create_activity_log worked before)
+    buffered   the flusher on: entries are queued and written in batches
+
+Each run ends once every entry is committed, so the buffered time includes
+the last flush. Alongside inserts per second it reports the commits issued
+while inserting, and the median time of a full activity read taken while
+entries are still queued, with the commits that read issued (always 0: reads
+merge the queue in rather than flushing it).
+
+Usage (from the repository root):
+    python -m benchmarks.activity_buffer [--entries 5000] [--threads 8] [--runs 3]
+        [--database-url postgresql://...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.list_endpoints import timed
+
+COMMITTEE_ID = 1
+
+def insert_all(crud, schemas, SessionLocal, entries: int, threads: int, prefix: str):
+    def work(worker: int):
+        db = SessionLocal()
+        try:
+            for i in range(worker, entries, threads):
+                entry = schemas.ActivityEntryCreate(id=f"{prefix}-{i}", type="motion", description="Motion to open debate passed",
+                                                    actor="Chair", timestamp="10:00 AM")
+                crud.create_activity_log(db, entry, committee_id=COMMITTEE_ID)
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="digimun-bench-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["ACTIVITY_BUFFER"] = "on"
+    os.chdir(workdir)
+
+    from sqlalchemy import event
+    from app import crud, models, schemas
+    from app.activity_buffer import activity_buffer
+    from app.database import SessionLocal, engine
+    import app.main  # noqa: F401  creates and migrates the tables
+
+    commits = [0]
+    reader_commits = [0]
+    reader = threading.get_ident()
+
+    @event.listens_for(engine, "commit")
+    def count(*_):
+        commits[0] += 1
+        if threading.get_ident() == reader:
+            reader_commits[0] += 1
+
+    def clear():
+        db = SessionLocal()
+        try:
+            db.query(models.ActivityEntry).filter(models.ActivityEntry.committee_id == COMMITTEE_ID).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    print(f"{args.entries} entries from {args.threads} threads, best of {args.runs}")
+    print(f"{'mode':<10}{'inserts/s':>11}{'commits':>9}{'read ms':>9}{'read commits':>14}")
+    results = {}
+    for mode in ("direct", "buffered"):
+        best, best_commits, read_ms, read_commits = 0.0, 0, None, None
+        for run in range(args.runs):
+            clear()
+            if mode == "buffered":
+                activity_buffer.start()
+            commits[0] = 0
+            started = time.perf_counter()
+            insert_all(crud, schemas, SessionLocal, args.entries, args.threads, f"{mode}{run}")
+            elapsed = time.perf_counter() - started
+            if mode == "buffered":
+                # Read while the last window is still queued (not part of the insert time)
+                db = SessionLocal()
+                try:
+                    reader_commits[0] = 0
+                    read_ms = timed(lambda: crud.get_activity_logs(db, committee_id=COMMITTEE_ID), 5)
+                    read_commits = reader_commits[0]
+                finally:
+                    db.close()
+                stopping = time.perf_counter()
+                activity_buffer.stop()
+                elapsed += time.perf_counter() - stopping
+            rate = args.entries / elapsed
+            if rate > best:
+                best, best_commits = rate, commits[0]
+
+        db = SessionLocal()
+        try:
+            stored = db.query(models.ActivityEntry).filter(models.ActivityEntry.committee_id == COMMITTEE_ID).count()
+        finally:
+            db.close()
+        if stored != args.entries:
+            print(f"{mode}: {stored} of {args.entries} entries were stored")
+            return 1
+        results[mode] = best
+        read = f"{read_ms:>9.1f}{read_commits:>14}" if read_ms is not None else f"{'-':>9}{'-':>14}"
+        print(f"{mode:<10}{best:>11.0f}{best_commits:>9}{read}")
+
+    print(f"speedup: {results['buffered'] / results['direct']:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,125 @@
+"""Bytes on the wire and CPU cost of response and WebSocket compression.
+
+HTTP: for the largest payloads (chits, verbatims, the snapshot) this seeds a
+throwaway SQLite database and reports, per Accept-Encoding:
+
+    bytes      body size as sent
+    ratio      identity bytes / bytes
+    comp ms    compress() alone on that body
+    req cpu    process CPU per full GET through the app, compressing every time
+    hit cpu    the same with the body already in the compressed-body LRU
+
+WebSocket: a recorded mix of broadcast events is run through the same
+permessage-deflate settings uvicorn negotiates (12-bit window, memLevel 5)
+and reports frame bytes, including the frame header, and CPU per frame. It
+compares a per-connection context ("takeover", what clients get) with
+compressing every frame on its own ("no takeover"). Only the latter could
+be shared between connections, and then only by a server able to send
+pre-compressed frames.
+
+Usage (from the repository root):
+    python -m benchmarks.compression [--rows 1000] [--runs 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.list_endpoints import seed
+
+def cpu_per_call(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.process_time()
+        fn()
+        samples.append((time.process_time() - start) * 1000)
+    return statistics.median(samples)
+
+def broadcast_mix(n: int) -> list:
+    """Roughly what a committee session sends: timers, votes, chits, activity, lists."""
+    messages = []
+    for i in range(n):
+        kind = i % 5
+        if kind == 0:
+            messages.append({"type": "TIMER_UPDATE", "data": {"timer_seconds": 90 - i % 90, "timer_running": True, "timer_total": 90,
+                                                              "last_started_at": 1792337843084 + i * 1000, "event": "started", "server_time": 1792337843084 + i * 1000}})
+        elif kind == 1:
+            messages.append({"type": "DELEGATE_VOTE_CAST", "data": {"delegateId": f"d{i}", "vote": "for", "motionId": "m12",
+                                                                    "tally": {"votes_for": i, "votes_against": 3, "votes_abstain": 1}}})
+        elif kind == 2:
+            messages.append({"type": "CHIT_UPDATE", "data": {"id": f"c{i}", "from_delegate": "France", "to_delegate": "Chile",
+                                                             "message": "Would the delegate yield to a point of information on clause 3?", "timestamp": "10:42 AM"}})
+        elif kind == 3:
+            messages.append({"type": "ACTIVITY_REFRESH", "data": {"id": f"a{i}", "type": "speech", "description": "Recognized to speak on the GSL", "actor": "Brazil"}})
+        else:
+            messages.append({"type": "COMMITTEE_LIST_OP", "data": {"list": "speakers", "op": "append", "item": f"Country {i}", "version": i}})
+    return messages
+
+def frame_bytes(payload: int) -> int:
+    """Server frames are unmasked: 2 header bytes, plus 2 or 8 for longer payloads."""
+    return payload + 2 + (2 if payload >= 126 else 0) + (6 if payload >= 65536 else 0)
+
+def websocket_report(runs: int):
+    from websockets.extensions.permessage_deflate import PerMessageDeflate
+    from websockets.frames import Frame, Opcode
+
+    texts = [json.dumps(m, separators=(",", ":")).encode() for m in broadcast_mix(500)]
+    raw = sum(frame_bytes(len(t)) for t in texts)
+    print(f"\n{'websocket (500 events)':<26}{'bytes':>10}{'ratio':>8}{'us/frame':>10}")
+    print(f"{'uncompressed':<26}{raw:>10}{1.0:>8.1f}{'':>10}")
+    for label, no_takeover in (("deflate, takeover", False), ("deflate, no takeover", True)):
+        def encode_all():
+            extension = PerMessageDeflate(no_takeover, no_takeover, 12, 12, {"memLevel": 5})
+            return sum(frame_bytes(len(extension.encode(Frame(Opcode.TEXT, t)).data)) for t in texts)
+        sent = encode_all()
+        cpu = cpu_per_call(encode_all, runs) * 1000 / len(texts)
+        print(f"{label:<26}{sent:>10}{raw / sent:>8.1f}{cpu:>10.1f}")
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="digimun-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from app import compression, models
+    from app.database import SessionLocal
+    from app.main import app
+
+    db = SessionLocal()
+    try:
+        seed(db, models, args.rows)
+    finally:
+        db.close()
+
+    encodings = ["identity", *reversed(compression.supported_encodings())]
+    print(f"{'endpoint':<22}{'encoding':>9}{'bytes':>10}{'ratio':>8}{'comp ms':>9}{'req cpu':>9}{'hit cpu':>9}")
+    with TestClient(app) as client:
+        for url in ("/api/chits/", "/api/verbatims/", "/api/snapshot/"):
+            body = client.get(url, headers={"Accept-Encoding": "identity"}).content
+            for encoding in encodings:
+                headers = {"Accept-Encoding": encoding}
+                size = len(client.get(url, headers=headers).content) if encoding == "identity" else len(compression.compress(body, encoding))
+                comp = cpu_per_call(lambda: compression.compress(body, encoding), args.runs) if encoding != "identity" else 0.0
+
+                budget = compression.compressed_bodies.max_bytes
+                compression.compressed_bodies.max_bytes = 0
+                compression.compressed_bodies.clear()
+                request = cpu_per_call(lambda: client.get(url, headers=headers).raise_for_status(), args.runs)
+                compression.compressed_bodies.max_bytes = budget
+                client.get(url, headers=headers)
+                hit = cpu_per_call(lambda: client.get(url, headers=headers).raise_for_status(), args.runs)
+                print(f"{url:<22}{encoding:>9}{size:>10}{len(body) / size:>8.1f}{comp:>9.2f}{request:>9.2f}{hit:>9.2f}")
+
+    websocket_report(args.runs)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
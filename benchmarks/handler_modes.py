@@ -0,0 +1,271 @@
+"""Sync vs async handlers for the hot routes at 500 concurrent clients.
+
+The benchmark app below serves the committee state, delegates, chits and
+delegate login twice over, with the same crud calls and serialization:
+
+    /sync/...    def handlers on SessionLocal, run in Starlette's threadpool
+                 (how every router worked before)
+    /async/...   async def handlers on AsyncSession via db.run_sync (how the
+                 committee, delegates, chits and auth routers and the list,
+                 search and snapshot reads work now)
+
+ETags, the response cache and the committee cache are left out so both
+modes do the same database work per request. For each mode the script
+starts uvicorn on a throwaway SQLite database (or --database-url), seeds a
+committee and runs --clients concurrent clients for --duration seconds, each
+looping over a mix of those four requests. It reports per-route p50/p99,
+requests per second and errors, and writes them as JSON with --output.
+
+Usage (from the repository root):
+    python -m benchmarks.handler_modes [--clients 500] [--duration 20] [--processes N]
+        [--database-url postgresql://...] [--output FILE]
+
+Clients are split across --processes load generators (default: one per
+CPU, at most 4). On a machine with few cores, server and generators share
+the CPU, so compare the modes with each other rather than with production.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from benchmarks.loadtest import ROOT, free_port, summarize
+
+DELEGATES = 190
+CHITS = 1000
+PASSWORD = "bench"
+COMMITTEE_ID = 1
+
+# -- Benchmark app (imported by the uvicorn worker) --
+def create_app() -> FastAPI:
+    from app import crud, schemas
+    from app.database import get_async_db, get_db
+    from app.serialization import rows_response, serializer_for
+
+    bench = FastAPI()
+
+    def committee(state):
+        return serializer_for(schemas.CommitteeStateResponse).to_dict(state)
+
+    @bench.get("/sync/committee")
+    def sync_committee(db: Session = Depends(get_db)):
+        return committee(crud.get_committee_state(db, COMMITTEE_ID))
+
+    @bench.get("/async/committee")
+    async def async_committee(db: AsyncSession = Depends(get_async_db)):
+        return committee(await db.run_sync(crud.get_committee_state, COMMITTEE_ID))
+
+    @bench.get("/sync/delegates")
+    def sync_delegates(db: Session = Depends(get_db)):
+        return rows_response(crud.get_delegates(db, COMMITTEE_ID), schemas.DelegatePublicResponse)
+
+    @bench.get("/async/delegates")
+    async def async_delegates(db: AsyncSession = Depends(get_async_db)):
+        return rows_response(await db.run_sync(crud.get_delegates, COMMITTEE_ID), schemas.DelegatePublicResponse)
+
+    @bench.get("/sync/chits")
+    def sync_chits(db: Session = Depends(get_db)):
+        return rows_response(crud.get_chits(db, COMMITTEE_ID), schemas.ChitResponse)
+
+    @bench.get("/async/chits")
+    async def async_chits(db: AsyncSession = Depends(get_async_db)):
+        return rows_response(await db.run_sync(crud.get_chits, COMMITTEE_ID), schemas.ChitResponse)
+
+    @bench.post("/sync/login")
+    def sync_login(request: schemas.LoginRequest, db: Session = Depends(get_db)):
+        delegate = crud.authenticate_delegate(db, request.username, request.password, committee_id=COMMITTEE_ID)
+        if not delegate:
+            raise HTTPException(status_code=401, detail="Invalid country or password")
+        return {"id": delegate.id, "country": delegate.country}
+
+    @bench.post("/async/login")
+    async def async_login(request: schemas.LoginRequest, db: AsyncSession = Depends(get_async_db)):
+        delegate = await db.run_sync(crud.authenticate_delegate, request.username, request.password, committee_id=COMMITTEE_ID)
+        if not delegate:
+            raise HTTPException(status_code=401, detail="Invalid country or password")
+        return {"id": delegate.id, "country": delegate.country}
+
+    return bench
+
+if os.getenv("HANDLER_MODES_SERVER"):
+    app = create_app()
+
+# -- Setup --
+def seed():
+    sys.path.insert(0, ROOT)
+    import app.main  # noqa: F401  creates and migrates the tables
+    from app import models, scoreboard
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.query(models.Delegate).filter(models.Delegate.committee_id == COMMITTEE_ID).delete()
+        db.query(models.Chit).filter(models.Chit.committee_id == COMMITTEE_ID).delete()
+        db.add_all(
+            models.Delegate(id=f"bench-d{i}", committee_id=COMMITTEE_ID, name=f"Delegate {i}", country=f"Country {i}",
+                            password=PASSWORD, scores={"GSL": [7]}, speeches=1)
+            for i in range(DELEGATES)
+        )
+        db.add_all(
+            models.Chit(id=f"bench-c{i}", committee_id=COMMITTEE_ID, from_delegate=f"bench-d{i % DELEGATES}", to_delegate="bench-d0",
+                        message="Would the delegate yield to a point of information?", timestamp="10:00 AM", seq=i + 1)
+            for i in range(CHITS)
+        )
+        db.commit()
+        scoreboard.rebuild(db, COMMITTEE_ID)
+        db.commit()
+    finally:
+        db.close()
+
+def start_server(port: int, env: dict, workdir: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.handler_modes:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--backlog", "4096"],
+        cwd=workdir,
+        env=dict(env, HANDLER_MODES_SERVER="1", PYTHONPATH=ROOT + os.pathsep + env.get("PYTHONPATH", "")),
+    )
+
+# -- Load --
+def requests_for(mode: str, rng: random.Random):
+    """The client mix: mostly state and list reads, some logins."""
+    roll = rng.random()
+    if roll < 0.35:
+        return "GET committee", "GET", f"/{mode}/committee", None
+    if roll < 0.6:
+        return "GET delegates", "GET", f"/{mode}/delegates", None
+    if roll < 0.85:
+        return "GET chits", "GET", f"/{mode}/chits", None
+    country = f"Country {rng.randrange(DELEGATES)}"
+    return "POST login", "POST", f"/{mode}/login", {"role": "delegate", "username": country, "password": PASSWORD}
+
+async def generate(base_url: str, mode: str, clients: int, duration: float, seed: int) -> dict:
+    import httpx
+
+    latencies: dict[str, list] = {}
+    errors: dict[str, int] = {}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        # Everyone starts together, as in a roll call
+        start = asyncio.Event()
+        deadline = None
+
+        async def run_client(i: int):
+            rng = random.Random(seed * 100003 + i)
+            await start.wait()
+            while time.perf_counter() < deadline:
+                route, method, path, body = requests_for(mode, rng)
+                began = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.setdefault(route, []).append((time.perf_counter() - began) * 1000)
+                if not ok:
+                    errors[route] = errors.get(route, 0) + 1
+
+        tasks = [asyncio.create_task(run_client(i)) for i in range(clients)]
+        deadline = time.perf_counter() + duration
+        start.set()
+        await asyncio.gather(*tasks)
+    return {"latencies": latencies, "errors": errors}
+
+def generator_process(args):
+    return asyncio.run(generate(*args))
+
+def run_mode(mode: str, base_url: str, clients: int, duration: float, processes: int) -> dict:
+    shares = [clients // processes + (1 if i < clients % processes else 0) for i in range(processes)]
+    jobs = [(base_url, mode, share, duration, i) for i, share in enumerate(shares) if share]
+    started = time.perf_counter()
+    if len(jobs) == 1:
+        parts = [generator_process(jobs[0])]
+    else:
+        with multiprocessing.Pool(len(jobs)) as pool:
+            parts = pool.map(generator_process, jobs)
+    elapsed = time.perf_counter() - started
+
+    latencies: dict[str, list] = {}
+    errors: dict[str, int] = {}
+    for part in parts:
+        for route, samples in part["latencies"].items():
+            latencies.setdefault(route, []).extend(samples)
+        for route, n in part["errors"].items():
+            errors[route] = errors.get(route, 0) + n
+
+    routes = {route: dict(summarize(samples), rps=round(len(samples) / elapsed, 1), errors=errors.get(route, 0))
+              for route, samples in sorted(latencies.items())}
+    everything = [x for samples in latencies.values() for x in samples]
+    return {"routes": routes, "total": dict(summarize(everything), rps=round(len(everything) / elapsed, 1), errors=sum(errors.values()))}
+
+async def warm_up(base_url: str, mode: str):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if (await client.get(f"/{mode}/committee")).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("Server did not start")
+            await asyncio.sleep(0.2)
+        rng = random.Random(0)
+        for _ in range(50):
+            _, method, path, body = requests_for(mode, rng)
+            await client.request(method, path, json=body)
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="digimun-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, UPLOAD_DIR=os.path.join(workdir, "uploads"))
+    os.environ.update(DATABASE_URL=database_url, UPLOAD_DIR=env["UPLOAD_DIR"])
+    seed()
+
+    results = {}
+    for mode in ("sync", "async"):
+        # A fresh server per mode, so neither inherits the other's pools or threads
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(port, env, workdir)
+        try:
+            asyncio.run(warm_up(base_url, mode))
+            results[mode] = run_mode(mode, base_url, args.clients, args.duration, args.processes)
+        finally:
+            server.terminate()
+            server.wait(timeout=15)
+
+    print(f"{args.clients} clients, {args.duration:g}s per mode, {args.processes} generator process(es), {database_url.split(':', 1)[0]}")
+    print(f"{'route':<16}{'mode':>6}{'count':>8}{'rps':>8}{'p50':>9}{'p99':>9}{'errors':>8}")
+    for route in [*results["sync"]["routes"], "all"]:
+        for mode in ("sync", "async"):
+            r = results[mode]["total"] if route == "all" else results[mode]["routes"].get(route)
+            if r:
+                print(f"{route:<16}{mode:>6}{r['count']:>8}{r['rps']:>8.1f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['errors']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"clients": args.clients, "duration_s": args.duration, "database": database_url.split(":", 1)[0], "modes": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,123 @@
+"""Microbenchmarks for the list endpoints at 100, 1k and 10k rows.
+
+For every list route this seeds a throwaway SQLite database and reports:
+
+    validate   Pydantic from_attributes validation, serialization and json
+               encoding of the rows (what response_model=List[...] did)
+    fast       app.serialization's compiled serializer + orjson
+    request    a full GET through the app, median of the runs
+
+Usage (from the repository root):
+    python -m benchmarks.list_endpoints [--sizes 100,1000,10000] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+def seed(db, models, n: int):
+    from app.crud import now_ms
+
+    now = now_ms()
+    db.query(models.Delegate).delete()
+    db.query(models.DelegateScoreboard).delete()
+    for model in (models.Chit, models.Motion, models.ActivityEntry, models.Announcement, models.Verbatim, models.Resolution):
+        db.query(model).delete()
+    db.add_all(
+        models.Delegate(id=f"d{i}", name=f"Delegate {i}", country=f"Country {i}", password="p",
+                        scores={"gsl_1": 7, "mod_1": 8}, committee_id=1)
+        for i in range(n)
+    )
+    db.add_all(
+        models.Chit(id=f"c{i}", from_delegate=f"d{i}", to_delegate="d0", message="Point of information " * 3,
+                    timestamp="10:00 AM", seq=i + 1, committee_id=1)
+        for i in range(n)
+    )
+    db.add_all(
+        models.Motion(id=f"m{i}", type="mod", proposed_by=f"d{i}", description="Moderated caucus on water security",
+                      timestamp="10:00 AM", total_time=600, speaker_time=60, created_at=now + i, committee_id=1)
+        for i in range(n)
+    )
+    db.add_all(
+        models.ActivityEntry(id=f"a{i}", type="speech", description="Recognized to speak", actor=f"Country {i}",
+                             timestamp="10:00 AM", created_at=now + i, seq=i + 1, committee_id=1)
+        for i in range(n)
+    )
+    db.add_all(
+        models.Announcement(id=f"n{i}", message="Committee resumes in five minutes", timestamp="10:00 AM",
+                            created_at=now + i, seq=i + 1, committee_id=1)
+        for i in range(n)
+    )
+    db.add_all(
+        models.Verbatim(id=f"v{i}", delegate_id=f"d{i}", type="gsl", topic="Water security",
+                        text="The delegation believes " * 20, timestamp="10:00 AM", created_at=now + i, seq=i + 1, committee_id=1)
+        for i in range(n)
+    )
+    db.add_all(
+        models.Resolution(id=f"r{i}", title=f"Draft {i}", file_path=f"uploads/r{i}.pdf", uploaded_by=f"Country {i}",
+                          authors=["Country 1", "Country 2"], signatories=["Country 3"], timestamp="10:00 AM",
+                          created_at=now + i, committee_id=1)
+        for i in range(n)
+    )
+    db.commit()
+
+def timed(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="digimun-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)
+
+    from typing import List
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+    from app import crud, models, schemas
+    from app.database import SessionLocal
+    from app.main import app
+    from app.serialization import dumps, serializer_for
+    from app.sessions import issue_token
+
+    admin = {"Authorization": f"Bearer {issue_token('admin', 'bench', 'chair', 'Bench', 1)}"}
+    endpoints = [
+        ("/api/chits/", schemas.ChitResponse, crud.get_chits, {}),
+        ("/api/delegates/", schemas.DelegateScoreResponse, crud.get_delegates, admin),
+        ("/api/motions/", schemas.MotionResponse, crud.get_motions, {}),
+        ("/api/activity/", schemas.ActivityEntryResponse, crud.get_activity_logs, {}),
+        ("/api/announcements/", schemas.AnnouncementResponse, crud.get_announcements, {}),
+        ("/api/verbatims/", schemas.VerbatimResponse, crud.get_verbatims, {}),
+        ("/api/resolutions/", schemas.ResolutionResponse, crud.get_resolutions, {}),
+    ]
+
+    client = TestClient(app)
+    print(f"{'endpoint':<22}{'rows':>7}{'validate ms':>14}{'fast ms':>10}{'speedup':>9}{'request ms':>13}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        db = SessionLocal()
+        try:
+            seed(db, models, size)
+            for url, schema, fetch, headers in endpoints:
+                rows = fetch(db, committee_id=1)
+                adapter = TypeAdapter(List[schema])
+                validate = timed(lambda: json.dumps(adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")).encode(), args.runs)
+                fast = timed(lambda: dumps(serializer_for(schema).to_list(rows)), args.runs)
+                request = timed(lambda: client.get(url, headers=headers).raise_for_status(), args.runs)
+                print(f"{url:<22}{size:>7}{validate:>14.2f}{fast:>10.2f}{validate / fast:>8.1f}x{request:>13.2f}")
+        finally:
+            db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
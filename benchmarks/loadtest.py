@@ -0,0 +1,515 @@
+"""Synthetic committee session against a locally started app.
+
+Starts uvicorn on a throwaway SQLite database (or the database given with
+--database-url) and seeds a fresh committee with one chair and N delegates.
+It then plays a session for --duration seconds:
+
+    roll call     every delegate logs in at once
+    listeners     M WebSocket clients, using delegate tokens round-robin
+    polling       delegates re-GET chits, motions, the committee state and
+                  the delegate list with If-None-Match, as the app does
+    chits         delegates send each other chits
+    speakers      delegates join and leave the speakers list; the chair
+                  pops the next speaker and runs the timer
+    voting        every --vote-interval seconds the chair tables a motion,
+                  opens a vote and every delegate casts within a second or
+                  two; then the chair closes it
+    resolutions   a delegate uploads a small PDF every --upload-interval s
+
+It reports p50/p95/p99 latency, throughput and error counts per route. It
+also reports broadcast delivery latency, measured from the moment the
+triggering request was sent (or the server's timestamp for TIMER_UPDATE)
+to receipt by each listener. Results are written as JSON
+(benchmarks/results/ by default) together with the commit they were
+measured on. --compare prints the change against an earlier file and exits
+non-zero if a route's p95 or the broadcast p95 grew by more than
+--threshold percent (routes with few samples are shown but not failed on).
+
+Usage (from the repository root; needs httpx and websockets):
+    python -m benchmarks.loadtest [--delegates 60] [--listeners 100] [--duration 60]
+        [--database-url postgresql://...] [--output FILE] [--compare BASELINE.json]
+
+With --database-url the run adds its own committee and leaves existing
+data alone, but use a local database you don't mind filling.
+The generator runs in one process; past a few hundred clients it can become
+the bottleneck itself, so keep an eye on its CPU.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DELEGATE_PASSWORD = "loadtest"
+
+# -- Metrics --
+def percentile(samples: list, p: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    if not samples:
+        return 0.0
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+def summarize(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+        "max_ms": round(samples[-1], 2) if samples else 0.0,
+    }
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list] = {}
+        self.statuses: dict[str, dict] = {}
+        self.failures: dict[str, int] = {}
+        self.deliveries: dict[str, list] = {}
+        self.expected: dict[str, int] = {}
+        # Broadcasts are matched to the request that caused them after the run,
+        # since a delta can reach a listener before its request returns
+        self.sent_at: dict[tuple, float] = {}
+        self.received: list[tuple] = []
+
+    def request(self, route: str, status: int | None, elapsed_ms: float):
+        self.latencies.setdefault(route, []).append(elapsed_ms)
+        statuses = self.statuses.setdefault(route, {})
+        key = str(status) if status is not None else "transport_error"
+        statuses[key] = statuses.get(key, 0) + 1
+
+    def sent(self, key: tuple, at: float):
+        self.sent_at[key] = min(at, self.sent_at.get(key, at))
+
+    def delivered(self, kind: str, latency_ms: float):
+        self.deliveries.setdefault(kind, []).append(latency_ms)
+
+    def match_broadcasts(self):
+        for key, received in self.received:
+            sent = self.sent_at.get(key)
+            if sent is not None:
+                self.delivered(key[0], (received - sent) * 1000)
+        self.received = []
+
+    def report(self, duration: float) -> dict:
+        self.match_broadcasts()
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            statuses = self.statuses[route]
+            errors = sum(n for status, n in statuses.items() if status == "transport_error" or status.startswith("5"))
+            client_errors = sum(n for status, n in statuses.items() if status.startswith("4"))
+            routes[route] = dict(
+                summarize(samples),
+                rps=round(len(samples) / duration, 2),
+                errors=errors,
+                client_errors=client_errors,
+                error_rate=round(errors / len(samples), 4),
+                statuses=statuses,
+            )
+        broadcasts = {}
+        for kind, samples in sorted(self.deliveries.items()):
+            broadcasts[kind] = summarize(samples)
+            if kind in self.expected:
+                broadcasts[kind]["expected"] = self.expected[kind]
+                broadcasts[kind]["delivery_ratio"] = round(len(samples) / self.expected[kind], 4) if self.expected[kind] else 1.0
+        total = sum(len(s) for s in self.latencies.values())
+        errors = sum(r["errors"] for r in routes.values())
+        return {
+            "totals": {
+                "requests": total,
+                "rps": round(total / duration, 2),
+                "errors": errors,
+                "error_rate": round(errors / total, 4) if total else 0.0,
+                "broadcast": summarize([x for s in self.deliveries.values() for x in s]),
+            },
+            "routes": routes,
+            "broadcasts": broadcasts,
+        }
+
+# -- Setup --
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def seed(n_delegates: int, run_id: str) -> dict:
+    """A fresh committee with a chair and n delegates; runs in this process against DATABASE_URL."""
+    sys.path.insert(0, ROOT)
+    import app.main  # noqa: F401  creates and migrates the tables
+    from app import models
+    from app.committee_cache import committee_cache
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        state = committee_cache.create(db, name=f"Load test {run_id}", agenda="Synthetic session")
+        committee_id = state.id
+        chair = {"id": f"{run_id}-chair", "name": f"chair-{run_id}", "password": "chair"}
+        db.add(models.Admin(id=chair["id"], committee_id=committee_id, role="chair", name=chair["name"], password=chair["password"]))
+        delegates = [
+            {"id": f"{run_id}-d{i}", "name": f"Delegate {i}", "country": f"Country {i}"}
+            for i in range(n_delegates)
+        ]
+        db.add_all(
+            models.Delegate(id=d["id"], committee_id=committee_id, name=d["name"], country=d["country"],
+                            password=DELEGATE_PASSWORD, present=False, scores={})
+            for d in delegates
+        )
+        db.commit()
+    finally:
+        db.close()
+    return {"committee_id": committee_id, "chair": chair, "delegates": delegates}
+
+def start_server(port: int, env: dict, workdir: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=dict(env, PYTHONPATH=ROOT + os.pathsep + env.get("PYTHONPATH", "")),
+    )
+
+async def wait_until_up(client, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("Server did not start")
+        await asyncio.sleep(0.2)
+
+def make_pdf(text: str) -> bytes:
+    """A one-page PDF with a line of text, so uploads go through text extraction."""
+    content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+# -- Session --
+class Session:
+    def __init__(self, args, client, base_url: str, fixture: dict, recorder: Recorder):
+        self.args = args
+        self.client = client
+        self.base_url = base_url
+        self.prefix = f"/api/committees/{fixture['committee_id']}"
+        self.chair = fixture["chair"]
+        self.delegates = fixture["delegates"]
+        self.recorder = recorder
+        self.tokens: dict[str, str] = {}
+        self.chair_token = None
+        self.listeners = 0
+        self.stopping = asyncio.Event()
+        self.rng = random.Random(args.seed)
+
+    async def call(self, route: str, method: str, path: str, token: str | None = None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, self.prefix + path, headers=headers, **kwargs)
+        except Exception:
+            self.recorder.request(route, None, (time.perf_counter() - start) * 1000)
+            return None
+        self.recorder.request(route, response.status_code, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def think(self, mean: float):
+        try:
+            await asyncio.wait_for(self.stopping.wait(), self.rng.expovariate(1 / mean))
+        except asyncio.TimeoutError:
+            pass
+
+    # Roll call
+    async def login_all(self):
+        async def login(d):
+            r = await self.call("POST /auth/login", "POST", "/auth/login",
+                                json={"role": "delegate", "username": d["country"], "password": DELEGATE_PASSWORD})
+            if r is not None and r.status_code == 200:
+                self.tokens[d["id"]] = r.json()["token"]
+        r = await self.call("POST /auth/login", "POST", "/auth/login",
+                            json={"role": "chair", "username": self.chair["name"], "password": self.chair["password"]})
+        self.chair_token = r.json()["token"] if r is not None and r.status_code == 200 else None
+        await asyncio.gather(*(login(d) for d in self.delegates))
+
+    # WebSocket listeners
+    async def listen(self, index: int, ready: asyncio.Event):
+        import websockets
+
+        delegate = self.delegates[index % len(self.delegates)]
+        token = self.tokens.get(delegate["id"], "")
+        url = self.base_url.replace("http", "ws", 1) + f"{self.prefix}/ws?token={token}"
+        try:
+            async with websockets.connect(url, compression="deflate", max_size=None) as ws:
+                self.listeners += 1
+                if self.listeners == self.args.listeners:
+                    ready.set()
+                while True:
+                    raw = await ws.recv()
+                    received = time.perf_counter()
+                    message = json.loads(raw)
+                    kind, data = message.get("type"), message.get("data") or {}
+                    if kind == "TIMER_UPDATE" and data.get("server_time"):
+                        self.recorder.delivered(kind, max(0.0, time.time() * 1000 - data["server_time"]))
+                        continue
+                    if kind == "DELEGATE_VOTE_CAST":
+                        key = (kind, data.get("motionId"), data.get("delegateId"))
+                    elif kind == "COMMITTEE_LIST_OP":
+                        key = (kind, data.get("list"), data.get("version"))
+                    else:
+                        continue
+                    self.recorder.received.append((key, received))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.recorder.request("WS /ws", None, 0.0)
+            print(f"Listener {index} dropped: {e}", file=sys.stderr)
+
+    # Delegates
+    async def delegate_loop(self, d: dict):
+        token = self.tokens.get(d["id"])
+        etags: dict[str, str] = {}
+        sent = 0
+        while not self.stopping.is_set():
+            await self.think(self.args.think_time)
+            if self.stopping.is_set():
+                return
+            action = self.rng.random()
+            if action < 0.55:
+                path = self.rng.choice(("/chits/", "/motions/", "/committee/", "/delegates/"))
+                headers = {"If-None-Match": etags[path]} if path in etags else {}
+                r = await self.call(f"GET {path}", "GET", path, token, headers=headers)
+                if r is not None and "etag" in r.headers:
+                    etags[path] = r.headers["etag"]
+            elif action < 0.85:
+                sent += 1
+                to = self.rng.choice(self.delegates)
+                await self.call("POST /chits/", "POST", "/chits/", token, json={
+                    "id": f"{d['id']}-c{sent}-{uuid.uuid4().hex[:6]}", "from_delegate": d["country"], "to_delegate": to["country"],
+                    "message": "Would the delegate yield to a point of information on clause 3?", "timestamp": "10:00 AM",
+                })
+            else:
+                await self.list_op(token, {"op": "append" if self.rng.random() < 0.6 else "remove", "item": d["country"]})
+
+    async def list_op(self, token: str | None, op: dict):
+        start = time.perf_counter()
+        r = await self.call("POST /committee/lists/speakers", "POST", "/committee/lists/speakers", token, json=op)
+        if r is not None and r.status_code == 200:
+            # The delta names the version the response returns. A no-op returns
+            # the current version too, so the earliest request claims it
+            self.recorder.sent(("COMMITTEE_LIST_OP", "speakers", r.json()["version"]), start)
+
+    # Chair
+    async def chair_loop(self):
+        n = 0
+        while not self.stopping.is_set():
+            await self.think(self.args.vote_interval)
+            if self.stopping.is_set():
+                return
+            n += 1
+            await self.list_op(self.chair_token, {"op": "pop_next"})
+            await self.call("POST /committee/timer", "POST", "/committee/timer", self.chair_token, json={"op": "start", "seconds": 60})
+            await self.voting_burst(n)
+            await self.call("POST /committee/timer", "POST", "/committee/timer", self.chair_token, json={"op": "pause"})
+
+    async def voting_burst(self, n: int):
+        motion_id = f"{self.chair['id']}-m{n}-{uuid.uuid4().hex[:6]}"
+        proposer = self.rng.choice(self.delegates)
+        await self.call("POST /motions/", "POST", "/motions/", self.chair_token, json={
+            "id": motion_id, "type": "mod", "proposed_by": proposer["country"], "description": "Moderated caucus on water security",
+            "timestamp": "10:00 AM", "total_time": 600, "speaker_time": 60,
+        })
+        r = await self.call("PUT /committee/voting_session", "PUT", "/committee/voting_session", self.chair_token,
+                            json={"active_voting_motion_id": motion_id, "delegate_votes": {}})
+        if r is None or r.status_code != 200:
+            return
+
+        async def cast(d):
+            await asyncio.sleep(self.rng.uniform(0, self.args.vote_spread))
+            self.recorder.sent(("DELEGATE_VOTE_CAST", motion_id, d["id"]), time.perf_counter())
+            r = await self.call("PUT /committee/cast_vote", "PUT", "/committee/cast_vote", self.tokens.get(d["id"]),
+                                json={"delegate_id": d["id"], "vote": self.rng.choice(("for", "against", "abstain"))})
+            if r is not None and r.status_code == 200:
+                # Committee-wide event: every listener should see it
+                self.recorder.expected["DELEGATE_VOTE_CAST"] = self.recorder.expected.get("DELEGATE_VOTE_CAST", 0) + self.listeners
+        await asyncio.gather(*(cast(d) for d in self.delegates))
+        await self.call("PUT /committee/close_vote", "PUT", "/committee/close_vote", self.chair_token, json={"status": "passed"})
+
+    async def upload_loop(self):
+        n = 0
+        while not self.stopping.is_set():
+            await self.think(self.args.upload_interval)
+            if self.stopping.is_set():
+                return
+            n += 1
+            d = self.rng.choice(self.delegates)
+            pdf = make_pdf(f"Draft resolution {n} on water security by {d['country']} {uuid.uuid4().hex}")
+            await self.call("POST /resolutions/", "POST", "/resolutions/", self.tokens.get(d["id"]),
+                            data={"title": f"Draft {n}", "uploaded_by": d["country"], "authors": json.dumps([d["country"]]), "signatories": "[]"},
+                            files={"file": (f"draft-{n}.pdf", pdf, "application/pdf")})
+
+    async def run(self) -> float:
+        await self.login_all()
+        ready = asyncio.Event()
+        listeners = [asyncio.create_task(self.listen(i, ready)) for i in range(self.args.listeners)]
+        if listeners:
+            try:
+                await asyncio.wait_for(ready.wait(), 30)
+            except asyncio.TimeoutError:
+                print(f"Only {self.listeners} of {self.args.listeners} listeners connected", file=sys.stderr)
+
+        started = time.perf_counter()
+        workers = [asyncio.create_task(self.delegate_loop(d)) for d in self.delegates]
+        workers.append(asyncio.create_task(self.chair_loop()))
+        workers.append(asyncio.create_task(self.upload_loop()))
+        await asyncio.sleep(self.args.duration)
+        self.stopping.set()
+        await asyncio.gather(*workers)
+        duration = time.perf_counter() - started
+
+        await asyncio.sleep(1.0)  # let in-flight broadcasts arrive
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+        return duration
+
+# -- Results --
+def git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=30).stdout.strip()
+        except Exception:
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def print_report(result: dict):
+    print(f"\n{'route':<36}{'count':>7}{'rps':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'errors':>8}{'4xx':>6}")
+    for route, r in result["routes"].items():
+        print(f"{route:<36}{r['count']:>7}{r['rps']:>8.1f}{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['p99_ms']:>8.1f}{r['errors']:>8}{r['client_errors']:>6}")
+    print(f"\n{'broadcast':<36}{'count':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'delivered':>11}")
+    for kind, b in result["broadcasts"].items():
+        ratio = f"{b['delivery_ratio'] * 100:.1f}%" if "delivery_ratio" in b else ""
+        print(f"{kind:<36}{b['count']:>7}{b['p50_ms']:>8.1f}{b['p95_ms']:>8.1f}{b['p99_ms']:>8.1f}{ratio:>11}")
+    t = result["totals"]
+    print(f"\n{t['requests']} requests, {t['rps']} req/s, {t['errors']} errors ({t['error_rate'] * 100:.2f}%)")
+
+# A p95 over fewer samples than this is too noisy to fail a run on
+MIN_COMPARE_SAMPLES = 50
+
+def compare(result: dict, baseline: dict, threshold: float) -> bool:
+    """Prints p95 changes against a baseline; True if anything regressed past threshold percent."""
+    regressed = False
+    print(f"\n{'vs ' + (baseline['meta'].get('commit') or '?')[:10]:<36}{'p95 was':>10}{'p95 now':>10}{'change':>9}")
+    rows = [(route, baseline["routes"].get(route), r) for route, r in result["routes"].items()]
+    rows.append(("broadcast (all)", baseline["totals"]["broadcast"], result["totals"]["broadcast"]))
+    for label, before, now in rows:
+        if not before or not before["p95_ms"]:
+            print(f"{label:<36}{'-':>10}{now['p95_ms']:>10.1f}")
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        counted = min(before["count"], now["count"]) >= MIN_COMPARE_SAMPLES
+        flag = (" !" if counted else " (few samples)") if change > threshold else ""
+        regressed |= counted and change > threshold
+        before, now = before["p95_ms"], now["p95_ms"]
+        print(f"{label:<36}{before:>10.1f}{now:>10.1f}{change:>+8.1f}%{flag}")
+    return regressed
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delegates", type=int, default=60)
+    parser.add_argument("--listeners", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of session after the roll call")
+    parser.add_argument("--think-time", type=float, default=2.0, help="mean seconds between a delegate's actions")
+    parser.add_argument("--vote-interval", type=float, default=15.0, help="mean seconds between votes")
+    parser.add_argument("--vote-spread", type=float, default=1.5, help="seconds over which a vote's ballots arrive")
+    parser.add_argument("--upload-interval", type=float, default=10.0, help="mean seconds between resolution uploads")
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help=f"results file (default: {os.path.relpath(RESULTS_DIR, ROOT)}/loadtest-<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="p95 growth in percent that counts as a regression")
+    parser.add_argument("--fail-on-errors", action="store_true", help="exit non-zero if any request failed with a 5xx or transport error")
+    args = parser.parse_args(argv)
+
+    import httpx
+
+    workdir = tempfile.mkdtemp(prefix="digimun-load-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, UPLOAD_DIR=os.path.join(workdir, "uploads"))
+    os.environ.update(DATABASE_URL=database_url, UPLOAD_DIR=env["UPLOAD_DIR"])
+
+    run_id = f"load{uuid.uuid4().hex[:8]}"
+    fixture = seed(args.delegates, run_id)
+    port = args.port or free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, env, workdir)
+    recorder = Recorder()
+
+    async def session() -> float:
+        limits = httpx.Limits(max_connections=args.delegates + 10, max_keepalive_connections=args.delegates + 10)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            await wait_until_up(client)
+            return await Session(args, client, base_url, fixture, recorder).run()
+
+    try:
+        duration = asyncio.run(session())
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    result = recorder.report(duration)
+    result["meta"] = dict(
+        git_revision(),
+        timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        database=database_url.split(":", 1)[0],
+        duration_s=round(duration, 2),
+        config={k: v for k, v in vars(args).items() if k not in ("output", "compare", "database_url")},
+    )
+    print_report(result)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"loadtest-{(result['meta']['commit'] or 'unknown')[:10]}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    failed = args.fail_on_errors and result["totals"]["errors"] > 0
+    if args.compare:
+        with open(args.compare) as f:
+            failed |= compare(result, json.load(f), args.threshold)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
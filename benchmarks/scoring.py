@@ -0,0 +1,112 @@
+"""Queries and time to score a committee, per delegate vs grouped.
+
+For each committee size this seeds a throwaway SQLite database with
+delegates, passed moderated caucuses and question/answer/other chits, then
+scores every delegate three ways and reports the SQL statements issued and
+the median wall time:
+
+    per-delegate   crud.calculate_delegate_averages for each delegate (the
+                   old get_delegates: two queries per delegate)
+    grouped        scoring.compute_all_averages (a constant number of
+                   grouped aggregate queries per committee)
+    get_delegates  crud.get_delegates, reading the materialized scoreboard
+
+It fails if the per-delegate and grouped results differ for any delegate.
+
+Usage (from the repository root):
+    python -m benchmarks.scoring [--sizes 10,50,190,1000] [--runs 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks.list_endpoints import timed
+
+def seed(db, models, n: int):
+    from app import scoreboard
+
+    db.query(models.Delegate).delete()
+    db.query(models.DelegateScoreboard).delete()
+    db.query(models.Chit).delete()
+    db.query(models.Motion).delete()
+    db.add_all(
+        models.Delegate(id=f"d{i}", name=f"Delegate {i}", country=f"Country {i}", password="p", speeches=i % 4,
+                        scores={"GSL": [7, 8][: i % 3], "Moderated Caucus": i % 9}, committee_id=1)
+        for i in range(n)
+    )
+    db.add_all(
+        models.Motion(id=f"m{i}", type="moderated_caucus", proposed_by=f"d{i}", description="Moderated caucus",
+                      timestamp="10:00 AM", total_time=600, speaker_time=60, status="passed" if i % 2 else "failed", committee_id=1)
+        for i in range(10)
+    )
+    kinds = ("question", "Answer", "other")
+    db.add_all(
+        # Half the chits are sent under the delegate's name rather than id, as older clients did
+        models.Chit(id=f"c{i}", from_delegate=f"d{i % n}" if i % 2 else f"Delegate {i % n}", to_delegate="d0",
+                    message="Point of information", timestamp="10:00 AM", type=kinds[i % 7 % 3], marks=i % 5, seq=i + 1, committee_id=1)
+        for i in range(n * 4)
+    )
+    db.commit()
+    scoreboard.rebuild(db, 1)
+    db.commit()
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,50,190,1000")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="digimun-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)
+
+    from sqlalchemy import event
+    from app import crud, models, scoring
+    from app.database import SessionLocal, engine
+    import app.main  # noqa: F401  creates and migrates the tables
+
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*_):
+        statements[0] += 1
+
+    def queries(fn) -> int:
+        statements[0] = 0
+        fn()
+        return statements[0]
+
+    print(f"{'delegates':>9}{'per-delegate q':>16}{'ms':>9}{'grouped q':>11}{'ms':>9}{'get_delegates q':>17}{'ms':>9}")
+    mismatches = 0
+    for n in (int(s) for s in args.sizes.split(",")):
+        db = SessionLocal()
+        try:
+            seed(db, models, n)
+            delegates = db.query(models.Delegate).filter(models.Delegate.committee_id == 1).all()
+
+            def per_delegate():
+                return {d.id: crud.calculate_delegate_averages(db, d, None) for d in delegates}
+
+            def grouped():
+                return scoring.compute_all_averages(db, delegates)
+
+            def listed():
+                db.expire_all()
+                return crud.get_delegates(db, 1)
+
+            old, new = per_delegate(), grouped()
+            mismatches += sum(old[d.id] != new[d.id] for d in delegates)
+            row = [queries(per_delegate), timed(per_delegate, args.runs), queries(grouped), timed(grouped, args.runs),
+                   queries(listed), timed(listed, args.runs)]
+            print(f"{n:>9}{row[0]:>16}{row[1]:>9.1f}{row[2]:>11}{row[3]:>9.1f}{row[4]:>17}{row[5]:>9.1f}")
+        finally:
+            db.close()
+
+    if mismatches:
+        print(f"{mismatches} delegates scored differently by the grouped queries")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,16 +1,25 @@
 import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
 import type { Role } from '@/data/mockData';
 
+const API_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8001/api';
+
 interface AuthContextType {
   role: Role | null;
   userName: string;
-  login: (role: Role, name: string) => void;
+  login: (role: Role, name: string, token: string) => void;
   logout: () => void;
   isAdmin: boolean;
 }
 
 const AuthContext = createContext<AuthContextType | undefined>(undefined);
 
+// Sessions saved before logins returned a token can't pass the server's
+// admin checks; drop them so those users log in again
+if (localStorage.getItem('digimun-role') && !localStorage.getItem('digimun-token')) {
+  localStorage.removeItem('digimun-role');
+  localStorage.removeItem('digimun-user');
+}
+
 export function AuthProvider({ children }: { children: ReactNode }) {
   const [role, setRole] = useState<Role | null>(() => {
     const saved = localStorage.getItem('digimun-role');
@@ -18,18 +27,25 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   });
   const [userName, setUserName] = useState(() => localStorage.getItem('digimun-user') || '');
 
-  const login = (r: Role, name: string) => {
+  const login = (r: Role, name: string, token: string) => {
     setRole(r);
     setUserName(name);
     localStorage.setItem('digimun-role', r);
     localStorage.setItem('digimun-user', name);
+    localStorage.setItem('digimun-token', token);
   };
 
   const logout = () => {
+    const token = localStorage.getItem('digimun-token');
+    if (token) {
+      // Revoke the session server-side; the local logout doesn't wait for it
+      fetch(`${API_URL}/auth/logout`, { method: 'POST', headers: { Authorization: `Bearer ${token}` } }).catch(() => {});
+    }
     setRole(null);
     setUserName('');
     localStorage.removeItem('digimun-role');
     localStorage.removeItem('digimun-user');
+    localStorage.removeItem('digimun-token');
   };
 
   const isAdmin = role === 'chair' || role === 'vice-chair';
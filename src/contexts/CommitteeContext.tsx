@@ -87,6 +87,27 @@ interface CommitteeActions {
 }
 
 type ContextType = CommitteeState & CommitteeActions;
+
+type ListName = 'speakers' | 'caucus_speakers' | 'question_queue';
+
+function listStateFields(name: ListName, items: string[], current: string | null): Partial<CommitteeState> {
+  if (name === 'speakers') return { speakersList: items, currentSpeaker: current };
+  if (name === 'caucus_speakers') return { caucusSpeakersList: items, caucusCurrentSpeaker: current };
+  return { questionQueue: items };
+}
+
+// Replays a COMMITTEE_LIST_OP delta on the local copy of the list
+function applyListDelta(prev: CommitteeState, delta: { list: ListName; op: string; item: string | null; index?: number }): CommitteeState {
+  const current = delta.list === 'speakers' ? prev.currentSpeaker : delta.list === 'caucus_speakers' ? prev.caucusCurrentSpeaker : null;
+  let items = [...((delta.list === 'speakers' ? prev.speakersList : delta.list === 'caucus_speakers' ? prev.caucusSpeakersList : prev.questionQueue) || [])];
+  let nextCurrent = current;
+  if (delta.op === 'append' && delta.item) items.push(delta.item);
+  else if (delta.op === 'remove') items = items.filter(x => x !== delta.item);
+  else if (delta.op === 'move' && delta.item) { items = items.filter(x => x !== delta.item); items.splice(delta.index ?? items.length, 0, delta.item); }
+  else if (delta.op === 'pop_next') { items = items.slice(1); nextCurrent = delta.item; }
+  else if (delta.op === 'clear') items = [];
+  return { ...prev, ...listStateFields(delta.list, items, nextCurrent) };
+}
 const CommitteeContext = createContext<ContextType | undefined>(undefined);
 
 export function CommitteeProvider({ children }: { children: ReactNode }) {
@@ -127,8 +148,18 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
   useEffect(() => { stateRef.current = state; }, [state]);
 
   const ws = useRef<WebSocket | null>(null);
+  // Server-side version of each editable list; a COMMITTEE_LIST_OP that skips one triggers a refetch
+  const listVersions = useRef<Record<ListName, number>>({ speakers: 0, caucus_speakers: 0, question_queue: 0 });
   const lastMutationRef = useRef<number>(0);
+  // Server clock minus local clock, from GET /clock; timers are rendered on server time
+  const clockOffset = useRef<number>(0);
+  const serverNow = () => Date.now() + clockOffset.current;
   const lockState = () => { lastMutationRef.current = Date.now(); };
+  // Chair-only routes check the session token
+  const authHeaders = (): Record<string, string> => {
+    const token = localStorage.getItem('digimun-token');
+    return token ? { Authorization: `Bearer ${token}` } : {};
+  };
   
   const role = localStorage.getItem('digimun-role') || '';
   const isAdmin = role === 'chair' || role === 'vice-chair';
@@ -136,7 +167,13 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
   useEffect(() => {
     let isMounted = true;
     const connectWs = () => {
-      ws.current = new WebSocket(WS_URL);
+      // Subscribe only to the events meant for this role (and, for delegates, this delegate)
+      const wsParams = new URLSearchParams({ role });
+      const myUser = localStorage.getItem('digimun-user') || '';
+      if (!isAdmin && myUser) wsParams.append('delegate', myUser);
+      const token = localStorage.getItem('digimun-token');
+      if (token) wsParams.append('token', token);
+      ws.current = new WebSocket(`${WS_URL}?${wsParams.toString()}`);
       
       ws.current.onmessage = (event) => {
         const msg = JSON.parse(event.data);
@@ -193,6 +230,26 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
            setState(p => ({ ...p, currentYieldType: msg.data.type, yieldTarget: msg.data.target }));
         }
 
+        // Batched logins: ids of delegates whose presence changed
+        if (msg.type === 'PRESENCE') {
+           const present = new Set<string>(msg.data.present || []);
+           const absent = new Set<string>(msg.data.absent || []);
+           setState(p => ({
+             ...p,
+             delegates: p.delegates.map(d => present.has(d.id) ? { ...d, present: true } : absent.has(d.id) ? { ...d, present: false } : d)
+           }));
+        }
+
+        if (msg.type === 'COMMITTEE_LIST_OP') {
+           lockState();
+           const name = msg.data.list as ListName;
+           if (msg.data.version !== listVersions.current[name] + 1) { refetchLists(); }
+           else {
+             listVersions.current[name] = msg.data.version;
+             setState(p => applyListDelta(p, msg.data));
+           }
+        }
+
         if (msg.type === 'QUESTION_QUEUE_UPDATE') {
            lockState();
            setState(p => ({ ...p, questionQueue: msg.data.question_queue || [] }));
@@ -328,7 +385,15 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
         if (msg.type === 'FLOOR_UPDATE') { lockState(); setState(prev => ({ ...prev, floorOpen: msg.data.floor_open })); }
       };
 
-      ws.current.onclose = () => { if (isMounted) setTimeout(connectWs, 3000); };
+      ws.current.onclose = (event) => {
+        if (event.code === 4401) {
+          // The server wants a session token (missing, expired or from before tokens): log in again
+          ['digimun-role', 'digimun-user', 'digimun-token'].forEach(key => localStorage.removeItem(key));
+          window.location.reload();
+          return;
+        }
+        if (isMounted) setTimeout(connectWs, 3000);
+      };
     };
 
     connectWs();
@@ -340,25 +405,20 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
       try {
         const currentRole = localStorage.getItem('digimun-role') || '';
 
-        const [delegatesRes, motionsRes, chitsRes, committeeRes, activityRes, announceRes, verbatimRes, resolutionsRes] = await Promise.all([
-          fetch(`${API_URL}/delegates/`, { headers: { 'X-Role': currentRole } }), 
-          fetch(`${API_URL}/motions/`), 
-          fetch(`${API_URL}/chits/`),
-          fetch(`${API_URL}/committee/`), 
-          fetch(`${API_URL}/activity/`), 
-          fetch(`${API_URL}/announcements/`),
-          fetch(`${API_URL}/verbatims/`),
-          fetch(`${API_URL}/resolutions/`) // NEW
-        ]);
-
-        const delegates = await delegatesRes.json();
-        const motions = await motionsRes.json();
-        const chits = await chitsRes.json();
-        const committee = await committeeRes.json();
-        const activityLog = await activityRes.json();
-        const announcements = await announceRes.json();
-        const verbatims = await verbatimRes.json();
-        const resolutions = await resolutionsRes.json(); // NEW
+        // One consistent, role-filtered snapshot instead of a GET per table
+        const token = localStorage.getItem('digimun-token');
+        const snapshotRes = await fetch(`${API_URL}/snapshot/`, {
+          headers: { 'X-Role': currentRole, ...(token ? { Authorization: `Bearer ${token}` } : {}) }
+        });
+        const snapshot = await snapshotRes.json();
+
+        const { delegates, motions, chits, committee, announcements, verbatims, resolutions } = snapshot;
+        const activityLog = snapshot.activity;
+        listVersions.current = {
+          speakers: committee.speakers_version || 0,
+          caucus_speakers: committee.caucus_speakers_version || 0,
+          question_queue: committee.question_queue_version || 0,
+        };
 
         setState(prev => {
           const dbRunning = committee.timer_running === true;
@@ -369,7 +429,7 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
           let newLastStartedAt = dbLastStarted;
 
           if (dbRunning && dbLastStarted) {
-            const elapsed = Math.floor((Date.now() - dbLastStarted) / 1000);
+            const elapsed = Math.floor((serverNow() - dbLastStarted) / 1000);
             newTimerSeconds = Math.max(0, committee.timer_seconds - elapsed);
           }
           if (newTimerSeconds <= 0) {
@@ -405,6 +465,25 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
     syncDatabase(); 
   }, []);
 
+  useEffect(() => {
+    // Keep the sample with the shortest round trip; its midpoint is the best estimate
+    const syncClock = async () => {
+      let bestRtt = Infinity;
+      for (let i = 0; i < 5; i++) {
+        const t0 = Date.now();
+        try {
+          const res = await fetch(`${API_URL}/clock?t0=${t0}`);
+          const { server_time } = await res.json();
+          const t1 = Date.now();
+          if (t1 - t0 < bestRtt) { bestRtt = t1 - t0; clockOffset.current = server_time - (t0 + t1) / 2; }
+        } catch (e) { return; }
+      }
+    };
+    syncClock();
+    const interval = setInterval(syncClock, 5 * 60 * 1000);
+    return () => clearInterval(interval);
+  }, []);
+
   useEffect(() => {
     let interval: NodeJS.Timeout;
     if (state.timerRunning) {
@@ -412,9 +491,10 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
         setState(prev => {
           if (!prev.timerRunning) return prev;
           if (prev.lastStartedAt) {
-            const elapsed = Math.floor((Date.now() - prev.lastStartedAt) / 1000);
+            const elapsed = Math.floor((serverNow() - prev.lastStartedAt) / 1000);
             const remaining = Math.max(0, prev.timerDbSeconds - elapsed);
-            if (remaining <= 0) { lockState(); return { ...prev, timerSeconds: 0, timerRunning: false }; }
+            // Hold at zero; the server's "expired" TIMER_UPDATE stops the timer
+            if (remaining <= 0) return prev.timerSeconds === 0 ? prev : { ...prev, timerSeconds: 0 };
             if (remaining !== prev.timerSeconds) return { ...prev, timerSeconds: remaining };
             return prev;
           } else {
@@ -497,34 +577,50 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
     } catch(e) { console.error(e); }
   };
 
-  const toggleQuestionRequest = async (id: string, action: 'add' | 'remove' | 'clear') => {
-    lockState();
-    let newQueue = [...(stateRef.current.questionQueue || [])];
-    
-    if (action === 'clear') {
-      newQueue = [];
-    } else if (action === 'add' && !newQueue.includes(id)) {
-      newQueue.push(id);
-    } else if (action === 'remove') {
-      newQueue = newQueue.filter(x => x !== id);
-    } else {
-      return;
-    }
+  // Reloads every list after a missed delta or a version conflict
+  const refetchLists = async () => {
+    try {
+      const committee = await (await fetch(`${API_URL}/committee/`)).json();
+      listVersions.current = {
+        speakers: committee.speakers_version || 0,
+        caucus_speakers: committee.caucus_speakers_version || 0,
+        question_queue: committee.question_queue_version || 0,
+      };
+      setState(p => ({
+        ...p,
+        speakersList: committee.speakers_list || [], currentSpeaker: committee.current_speaker,
+        caucusSpeakersList: committee.caucus_speakers_list || [], caucusCurrentSpeaker: committee.caucus_current_speaker,
+        questionQueue: committee.question_queue || [],
+      }));
+    } catch (e) { console.error(e); }
+  };
 
-    setState(p => ({ ...p, questionQueue: newQueue }));
-    
+  // Sends one list operation; the server applies it and broadcasts the delta to everyone else
+  const sendListOp = async (name: ListName, op: 'append' | 'remove' | 'move' | 'pop_next' | 'clear', item: string | null = null) => {
+    lockState();
+    // append and remove mean the same on any version of the list, so only the
+    // other ops are refused (409) once someone else has changed it
+    const checked = op === 'move' || op === 'pop_next' || op === 'clear';
     try {
-      if (ws.current?.readyState === WebSocket.OPEN) {
-        ws.current.send(JSON.stringify({ type: 'QUESTION_QUEUE_UPDATE', data: { question_queue: newQueue } }));
-      }
-      await fetch(`${API_URL}/committee/question_queue`, {
-        method: 'PUT',
+      const res = await fetch(`${API_URL}/committee/lists/${name}`, {
+        method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ question_queue: newQueue })
+        body: JSON.stringify({ op, item, expected_version: checked ? listVersions.current[name] : null })
       });
+      if (res.status === 409) return refetchLists();
+      if (!res.ok) return;
+      const view = await res.json();
+      listVersions.current[name] = view.version;
+      setState(p => ({ ...p, ...listStateFields(name, view.items, view.current_speaker) }));
     } catch (e) { console.error(e); }
   };
 
+  const toggleQuestionRequest = async (id: string, action: 'add' | 'remove' | 'clear') => {
+    if (action === 'add') await sendListOp('question_queue', 'append', id);
+    else if (action === 'remove') await sendListOp('question_queue', 'remove', id);
+    else await sendListOp('question_queue', 'clear');
+  };
+
   const startCaucus = async (motionId: string | null) => {
     lockState();
     try {
@@ -556,36 +652,12 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
   };
 
   const addCaucusSpeaker = async (id: string) => {
-    lockState();
     if ((state.caucusSpeakersList || []).includes(id)) return;
-    const newList = [...(state.caucusSpeakersList || []), id];
-    setState(p => ({ ...p, caucusSpeakersList: newList }));
-    try {
-      if (ws.current?.readyState === WebSocket.OPEN) {
-        ws.current.send(JSON.stringify({ type: 'CAUCUS_SPEAKER_UPDATE', data: { caucus_speakers_list: newList, caucus_current_speaker: state.caucusCurrentSpeaker } }));
-      }
-      await fetch(`${API_URL}/committee/caucus_speakers`, {
-        method: 'PUT',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ caucus_speakers_list: newList, caucus_current_speaker: state.caucusCurrentSpeaker })
-      });
-    } catch(e) {}
+    await sendListOp('caucus_speakers', 'append', id);
   };
   
   const removeCaucusSpeaker = async (id: string) => {
-    lockState();
-    const newList = (state.caucusSpeakersList || []).filter(s => s !== id);
-    setState(p => ({ ...p, caucusSpeakersList: newList }));
-    try {
-      if (ws.current?.readyState === WebSocket.OPEN) {
-        ws.current.send(JSON.stringify({ type: 'CAUCUS_SPEAKER_UPDATE', data: { caucus_speakers_list: newList, caucus_current_speaker: state.caucusCurrentSpeaker } }));
-      }
-      await fetch(`${API_URL}/committee/caucus_speakers`, {
-        method: 'PUT',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ caucus_speakers_list: newList, caucus_current_speaker: state.caucusCurrentSpeaker })
-      });
-    } catch(e) {}
+    await sendListOp('caucus_speakers', 'remove', id);
   };
   
   const nextCaucusSpeaker = async () => {
@@ -635,7 +707,7 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
         body: JSON.stringify({ caucus_speakers_list: newList, caucus_current_speaker: nextSpk })
       });
     } catch(e) {}
-    await updateTimerInDB(newTimerSeconds, newTimerRunning, state.timerTotal, now);
+    await sendTimerOp(nextSpk ? 'reset' : 'pause');
   };
 
   const startVotingSession = async (motionId: string | null) => {
@@ -655,7 +727,7 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
   const castLiveVote = async (delegateId: string, vote: 'for' | 'against' | 'abstain' | null) => {
     lockState();
     try {
-      if (ws.current?.readyState === WebSocket.OPEN) ws.current.send(JSON.stringify({ type: 'DELEGATE_VOTE_CAST', data: { delegateId, vote } }));
+      // The server broadcasts DELEGATE_VOTE_CAST with the updated tally once the vote is stored
       await fetch(`${API_URL}/committee/cast_vote`, { method: 'PUT', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ delegate_id: delegateId, vote }) });
       setState(p => {
         const newVotes = { ...(p.delegateVotes || {}) };
@@ -724,11 +796,11 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
     } catch (e) {}
   };
 
-  const updateTimerInDB = async (seconds: number, running: boolean, total: number, lastStarted: number | null) => {
+  // The server owns the countdown and broadcasts the result as TIMER_UPDATE
+  const sendTimerOp = async (op: 'start' | 'pause' | 'reset' | 'set_total', seconds?: number) => {
     lockState();
     try {
-      if (ws.current?.readyState === WebSocket.OPEN) ws.current.send(JSON.stringify({ type: 'TIMER_UPDATE', data: { timer_seconds: seconds, timer_running: running, timer_total: total, last_started_at: lastStarted } }));
-      await fetch(`${API_URL}/committee/timer`, { method: 'PUT', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ timer_seconds: seconds, timer_running: running, timer_total: total, last_started_at: lastStarted }) });
+      await fetch(`${API_URL}/committee/timer`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ op, seconds: seconds ?? null }) });
     } catch (e) {}
   };
 
@@ -776,8 +848,9 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
   const updateChitEBStatus = async (chitId: string, eb_status: string, marks: number) => {
     lockState();
     try {
-      if (ws.current?.readyState === WebSocket.OPEN) ws.current.send(JSON.stringify({ type: 'CHIT_EB_UPDATE', data: { chitId, eb_status, marks } }));
-      await fetch(`${API_URL}/chits/${chitId}`, { method: 'PUT', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ eb_status, marks }) });
+      const chit = stateRef.current.chits.find(c => c.id === chitId);
+      if (ws.current?.readyState === WebSocket.OPEN) ws.current.send(JSON.stringify({ type: 'CHIT_EB_UPDATE', data: { chitId, eb_status, marks, from_delegate: chit?.from_delegate, to_delegate: chit?.to_delegate } }));
+      await fetch(`${API_URL}/chits/${chitId}`, { method: 'PUT', headers: { 'Content-Type': 'application/json', ...authHeaders() }, body: JSON.stringify({ eb_status, marks }) });
       setState(p => ({ ...p, chits: p.chits.map(c => c.id === chitId ? { ...c, eb_status, marks } : c) }));
     } catch (e) {}
   };
@@ -786,7 +859,7 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
     lockState();
     try {
       if (ws.current?.readyState === WebSocket.OPEN) ws.current.send(JSON.stringify({ type: 'SCORE_UPDATE', data: { delegateId, category, score } }));
-      await fetch(`${API_URL}/delegates/${delegateId}/scores?category=${category}&score=${score}`, { method: 'PUT' });
+      await fetch(`${API_URL}/delegates/${delegateId}/scores?category=${category}&score=${score}`, { method: 'PUT', headers: authHeaders() });
       setState(p => ({ ...p, delegates: p.delegates.map(d => d.id === delegateId ? { ...d, scores: { ...d.scores, [category]: score } } : d ) }));
     } catch (e) {}
   };
@@ -811,37 +884,35 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
 
   const startTimer = async (seconds?: number) => {
     lockState();
-    const newTotal = seconds ?? state.timerTotal; const newSeconds = seconds ?? state.timerSeconds; const now = Date.now();
+    const newTotal = seconds ?? state.timerTotal; const newSeconds = seconds ?? state.timerSeconds; const now = serverNow();
     setState(p => ({ ...p, timerRunning: true, timerSeconds: newSeconds, timerDbSeconds: newSeconds, timerTotal: newTotal, lastStartedAt: now }));
-    await updateTimerInDB(newSeconds, true, newTotal, now);
+    await sendTimerOp('start', seconds);
   };
   
   const pauseTimer = async () => {
     lockState(); const currentSecs = stateRef.current.timerSeconds;
     setState(p => ({ ...p, timerRunning: false, timerDbSeconds: currentSecs, timerSeconds: currentSecs, lastStartedAt: null }));
-    await updateTimerInDB(currentSecs, false, state.timerTotal, null);
+    await sendTimerOp('pause');
   };
   
   const resetTimer = async (seconds?: number) => {
     lockState(); const newTotal = seconds ?? state.timerTotal;
     setState(p => ({ ...p, timerSeconds: newTotal, timerDbSeconds: newTotal, timerRunning: false, timerTotal: newTotal, lastStartedAt: null }));
-    await updateTimerInDB(newTotal, false, newTotal, null);
+    await sendTimerOp('reset', seconds);
   };
 
   const setTimerTotal = async (total: number) => {
     lockState(); setState(p => ({ ...p, timerTotal: total }));
-    await updateTimerInDB(state.timerSeconds, state.timerRunning, total, state.lastStartedAt);
+    await sendTimerOp('set_total', total);
   }
 
   const addSpeaker = async (id: string) => {
-    lockState(); if ((state.speakersList || []).includes(id)) return;
-    const newList = [...(state.speakersList || []), id];
-    setState(p => ({ ...p, speakersList: newList })); await updateSpeakersInDB(newList, state.currentSpeaker);
+    if ((state.speakersList || []).includes(id)) return;
+    await sendListOp('speakers', 'append', id);
   };
   
   const removeSpeaker = async (id: string) => {
-    lockState(); const newList = (state.speakersList || []).filter(s => s !== id);
-    setState(p => ({ ...p, speakersList: newList })); await updateSpeakersInDB(newList, state.currentSpeaker);
+    await sendListOp('speakers', 'remove', id);
   };
   
   const nextSpeaker = async () => {
@@ -879,7 +950,7 @@ export function CommitteeProvider({ children }: { children: ReactNode }) {
     }));
     
     await updateSpeakersInDB(newList, nextSpk); 
-    await updateTimerInDB(newTimerSeconds, newTimerRunning, state.timerTotal, now);
+    await sendTimerOp(nextSpk ? 'reset' : 'pause');
   };
 
   const addVerbatim = async (v: Verbatim) => {
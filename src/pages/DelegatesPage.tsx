@@ -26,8 +26,10 @@ export default function DelegatesPage() {
     setIsDeleting(true);
     try {
       const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
+      const token = localStorage.getItem('digimun-token');
       const response = await fetch(`${apiUrl}/delegates/${id}`, {
         method: 'DELETE',
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
       });
 
       if (response.ok) {
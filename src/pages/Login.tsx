@@ -59,7 +59,7 @@ export default function Login() {
       const data = await res.json();
       
       // Pass the verified name/country to the local auth context
-      login(selectedRole, selectedRole === 'delegate' ? data.user.country : data.user.name);
+      login(selectedRole, selectedRole === 'delegate' ? data.user.country : data.user.name, data.token);
       toast.success("Login successful!");
       navigate('/');
       
@@ -0,0 +1,15 @@
+"""Runs the app against a throwaway SQLite database.
+
+DATABASE_URL must be set before app.database is imported, so it is set
+here at collection time. Run from the repository root: python -m pytest
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="digimun-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'test.db')}"
+os.environ.setdefault("UPLOAD_DIR", os.path.join(WORKDIR, "uploads"))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,135 @@
+"""Broadcasts reach sockets held by other workers.
+
+Starts two uvicorn processes on one machine sharing a broadcast backend,
+connects a WebSocket to each and checks that a message published on one
+worker is delivered by the other, including one large enough to be split.
+The unix backend always runs; the postgres backend runs when
+TEST_POSTGRES_URL points at a database that can be written to.
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+import websockets
+
+from app import sessions
+from app.pubsub import PostgresBackend, UnixSocketBackend
+
+from conftest import ROOT, WORKDIR
+
+BACKENDS = [
+    pytest.param(("unix", os.environ["DATABASE_URL"]), id="unix"),
+    pytest.param(("postgres", os.getenv("TEST_POSTGRES_URL")), id="postgres", marks=pytest.mark.skipif(
+        not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")),
+]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def migrate(env: dict):
+    """Creates and migrates the schema once, as a deploy would before starting its workers."""
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=WORKDIR, env=dict(env, PYTHONPATH=ROOT), check=True)
+
+def start_worker(port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=WORKDIR, env=dict(env, PYTHONPATH=ROOT),
+    )
+
+def wait_ready(port: int, process: subprocess.Popen):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    raise RuntimeError(f"Worker on port {port} did not start")
+
+@pytest.fixture(params=BACKENDS)
+def workers(request, tmp_path):
+    backend, database_url = request.param
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        BROADCAST_BACKEND=backend,
+        BROADCAST_SOCKET=str(tmp_path / "broadcast.sock"),
+        BROADCAST_CHANNEL=f"digimun_test_{os.getpid()}",
+        SESSION_SECRET=sessions.SESSION_SECRET,
+    )
+    migrate(env)
+    ports, processes = [free_port(), free_port()], []
+    try:
+        # Both at once, so they race for the hub as workers of one server do
+        for port in ports:
+            processes.append(start_worker(port, env))
+        for port, process in zip(ports, processes):
+            wait_ready(port, process)
+        yield ports
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+async def exchange(ports: list, messages: list) -> list:
+    """Sends each message from a chair's socket on the first worker; returns what a public socket on the second received."""
+    token = sessions.issue_token("admin", "test-chair", "chair", "Chair", 1)
+    sender_url, receiver_url = (f"ws://127.0.0.1:{port}/api/ws" for port in ports)
+    sender_url += f"?token={token}"
+    async with websockets.connect(receiver_url, max_size=None) as receiver, websockets.connect(sender_url, max_size=None) as sender:
+        received = []
+        for message in messages:
+            await sender.send(json.dumps(message))
+            # The receiver is on the other worker, so this copy came through the backend
+            received.append(json.loads(await asyncio.wait_for(receiver.recv(), 10)))
+        return received
+
+def test_broadcast_reaches_other_worker(workers):
+    messages = [
+        {"type": "ANNOUNCEMENT_UPDATE", "data": {"id": "n1"}},
+        # Escapes and non-ASCII grow a NOTIFY part well past its character count
+        {"type": "VERBATIM_UPDATE", "data": {"text": 'He said "order" \\ délégué 世界 😀 ' * 800}},
+    ]
+    assert asyncio.run(exchange(workers, messages)) == messages
+
+def test_one_hub_when_workers_start_together(tmp_path):
+    path = str(tmp_path / "hub.sock")
+    # The socket file of a hub that exited without removing it
+    with socket.socket(socket.AF_UNIX) as stale:
+        stale.bind(path)
+
+    async def elect() -> int:
+        async def ignore(payload):
+            pass
+
+        backends = [UnixSocketBackend(path) for _ in range(5)]
+        await asyncio.gather(*(backend.start(ignore) for backend in backends))
+        hubs = sum(backend.server is not None for backend in backends)
+        for backend in backends:
+            await backend.stop()
+        return hubs
+
+    assert asyncio.run(elect()) == 1
+
+def test_notify_parts_fit_the_postgres_limit():
+    backend = PostgresBackend.__new__(PostgresBackend)
+    backend._parts = {}
+    for payload in ('"' * 20000, "\\" * 9000, "é✓" * 9000, "😀" * 5000, "a" * 7000, ""):
+        parts = PostgresBackend.split(payload)
+        assert all(len(part.encode()) <= PostgresBackend.MAX_PART_BYTES for part in parts)
+        assert [backend._reassemble(part) for part in parts][-1] == payload
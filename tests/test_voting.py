@@ -0,0 +1,86 @@
+"""Casts racing a close must never leave a stored vote out of the final count."""
+import asyncio
+import random
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models
+from app.database import SessionLocal, async_engine
+from app.main import app
+
+DELEGATES = 60
+VOTES = ("for", "against", "abstain")
+
+def seed_committee(client: TestClient) -> int:
+    committee_id = client.post("/api/committees/", json={"name": "Voting race"}).json()["id"]
+    db = SessionLocal()
+    try:
+        db.add_all(
+            models.Delegate(id=f"c{committee_id}-d{i}", committee_id=committee_id, name=f"Delegate {i}",
+                            country=f"Country {i}", password="p", scores={})
+            for i in range(DELEGATES)
+        )
+        db.commit()
+    finally:
+        db.close()
+    return committee_id
+
+async def race(committee_id: int, motion_id: str, seed: int) -> set:
+    """Opens a vote, casts every ballot with jitter and closes it mid-burst.
+    Returns the delegates whose cast was accepted."""
+    prefix = f"/api/committees/{committee_id}/committee"
+    rng = random.Random(seed)
+    accepted = set()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        (await client.post(f"/api/committees/{committee_id}/motions/", json={
+            "id": motion_id, "type": "mod", "proposed_by": "Country 0", "description": "Race",
+            "timestamp": "10:00 AM", "total_time": 600, "speaker_time": 60,
+        })).raise_for_status()
+        (await client.put(f"{prefix}/voting_session", json={"active_voting_motion_id": motion_id, "delegate_votes": {}})).raise_for_status()
+
+        async def cast(i: int):
+            await asyncio.sleep(rng.uniform(0, 0.05))
+            delegate_id = f"c{committee_id}-d{i}"
+            r = await client.put(f"{prefix}/cast_vote", json={"delegate_id": delegate_id, "vote": rng.choice(VOTES)})
+            assert r.status_code in (200, 409), r.text
+            if r.status_code == 200:
+                accepted.add(delegate_id)
+
+        async def close():
+            await asyncio.sleep(rng.uniform(0.01, 0.04))
+            (await client.put(f"{prefix}/close_vote", json={"status": "passed"})).raise_for_status()
+
+        await asyncio.gather(close(), *(cast(i) for i in range(DELEGATES)))
+    return accepted
+
+@pytest.mark.parametrize("cache", ["on", "off"])
+def test_casts_racing_close_are_all_counted(cache, monkeypatch):
+    from app.committee_cache import committee_cache
+    monkeypatch.setattr(committee_cache, "enabled", cache == "on")
+    # Each TestClient runs its own event loop; pooled async connections belong to the last one
+    async_engine.sync_engine.dispose(close=False)
+
+    with TestClient(app) as client:
+        assert committee_cache.running == (cache == "on")
+        committee_id = seed_committee(client)
+        for round_ in range(5):
+            motion_id = f"race-{cache}-{round_}"
+            accepted = client.portal.call(race, committee_id, motion_id, round_)
+
+            db = SessionLocal()
+            try:
+                stored = crud.get_votes(db, motion_id)
+                motion = crud.get_motion(db, motion_id, committee_id)
+                tally = crud.get_vote_tally(db, motion_id)
+            finally:
+                db.close()
+
+            # Every accepted cast is stored, and nothing is stored that the motion doesn't count
+            assert set(stored) == accepted
+            final = {"for": motion.votes_for, "against": motion.votes_against, "abstain": motion.votes_abstain}
+            assert final == {vote: list(stored.values()).count(vote) for vote in VOTES}
+            assert (tally.votes_for, tally.votes_against, tally.votes_abstain) == (motion.votes_for, motion.votes_against, motion.votes_abstain)
+            assert tally.closed